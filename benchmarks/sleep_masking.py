@@ -0,0 +1,66 @@
+"""Micro-benchmark: sleep membership of heart-rate samples.
+
+Compares the per-sample linear scan over raw sleep segments the detectors
+used to do with SleepIntervals: a binary search per sample (``ts in
+intervals``) and a whole-series mask (``intervals.mask``).
+
+Usage:
+    python -m benchmarks.sleep_masking --days 30 --segments-per-night 12
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from health_log.analysis.sleep import SleepIntervals
+
+
+def _make_data(days: int, segments_per_night: int) -> tuple[list[datetime], list[tuple[datetime, datetime]]]:
+    # 1-minute heart rate; each night is 23:00-07:00 split into stage segments with short awake gaps.
+    base = datetime(2026, 1, 1)
+    timestamps = [base + timedelta(minutes=i) for i in range(days * 24 * 60)]
+    segment = timedelta(hours=8) / segments_per_night
+    segments = [
+        (night + k * segment, night + (k + 1) * segment - timedelta(minutes=2))
+        for night in (base + timedelta(days=d, hours=23) for d in range(days))
+        for k in range(segments_per_night)
+    ]
+    return timestamps, segments
+
+
+def _linear_scan(timestamps: list[datetime], segments: list[tuple[datetime, datetime]]) -> list[bool]:
+    return [any(start <= ts <= end for start, end in segments) for ts in timestamps]
+
+
+def _bisect_each(timestamps: list[datetime], intervals: SleepIntervals) -> list[bool]:
+    return [ts in intervals for ts in timestamps]
+
+
+def _time(fn, *args) -> tuple[float, list[bool]]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main(days: int, segments_per_night: int) -> None:
+    timestamps, segments = _make_data(days, segments_per_night)
+    intervals = SleepIntervals(segments)
+
+    scan_s, expected = _time(_linear_scan, timestamps, segments)
+    bisect_s, per_sample = _time(_bisect_each, timestamps, intervals)
+    mask_s, masked = _time(intervals.mask, timestamps)
+
+    assert per_sample == expected and masked == expected, "SleepIntervals diverged from the linear scan"
+    print(f"{len(timestamps)} samples, {len(segments)} segments, {sum(expected)} asleep")
+    print(f"linear scan:        {scan_s:7.3f}s")
+    print(f"ts in intervals:    {bisect_s:7.3f}s  x{scan_s / bisect_s:.0f}")
+    print(f"intervals.mask:     {mask_s:7.3f}s  x{scan_s / mask_s:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--segments-per-night", type=int, default=12)
+    args = parser.parse_args()
+    main(args.days, args.segments_per_night)
@@ -0,0 +1,105 @@
+"""Micro-benchmark: JSON sync body vs HLC1 columnar body for 1 Hz heart rate.
+
+The JSON body is capped at 10k records by ``SyncRequest``; HLC1 has no cap.
+
+Compares payload size (raw and gzip) and the server-side CPU spent turning the
+body into heart_rate rows (validation/decoding + normalization, no DB).
+
+Usage:
+    python -m benchmarks.sync_formats --records 10000
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from health_log.api.v1.sync import SyncRequest
+from health_log.repositories.v1.tables import heart_rate
+from health_log.services.apple_health_parser import TimestampParser
+from health_log.services.columnar_sync import ColumnarBlock, decode_columnar, encode_columnar
+from health_log.services.record_routing import route_records
+from health_log.services.sync_records import sync_record_to_parsed
+
+HEART_RATE = "HKQuantityTypeIdentifierHeartRate"
+_TZ = timezone(timedelta(hours=3))
+
+
+def _make_payloads(count: int) -> tuple[bytes, bytes]:
+    base = datetime(2025, 10, 12, tzinfo=_TZ)
+    records = []
+    start_ms = array("q")
+    for i in range(count):
+        start = base + timedelta(seconds=i)
+        stamp = start.strftime("%Y-%m-%d %H:%M:%S %z")
+        records.append(
+            {
+                "type": HEART_RATE,
+                "sourceName": "Apple Watch",
+                "sourceVersion": "11.0",
+                "creationDate": stamp,
+                "startDate": stamp,
+                "endDate": stamp,
+                "value": str(55 + i % 60),
+                "unit": "count/min",
+            }
+        )
+        start_ms.append(int(start.timestamp() * 1000))
+
+    json_body = json.dumps({"sync_from": "a", "sync_to": "b", "records": records}).encode()
+    columnar_body = encode_columnar(
+        [
+            ColumnarBlock(
+                record_type=HEART_RATE,
+                unit="count/min",
+                source_names=["Apple Watch"] * count,
+                creation_ms=start_ms,
+                start_ms=start_ms,
+                end_ms=start_ms,
+                offset_minutes=array("h", [180]) * count,
+                values=array("d", (55 + i % 60 for i in range(count))),
+            )
+        ]
+    )
+    return json_body, columnar_body
+
+
+def _json_rows(body: bytes) -> list[dict]:
+    request = SyncRequest.model_validate_json(body)
+    parsed = [sync_record_to_parsed(r.model_dump()) for r in request.records]
+    return route_records(parsed, user_id=1, parse_ts=TimestampParser()).rows_by_type[HEART_RATE]
+
+
+def _columnar_rows(body: bytes) -> list[dict]:
+    (block,) = decode_columnar(body)
+    return block.to_rows([col.name for col in heart_rate.columns], user_id=1)
+
+
+def _time(fn, body: bytes) -> tuple[float, list[dict]]:
+    started = time.perf_counter()
+    rows = fn(body)
+    return time.perf_counter() - started, rows
+
+
+def main(record_count: int) -> None:
+    json_body, columnar_body = _make_payloads(record_count)
+    json_s, json_rows = _time(_json_rows, json_body)
+    columnar_s, columnar_rows = _time(_columnar_rows, columnar_body)
+    assert json_rows == columnar_rows, "columnar rows diverged from JSON rows"
+
+    for name, body, seconds in (("json", json_body, json_s), ("columnar", columnar_body, columnar_s)):
+        print(
+            f"{name:9s} size={len(body) / 1024:9.1f} KiB  gzip={len(gzip.compress(body)) / 1024:8.1f} KiB  "
+            f"bytes/record={len(body) / record_count:6.1f}  cpu={seconds:6.3f}s"
+        )
+    print(f"size: x{len(json_body) / len(columnar_body):.1f} smaller, cpu: x{json_s / columnar_s:.1f} faster")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10_000)
+    args = parser.parse_args()
+    main(args.records)
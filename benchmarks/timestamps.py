@@ -0,0 +1,51 @@
+"""Micro-benchmark: TimestampParser vs parse_datetime on export-like timestamps.
+
+Usage:
+    python -m benchmarks.timestamps --records 200000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from health_log.services.apple_health_parser import TimestampParser, parse_datetime
+
+
+def _make_timestamps(count: int) -> list[str]:
+    # Three date fields per record; creationDate repeats across a sync batch.
+    base = datetime(2025, 10, 12)
+    values: list[str] = []
+    for i in range(count):
+        start = base + timedelta(seconds=5 * i)
+        created = base + timedelta(minutes=10 * (i // 120))
+        for dt in (created, start, start + timedelta(seconds=5)):
+            values.append(dt.strftime("%Y-%m-%d %H:%M:%S +0300"))
+    return values
+
+
+def _time(fn, values: list[str]) -> tuple[float, list[datetime | None]]:
+    started = time.perf_counter()
+    result = [fn(v) for v in values]
+    return time.perf_counter() - started, result
+
+
+def main(record_count: int) -> None:
+    values = _make_timestamps(record_count)
+    baseline_s, expected = _time(parse_datetime, values)
+    fast_s, actual = _time(TimestampParser(), values)
+    nocache_s, uncached = _time(TimestampParser(cache_size=1), values)
+
+    assert actual == expected and uncached == expected, "TimestampParser diverged from parse_datetime"
+    per_call = 1e6 / len(values)
+    print(f"parse_datetime:            {baseline_s:7.3f}s  {baseline_s * per_call:6.2f} us/call")
+    print(f"TimestampParser (no cache): {nocache_s:7.3f}s  {nocache_s * per_call:6.2f} us/call")
+    print(f"TimestampParser:            {fast_s:7.3f}s  {fast_s * per_call:6.2f} us/call")
+    print(f"speedup: x{baseline_s / fast_s:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.records)
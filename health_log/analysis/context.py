@@ -0,0 +1,76 @@
+"""Data loaded once per analysis run and shared by every window analyzed in it."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Any
+
+from health_log.analysis.detectors.illness.constants import ILLNESS_TREND_LOOKBACK_DAYS
+from health_log.analysis.loader import RowsView, TableRows
+from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.registry import Detector, Input, Rows, Sleep
+from health_log.analysis.rollups import DailyRollup
+from health_log.analysis.series import TimeSeries
+from health_log.analysis.sleep import SleepIntervals
+
+# Window-independent lookbacks, counted back from the end of the run.
+EXTENDED_LOOKBACK = timedelta(days=180)
+CYCLE_LOOKBACK = timedelta(days=180)
+MOBILITY_LOOKBACK = timedelta(days=90)
+FITNESS_BASELINE_LOOKBACK = timedelta(days=74)
+ILLNESS_LOOKBACK = timedelta(days=ILLNESS_TREND_LOOKBACK_DAYS)
+SPO2_LOOKBACK = timedelta(days=30)
+TEMPERATURE_LOOKBACK = timedelta(days=16)
+
+
+@dataclass(slots=True)
+class AnalysisContext:
+    now: datetime
+    end: datetime
+    user_sex: str
+    tables: dict[Any, TableRows | TimeSeries]
+    sleep_sessions: SleepIntervals
+    # Daily rollups by metric table, oldest first.
+    rollups: dict[Any, Sequence[DailyRollup]]
+    _shared: dict[str, RiskAssessment] = field(default_factory=dict)
+
+    def since(self, lookback: timedelta) -> datetime:
+        return self.end - lookback
+
+    def rows(self, table, since: datetime) -> Sequence[Any]:
+        return self.tables[table].between(since, self.end)
+
+    def sleep(self, since: datetime) -> SleepIntervals:
+        return self.sleep_sessions.overlapping(since, self.end)
+
+    def shared(self, window: TimeWindow, key: str, compute: Callable[[], RiskAssessment]) -> RiskAssessment:
+        """Result of a window-independent detector, computed once per run and relabelled per window."""
+        assessment = self._shared.get(key)
+        if assessment is None:
+            assessment = self._shared[key] = compute()
+        return assessment if assessment.window == window else replace(assessment, window=window)
+
+    def data(self, spec: Input, window_start: datetime) -> Sequence[Any]:
+        """Slice of the loaded data ``spec`` asks for; ``window_start`` bounds window-sized inputs."""
+        since = window_start if spec.lookback is None else self.since(spec.lookback)
+        if isinstance(spec, Rows):
+            return self.rows(spec.table, since)
+        if isinstance(spec, Sleep):
+            return self.sleep(since)
+        days = self.rollups[spec.table]
+        return RowsView(days, bisect_left(days, since.date(), key=_day))
+
+    def assess(self, detector: Detector, window: TimeWindow, window_start: datetime) -> RiskAssessment:
+        def compute() -> RiskAssessment:
+            inputs = {name: self.data(spec, window_start) for name, spec in detector.inputs.items()}
+            return detector.run(inputs, window=window, now=self.now, sex=self.user_sex)
+
+        if detector.window_independent:
+            return self.shared(window, detector.condition, compute)
+        return compute()
+
+
+_day = attrgetter("day")
@@ -10,7 +10,10 @@ from health_log.analysis.detectors.fitness import (
     assess_vo2max_decline_risk,
     assess_walking_tolerance_decline_risk,
 )
-from health_log.analysis.detectors.illness import assess_illness_onset_risk
+from health_log.analysis.detectors.illness import (
+    assess_illness_onset_risk,
+    assess_illness_onset_risk_from_rollups,
+)
 from health_log.analysis.detectors.menstrual_cycle import (
     assess_atypical_menstrual_bleeding_risk,
     assess_menstrual_cycle_delay_risk,
@@ -59,6 +62,7 @@ __all__ = [
     "build_sleep_apnea_event_rows",
     "assess_tachycardia_risk",
     "assess_illness_onset_risk",
+    "assess_illness_onset_risk_from_rollups",
     "assess_menstrual_cycle_start_forecast",
     "assess_menstrual_cycle_delay_risk",
     "assess_ovulation_window_forecast",
@@ -6,7 +6,8 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, merge_datetime_intervals, to_points
+from health_log.analysis.sleep import SleepIntervals, as_sleep_intervals
+from health_log.analysis.utils import EventPoint, to_points
 
 _MIN_REST_POINTS = 20
 _BRADYCARDIA_THRESHOLD = 60  # Clinical definition: resting HR < 60 bpm
@@ -16,18 +17,8 @@ _EPISODE_MIN_DURATION_SEC = 300
 _MEDIAN_STRONG_THRESHOLD = 55  # Consistent with clinical threshold
 
 
-def _in_sleep(ts: datetime, segments: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in segments:
-        if start <= ts <= end:
-            return True
-    return False
-
-
-def _sleep_rest_points(
-    heart: list[EventPoint],
-    segments: list[tuple[datetime, datetime]],
-) -> list[EventPoint]:
-    return [p for p in heart if _in_sleep(p.timestamp, segments)]
+def _sleep_rest_points(heart: list[EventPoint], sleep: SleepIntervals) -> list[EventPoint]:
+    return sleep.within(heart)
 
 
 def _fallback_rest_points(heart: list[EventPoint]) -> list[EventPoint]:
@@ -68,15 +59,13 @@ def _build_bradycardia_episodes(rest_points: list[EventPoint]) -> list[dict]:
 
 def assess_bradycardia_risk(
     heart_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     *,
     low_hr_event_count: int = 0,
     window: TimeWindow,
 ) -> RiskAssessment:
     heart = sorted(to_points(heart_rows), key=lambda p: p.timestamp)
-    segments = merge_datetime_intervals(
-        [(s, e) for s, e in (sleep_segments or []) if s and e and e > s]
-    )
+    segments = as_sleep_intervals(sleep_segments)
 
     if segments:
         rest_points = _sleep_rest_points(heart, segments)
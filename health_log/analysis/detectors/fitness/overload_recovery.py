@@ -6,7 +6,8 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, merge_datetime_intervals, to_points
+from health_log.analysis.sleep import as_sleep_intervals
+from health_log.analysis.utils import EventPoint, to_points
 from health_log.utils import utcnow
 
 _LOOKBACK_DAYS = 14
@@ -17,9 +18,8 @@ _HR_RISE_BPM = 5
 _HRV_DROP_PCT = 0.15
 
 
-def _sleep_hours_per_day(segments: list[tuple[datetime, datetime]]) -> dict[int, float]:
+def _sleep_hours_per_day(merged: Iterable[tuple[datetime, datetime]]) -> dict[int, float]:
     by_day: dict[int, float] = {}
-    merged = merge_datetime_intervals([(s, e) for s, e in segments if s and e and e > s])
     for seg_start, seg_end in merged:
         day_key = seg_start.toordinal()
         hours = (seg_end - seg_start).total_seconds() / 3600.0
@@ -37,7 +37,7 @@ def _daily_median_for_points(points: list[EventPoint], cutoff_start: datetime, c
 
 
 def assess_overload_recovery_risk(
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     heart_rows: Iterable[tuple] | None = None,
     hrv_rows: Iterable[tuple] | None = None,
     *,
@@ -48,7 +48,7 @@ def assess_overload_recovery_risk(
     recent_start = now - timedelta(days=_LOOKBACK_DAYS)
     baseline_start = now - timedelta(days=_LOOKBACK_DAYS + _BASELINE_DAYS)
 
-    segments = list(sleep_segments or [])
+    segments = as_sleep_intervals(sleep_segments)
     hr_points = to_points(heart_rows or [])
     hrv_points = to_points(hrv_rows or [])
 
@@ -6,7 +6,8 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, to_points
+from health_log.analysis.series import as_time_series, daily_medians
+from health_log.analysis.utils import to_points
 from health_log.utils import utcnow
 
 _MIN_RR_DAYS = 7
@@ -15,14 +16,6 @@ _LOOKBACK_DAYS = 14
 _BASELINE_DAYS = 60
 
 
-def _group_by_day_median(points: list[EventPoint], start: datetime, end: datetime) -> list[float]:
-    by_day: dict[int, list[float]] = {}
-    for p in points:
-        if start <= p.timestamp <= end:
-            by_day.setdefault(p.timestamp.toordinal(), []).append(p.value)
-    return [median(vals) for vals in by_day.values()]
-
-
 def assess_respiratory_function_decline_risk(
     respiratory_rows: Iterable[tuple],
     spo2_rows: Iterable[tuple] | None = None,
@@ -36,13 +29,13 @@ def assess_respiratory_function_decline_risk(
     recent_start = now - timedelta(days=_LOOKBACK_DAYS)
     baseline_start = now - timedelta(days=_LOOKBACK_DAYS + _BASELINE_DAYS)
 
-    rr_points = to_points(respiratory_rows)
+    rr_series = as_time_series(respiratory_rows)
     spo2_points = to_points(spo2_rows or [])
     whr_points = to_points(walking_hr_rows or [])
     vo2_points = to_points(vo2max_rows or [])
 
-    recent_rr_vals = _group_by_day_median(rr_points, recent_start, now)
-    baseline_rr_vals = _group_by_day_median(rr_points, baseline_start, recent_start)
+    recent_rr_vals = daily_medians(rr_series, recent_start, now)
+    baseline_rr_vals = daily_medians(rr_series, baseline_start, recent_start)
 
     recent_spo2 = [p.value for p in spo2_points if p.timestamp >= recent_start]
 
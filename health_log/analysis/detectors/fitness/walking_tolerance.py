@@ -6,6 +6,7 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.series import as_time_series, daily_rollups
 from health_log.analysis.utils import EventPoint, to_points
 from health_log.utils import utcnow
 
@@ -16,13 +17,6 @@ _STEP_RANGE_LOW = 3000
 _STEP_RANGE_HIGH = 8000
 
 
-def _group_by_day(points: list[EventPoint]) -> dict[int, float]:
-    by_day: dict[int, list[float]] = {}
-    for p in points:
-        by_day.setdefault(p.timestamp.toordinal(), []).append(p.value)
-    return {day: median(vals) for day, vals in by_day.items()}
-
-
 def assess_walking_tolerance_decline_risk(
     walking_hr_rows: Iterable[tuple],
     step_rows: Iterable[tuple],
@@ -35,9 +29,9 @@ def assess_walking_tolerance_decline_risk(
     baseline_cutoff = now - timedelta(days=_LOOKBACK_DAYS + _BASELINE_DAYS)
 
     whr_points = to_points(walking_hr_rows)
-    step_points = to_points(step_rows)
+    steps = as_time_series(step_rows)
 
-    step_by_day = _group_by_day(step_points)
+    step_by_day = {day.day.toordinal(): day.median for day in daily_rollups(steps).values()}
 
     def filter_moderate_days(pts: list[EventPoint], cutoff_start: datetime, cutoff_end: datetime) -> list[float]:
         result = []
@@ -53,7 +47,7 @@ def assess_walking_tolerance_decline_risk(
     recent_hr_vals = filter_moderate_days(whr_points, recent_cutoff, now)
     baseline_hr_vals = filter_moderate_days(whr_points, baseline_cutoff, recent_cutoff)
 
-    recent_days = len({p.timestamp.toordinal() for p in step_points if p.timestamp >= recent_cutoff})
+    recent_days = len(daily_rollups(steps, recent_cutoff))
 
     if recent_days < _MIN_VALID_DAYS:
         return RiskAssessment(
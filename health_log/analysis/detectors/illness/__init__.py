@@ -1,3 +1,6 @@
-from health_log.analysis.detectors.illness.detector import assess_illness_onset_risk
+from health_log.analysis.detectors.illness.detector import (
+    assess_illness_onset_risk,
+    assess_illness_onset_risk_from_rollups,
+)
 
-__all__ = ["assess_illness_onset_risk"]
+__all__ = ["assess_illness_onset_risk", "assess_illness_onset_risk_from_rollups"]
@@ -5,8 +5,11 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.detectors.illness.features import (
+    TrendSnapshot,
     build_trend_snapshot,
+    build_trend_snapshot_from_rollups,
     trend_days_available,
+    trend_days_available_from_rollups,
 )
 from health_log.analysis.detectors.illness.messages import (
     build_data_quality_disclaimer,
@@ -16,9 +19,24 @@ from health_log.analysis.detectors.illness.messages import (
 )
 from health_log.analysis.detectors.illness.scoring import calculate_score
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.rollups import DailyRollup
 from health_log.analysis.utils import build_score_confidence_interpretation, to_points
 
 
+def _night_window_assessment(window: TimeWindow) -> RiskAssessment:
+    return RiskAssessment(
+        condition="illness_onset_risk",
+        window=window,
+        score=0.0,
+        confidence=0.0,
+        severity="not_applicable",
+        interpretation="Для этого сигнала нужно минимум несколько дней данных, а не только одна ночь.",
+        summary="Окно 'ночь' не подходит для оценки раннего риска болезни по тренду метрик.",
+        recommendation="Смотри оценки по окнам 'week' и 'month'.",
+        clinical_safety_note=CLINICAL_SAFETY_NOTE,
+    )
+
+
 def assess_illness_onset_risk(
     heart_rows: Iterable[tuple],
     hrv_rows: Iterable[tuple],
@@ -28,17 +46,7 @@ def assess_illness_onset_risk(
     window: TimeWindow,
 ) -> RiskAssessment:
     if window == TimeWindow.NIGHT:
-        return RiskAssessment(
-            condition="illness_onset_risk",
-            window=window,
-            score=0.0,
-            confidence=0.0,
-            severity="not_applicable",
-            interpretation="Для этого сигнала нужно минимум несколько дней данных, а не только одна ночь.",
-            summary="Окно 'ночь' не подходит для оценки раннего риска болезни по тренду метрик.",
-            recommendation="Смотри оценки по окнам 'week' и 'month'.",
-            clinical_safety_note=CLINICAL_SAFETY_NOTE,
-        )
+        return _night_window_assessment(window)
 
     heart = to_points(heart_rows)
     hrv = to_points(hrv_rows)
@@ -50,23 +58,53 @@ def assess_illness_onset_risk(
         respiratory=respiratory,
         sleep_rows=sleep_rows or [],
     )
+    if snapshot is None:
+        return _insufficient_data_assessment(window, trend_days_available(heart, hrv))
+    return _snapshot_assessment(window, snapshot)
+
 
+def assess_illness_onset_risk_from_rollups(
+    heart_days: Iterable[DailyRollup],
+    hrv_days: Iterable[DailyRollup],
+    respiratory_days: Iterable[DailyRollup] | None = None,
+    sleep_rows: Iterable[tuple[datetime, datetime]] | None = None,
+    *,
+    window: TimeWindow,
+) -> RiskAssessment:
+    """``assess_illness_onset_risk`` over ``daily_metric_rollups`` rows instead of raw samples."""
+    if window == TimeWindow.NIGHT:
+        return _night_window_assessment(window)
+
+    heart_by_day = {day.day: day for day in heart_days}
+    hrv_by_day = {day.day: day for day in hrv_days}
+    snapshot = build_trend_snapshot_from_rollups(
+        heart_days=heart_by_day,
+        hrv_days=hrv_by_day,
+        respiratory_days={day.day: day for day in respiratory_days or []},
+        sleep_rows=sleep_rows or [],
+    )
     if snapshot is None:
-        days_available = trend_days_available(heart, hrv)
-        return RiskAssessment(
-            condition="illness_onset_risk",
-            window=window,
-            score=0.0,
-            confidence=0.0,
-            severity="unknown",
-            interpretation="Недостаточно данных для интерпретации уровня риска и достоверности сигнала.",
-            summary=build_insufficient_data_summary(days_available),
-            recommendation=(
-                "Продолжай синхронизацию данных. Нужны как минимум 45 валидных суток с достаточным числом точек HR и HRV."
-            ),
-            clinical_safety_note=CLINICAL_SAFETY_NOTE,
-        )
+        return _insufficient_data_assessment(window, trend_days_available_from_rollups(heart_by_day, hrv_by_day))
+    return _snapshot_assessment(window, snapshot)
+
+
+def _insufficient_data_assessment(window: TimeWindow, days_available: int) -> RiskAssessment:
+    return RiskAssessment(
+        condition="illness_onset_risk",
+        window=window,
+        score=0.0,
+        confidence=0.0,
+        severity="unknown",
+        interpretation="Недостаточно данных для интерпретации уровня риска и достоверности сигнала.",
+        summary=build_insufficient_data_summary(days_available),
+        recommendation=(
+            "Продолжай синхронизацию данных. Нужны как минимум 45 валидных суток с достаточным числом точек HR и HRV."
+        ),
+        clinical_safety_note=CLINICAL_SAFETY_NOTE,
+    )
+
 
+def _snapshot_assessment(window: TimeWindow, snapshot: TrendSnapshot) -> RiskAssessment:
     score_result = calculate_score(snapshot)
     interpretation = (
         f"{build_data_quality_disclaimer()} "
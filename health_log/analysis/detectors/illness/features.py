@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime
 from statistics import median
-from typing import Iterable
+from typing import Iterable, Mapping
 
 from health_log.analysis.detectors.illness.constants import (
     BASELINE_MAX_DAYS,
@@ -14,84 +13,46 @@ from health_log.analysis.detectors.illness.constants import (
     MIN_VALID_DAYS_FOR_SIGNAL,
     RECENT_DAYS,
 )
-from health_log.analysis.utils import EventPoint, merge_datetime_intervals
+from health_log.analysis.rollups import DailyRollup, build_daily_rollups
+from health_log.analysis.sleep import as_sleep_intervals
+from health_log.analysis.utils import EventPoint
 
 
-def _group_by_day(points: list[EventPoint]) -> dict[date, list[EventPoint]]:
-    grouped: dict[date, list[EventPoint]] = defaultdict(list)
-    for point in points:
-        grouped[point.timestamp.date()].append(point)
-    return grouped
-
-
-def _merged_sleep(sleep_rows: Iterable[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
-    intervals = [(s, e) for s, e in sleep_rows if s and e and e > s]
-    return merge_datetime_intervals(intervals)
-
-
-def _in_sleep(ts: datetime, merged: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in merged:
-        if start <= ts <= end:
-            return True
-    return False
-
-
-def _day_has_sleep(d: date, sleep_rows: Iterable[tuple[datetime, datetime]]) -> bool:
+def _wake_dates(sleep_rows: Iterable[tuple[datetime, datetime]]) -> set[date]:
     # Bind each sleep segment to the single date when the sleeper wakes up
     # (end.date()), so an overnight session 23:00→07:00 is counted once,
     # not for both calendar days.
-    for start, end in sleep_rows:
-        if start and end and end > start and end.date() == d:
-            return True
-    return False
+    return {end.date() for start, end in sleep_rows if start and end and end > start}
 
 
-def _bottom_fraction_median(values: list[float], fraction: float) -> float | None:
-    if not values:
-        return None
-    s = sorted(values)
-    n = max(1, int(len(s) * fraction))
-    low = s[:n]
-    return float(median(low))
-
-
-def _day_rest_hr(
-    day: date,
-    heart_day: list[EventPoint],
-    merged_sleep: list[tuple[datetime, datetime]],
-) -> float | None:
-    in_bed = [p.value for p in heart_day if _in_sleep(p.timestamp, merged_sleep)]
-    if in_bed:
-        return float(median(in_bed))
-    if not heart_day:
-        return None
-    return _bottom_fraction_median([p.value for p in heart_day], 0.2)
-
-
-def _day_median_hrv_night_else_all(
-    day: date,
-    hrv_day: list[EventPoint],
-    merged_sleep: list[tuple[datetime, datetime]],
-) -> float | None:
-    night = [p.value for p in hrv_day if _in_sleep(p.timestamp, merged_sleep)]
-    if night:
-        return float(median(night))
-    if not hrv_day:
-        return None
-    return float(median([p.value for p in hrv_day]))
-
-
-def _day_median_rr_night_else_all(
-    day: date,
-    rr_day: list[EventPoint],
-    merged_sleep: list[tuple[datetime, datetime]],
-) -> float | None:
-    night = [p.value for p in rr_day if _in_sleep(p.timestamp, merged_sleep)]
-    if night:
-        return float(median(night))
-    if not rr_day:
+def _day_rest_hr(heart_day: DailyRollup) -> float:
+    # In-bed median, else the bottom 20% of the day's samples as a resting proxy.
+    if heart_day.sleep_median is not None:
+        return heart_day.sleep_median
+    return heart_day.bottom20_median
+
+
+def _day_median_night_else_all(day: DailyRollup | None) -> float | None:
+    if day is None:
         return None
-    return float(median([p.value for p in rr_day]))
+    if day.sleep_median is not None:
+        return day.sleep_median
+    return day.median
+
+
+def _valid_days(heart_days: Mapping[date, DailyRollup], hrv_days: Mapping[date, DailyRollup]) -> list[date]:
+    valid_days: list[date] = []
+    for d in sorted(set(heart_days) | set(hrv_days)):
+        heart_day = heart_days.get(d)
+        hrv_day = hrv_days.get(d)
+        if (
+            heart_day is not None
+            and heart_day.count >= HR_POINTS_PER_DAY_MIN
+            and hrv_day is not None
+            and hrv_day.count >= HRV_POINTS_PER_DAY_MIN
+        ):
+            valid_days.append(d)
+    return valid_days
 
 
 @dataclass(slots=True)
@@ -116,19 +77,24 @@ def build_trend_snapshot(
     respiratory: list[EventPoint],
     sleep_rows: Iterable[tuple[datetime, datetime]],
 ) -> TrendSnapshot | None:
-    merged = _merged_sleep(sleep_rows)
-    heart_by_day = _group_by_day(heart)
-    hrv_by_day = _group_by_day(hrv)
-    resp_by_day = _group_by_day(respiratory)
+    sleep_rows = list(sleep_rows)
+    sleep = as_sleep_intervals(sleep_rows)
+    return build_trend_snapshot_from_rollups(
+        heart_days=build_daily_rollups(heart, sleep),
+        hrv_days=build_daily_rollups(hrv, sleep),
+        respiratory_days=build_daily_rollups(respiratory, sleep),
+        sleep_rows=sleep_rows,
+    )
 
-    all_days = sorted(set(heart_by_day) | set(hrv_by_day))
-    valid_days: list[date] = []
-    for d in all_days:
-        if (
-            len(heart_by_day.get(d, [])) >= HR_POINTS_PER_DAY_MIN
-            and len(hrv_by_day.get(d, [])) >= HRV_POINTS_PER_DAY_MIN
-        ):
-            valid_days.append(d)
+
+def build_trend_snapshot_from_rollups(
+    heart_days: Mapping[date, DailyRollup],
+    hrv_days: Mapping[date, DailyRollup],
+    respiratory_days: Mapping[date, DailyRollup],
+    sleep_rows: Iterable[tuple[datetime, datetime]],
+) -> TrendSnapshot | None:
+    """Same snapshot as ``build_trend_snapshot``, from per-day rollups of the three metrics."""
+    valid_days = _valid_days(heart_days, hrv_days)
 
     if len(valid_days) < MIN_VALID_DAYS_FOR_SIGNAL:
         return None
@@ -145,13 +111,9 @@ def build_trend_snapshot(
     day_hrv: dict[date, float] = {}
     day_rr: dict[date, float] = {}
     for d in valid_days:
-        rh = _day_rest_hr(d, heart_by_day.get(d, []), merged)
-        hv = _day_median_hrv_night_else_all(d, hrv_by_day.get(d, []), merged)
-        if rh is None or hv is None:
-            continue
-        day_hr[d] = rh
-        day_hrv[d] = hv
-        rr = _day_median_rr_night_else_all(d, resp_by_day.get(d, []), merged)
+        day_hr[d] = _day_rest_hr(heart_days[d])
+        day_hrv[d] = _day_median_night_else_all(hrv_days[d])
+        rr = _day_median_night_else_all(respiratory_days.get(d))
         if rr is not None:
             day_rr[d] = rr
 
@@ -187,7 +149,8 @@ def build_trend_snapshot(
         if sum([hr_flag, hrv_flag, resp_flag]) >= 2:
             confirmed_days += 1
 
-    days_with_sleep = sum(1 for d in valid_days if _day_has_sleep(d, sleep_rows))
+    wake_dates = _wake_dates(sleep_rows)
+    days_with_sleep = sum(1 for d in valid_days if d in wake_dates)
 
     return TrendSnapshot(
         baseline_rest_hr=baseline_rest_hr,
@@ -199,8 +162,8 @@ def build_trend_snapshot(
         resp_increase_pct=resp_increase_pct,
         confirmed_days=confirmed_days,
         valid_days_count=len(valid_days),
-        total_hr_points=len(heart),
-        total_hrv_points=len(hrv),
+        total_hr_points=sum(day.count for day in heart_days.values()),
+        total_hrv_points=sum(day.count for day in hrv_days.values()),
         days_with_sleep=days_with_sleep,
     )
 
@@ -209,14 +172,11 @@ def trend_days_available(
     heart: list[EventPoint],
     hrv: list[EventPoint],
 ) -> int:
-    heart_by_day = _group_by_day(heart)
-    hrv_by_day = _group_by_day(hrv)
-    all_days = sorted(set(heart_by_day) | set(hrv_by_day))
-    n = 0
-    for d in all_days:
-        if (
-            len(heart_by_day.get(d, [])) >= HR_POINTS_PER_DAY_MIN
-            and len(hrv_by_day.get(d, [])) >= HRV_POINTS_PER_DAY_MIN
-        ):
-            n += 1
-    return n
+    return trend_days_available_from_rollups(build_daily_rollups(heart), build_daily_rollups(hrv))
+
+
+def trend_days_available_from_rollups(
+    heart_days: Mapping[date, DailyRollup],
+    hrv_days: Mapping[date, DailyRollup],
+) -> int:
+    return len(_valid_days(heart_days, hrv_days))
@@ -6,7 +6,7 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, to_points
+from health_log.analysis.series import as_time_series, daily_medians, daily_rollups
 from health_log.utils import utcnow
 
 _MIN_MOBILITY_DAYS = 7
@@ -14,18 +14,6 @@ _LOOKBACK_DAYS = 30
 _BASELINE_DAYS = 60
 
 
-def _daily_medians(points: list[EventPoint], start: datetime, end: datetime) -> list[float]:
-    by_day: dict[int, list[float]] = {}
-    for p in points:
-        if start <= p.timestamp <= end:
-            by_day.setdefault(p.timestamp.toordinal(), []).append(p.value)
-    return [median(vals) for vals in by_day.values()]
-
-
-def _days_count(points: list[EventPoint], start: datetime, end: datetime) -> int:
-    return len({p.timestamp.toordinal() for p in points if start <= p.timestamp <= end})
-
-
 def assess_fall_risk(
     steadiness_rows: Iterable[tuple] | None = None,
     walking_speed_rows: Iterable[tuple] | None = None,
@@ -40,13 +28,14 @@ def assess_fall_risk(
     recent_start = now - timedelta(days=_LOOKBACK_DAYS)
     baseline_start = now - timedelta(days=_LOOKBACK_DAYS + _BASELINE_DAYS)
 
-    steadiness = to_points(steadiness_rows or [])
-    speed = to_points(walking_speed_rows or [])
-    step_len = to_points(step_length_rows or [])
-    double_sup = to_points(double_support_rows or [])
+    steadiness = as_time_series(steadiness_rows or [])
+    speed = as_time_series(walking_speed_rows or [])
+    step_len = as_time_series(step_length_rows or [])
+    double_sup = as_time_series(double_support_rows or [])
 
-    all_mobility = steadiness + speed + step_len + double_sup
-    recent_days = _days_count(all_mobility, recent_start, now)
+    recent_days = len(
+        set().union(*(daily_rollups(series, recent_start, now) for series in (steadiness, speed, step_len, double_sup)))
+    )
 
     if apple_fall_event_count == 0 and recent_days < _MIN_MOBILITY_DAYS:
         return RiskAssessment(
@@ -82,17 +71,17 @@ def assess_fall_risk(
             supporting_metrics={"apple_fall_event_count": apple_fall_event_count, "recent_mobility_days": recent_days},
         )
 
-    recent_steadiness = _daily_medians(steadiness, recent_start, now)
-    baseline_steadiness = _daily_medians(steadiness, baseline_start, recent_start)
+    recent_steadiness = daily_medians(steadiness, recent_start, now)
+    baseline_steadiness = daily_medians(steadiness, baseline_start, recent_start)
 
-    recent_speed = _daily_medians(speed, recent_start, now)
-    baseline_speed = _daily_medians(speed, baseline_start, recent_start)
+    recent_speed = daily_medians(speed, recent_start, now)
+    baseline_speed = daily_medians(speed, baseline_start, recent_start)
 
-    recent_step = _daily_medians(step_len, recent_start, now)
-    baseline_step = _daily_medians(step_len, baseline_start, recent_start)
+    recent_step = daily_medians(step_len, recent_start, now)
+    baseline_step = daily_medians(step_len, baseline_start, recent_start)
 
-    recent_ds = _daily_medians(double_sup, recent_start, now)
-    baseline_ds = _daily_medians(double_sup, baseline_start, recent_start)
+    recent_ds = daily_medians(double_sup, recent_start, now)
+    baseline_ds = daily_medians(double_sup, baseline_start, recent_start)
 
     def decline_pct(baseline_vals: list[float], recent_vals: list[float]) -> float | None:
         if not baseline_vals or not recent_vals:
@@ -0,0 +1,358 @@
+"""Every detector the analyzer runs, in report order, with the data it reads.
+
+Adding a detector means adding its entry here; the engine fetches whatever
+the entries declare.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from health_log.analysis.context import (
+    CYCLE_LOOKBACK,
+    EXTENDED_LOOKBACK,
+    FITNESS_BASELINE_LOOKBACK,
+    ILLNESS_LOOKBACK,
+    MOBILITY_LOOKBACK,
+    SPO2_LOOKBACK,
+    TEMPERATURE_LOOKBACK,
+)
+from health_log.analysis.detectors.cardiac import (
+    assess_atrial_fibrillation_risk,
+    assess_bradycardia_risk,
+    assess_irregular_rhythm_risk,
+)
+from health_log.analysis.detectors.fitness import (
+    assess_hrr_decline_risk,
+    assess_overload_recovery_risk,
+    assess_respiratory_function_decline_risk,
+    assess_vo2max_decline_risk,
+    assess_walking_tolerance_decline_risk,
+)
+from health_log.analysis.detectors.illness import assess_illness_onset_risk_from_rollups
+from health_log.analysis.detectors.menstrual_cycle import (
+    assess_atypical_menstrual_bleeding_risk,
+    assess_menstrual_cycle_delay_risk,
+    assess_menstrual_cycle_start_forecast,
+    assess_menstrual_irregularity_risk,
+    assess_menstrual_start_forecast_with_temp,
+    assess_ovulation_forecast_with_temp,
+    assess_ovulation_window_forecast,
+)
+from health_log.analysis.detectors.mobility import assess_fall_risk, assess_noise_exposure_risk
+from health_log.analysis.detectors.sleep_apnea import assess_sleep_apnea_risk
+from health_log.analysis.detectors.tachycardia import assess_tachycardia_risk
+from health_log.analysis.detectors.vitals import (
+    assess_hypertension_risk,
+    assess_hypotension_risk,
+    assess_low_oxygen_saturation_risk,
+    assess_temperature_shift_risk,
+)
+from health_log.analysis.detectors.weight_activity import (
+    assess_abdominal_obesity_risk,
+    assess_body_composition_trend_risk,
+    assess_cardiometabolic_profile_risk,
+    assess_cardiovascular_obesity_risk,
+    assess_fat_mass_trend_risk,
+    assess_fitness_weight_gain_risk,
+    assess_high_body_fat_risk,
+    assess_insufficient_activity_risk,
+    assess_lean_mass_decline_risk,
+    assess_metabolic_syndrome_risk,
+    assess_obesity_risk,
+    assess_overweight_risk,
+    assess_recovery_obesity_risk,
+    assess_sedentary_lifestyle_risk,
+    assess_weight_trend_risk,
+)
+from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.registry import Detector, Rollups, Rows, Sleep
+from health_log.repositories.v1 import tables
+
+_FEMALE = frozenset({"female"})
+
+
+def _rows(table, lookback: timedelta = EXTENDED_LOOKBACK) -> Rows:
+    return Rows(table, lookback)
+
+
+def _afib_burden_pct(afib_burden_rows) -> float | None:
+    try:
+        vals = [float(v) for _, v in afib_burden_rows if v is not None]
+    except (TypeError, ValueError):
+        return None
+    return max(vals) if vals else None
+
+
+def _bradycardia(heart_rows, sleep_segments, low_hr_event_rows, *, window: TimeWindow) -> RiskAssessment:
+    return assess_bradycardia_risk(
+        heart_rows,
+        sleep_segments=sleep_segments,
+        low_hr_event_count=len(low_hr_event_rows),
+        window=window,
+    )
+
+
+def _irregular_rhythm(
+    irregular_rhythm_event_rows, afib_burden_rows, *, window: TimeWindow, now: datetime
+) -> RiskAssessment:
+    return assess_irregular_rhythm_risk(
+        irregular_rhythm_event_rows,
+        afib_burden_pct=_afib_burden_pct(afib_burden_rows),
+        window=window,
+        now=now,
+    )
+
+
+_heart = Rows(tables.heart_rate)
+_hrv = Rows(tables.heart_rate_variability)
+_respiratory = Rows(tables.respiratory_rate)
+_sbp = Rows(tables.blood_pressure_systolic)
+_dbp = Rows(tables.blood_pressure_diastolic)
+
+_heart_180d = _rows(tables.heart_rate)
+_hrv_74d = _rows(tables.heart_rate_variability, FITNESS_BASELINE_LOOKBACK)
+_respiratory_74d = _rows(tables.respiratory_rate, FITNESS_BASELINE_LOOKBACK)
+_sleep_74d = Sleep(FITNESS_BASELINE_LOOKBACK)
+_spo2 = _rows(tables.oxygen_saturation, SPO2_LOOKBACK)
+_vo2max = _rows(tables.vo_2_max)
+_walking_hr = _rows(tables.walking_heart_rate_average)
+_body_mass = _rows(tables.body_mass)
+_bmi = _rows(tables.body_mass_index)
+_fat = _rows(tables.body_fat_percentage)
+_lean = _rows(tables.lean_body_mass)
+_waist = _rows(tables.waist_circumference)
+_steps = _rows(tables.step_count)
+_menstrual = _rows(tables.menstrual_flow, CYCLE_LOOKBACK)
+_wrist_temp_cycle = _rows(tables.apple_sleeping_wrist_temperature, CYCLE_LOOKBACK)
+_mobility = {
+    "steadiness_rows": _rows(tables.walking_steadiness, MOBILITY_LOOKBACK),
+    "walking_speed_rows": _rows(tables.walking_speed, MOBILITY_LOOKBACK),
+    "step_length_rows": _rows(tables.walking_step_length, MOBILITY_LOOKBACK),
+    "double_support_rows": _rows(tables.walking_double_support_percentage, MOBILITY_LOOKBACK),
+}
+_cardiometabolic = {
+    "body_mass_rows": _body_mass,
+    "bmi_rows": _bmi,
+    "body_fat_rows": _fat,
+    "waist_rows": _waist,
+    "step_rows": _steps,
+    "vo2max_rows": _vo2max,
+    "heart_rows": _heart_180d,
+    "sbp_rows": _sbp,
+}
+
+DETECTORS: tuple[Detector, ...] = (
+    Detector(
+        "sleep_apnea_risk",
+        assess_sleep_apnea_risk,
+        {"respiratory_rows": _respiratory, "heart_rows": _heart, "hrv_rows": _hrv, "sleep_segments": Sleep()},
+        required=("respiratory_rows", "sleep_segments"),
+    ),
+    Detector("tachycardia_risk", assess_tachycardia_risk, {"heart_rows": _heart, "sleep_segments": Sleep()}),
+    Detector(
+        "illness_onset_risk",
+        assess_illness_onset_risk_from_rollups,
+        {
+            "heart_days": Rollups(tables.heart_rate, ILLNESS_LOOKBACK),
+            "hrv_days": Rollups(tables.heart_rate_variability, ILLNESS_LOOKBACK),
+            "respiratory_days": Rollups(tables.respiratory_rate, ILLNESS_LOOKBACK),
+            "sleep_rows": Sleep(ILLNESS_LOOKBACK),
+        },
+        required=(),
+        window_specific=True,
+    ),
+    Detector(
+        "bradycardia_risk",
+        _bradycardia,
+        {"heart_rows": _heart, "sleep_segments": Sleep(), "low_hr_event_rows": _rows(tables.low_heart_rate_event)},
+    ),
+    Detector(
+        "irregular_rhythm_risk",
+        _irregular_rhythm,
+        {
+            "irregular_rhythm_event_rows": _rows(tables.irregular_heart_rhythm_event),
+            "afib_burden_rows": _rows(tables.apple_afib_burden),
+        },
+    ),
+    Detector(
+        "atrial_fibrillation_risk",
+        assess_atrial_fibrillation_risk,
+        {
+            "afib_burden_rows": _rows(tables.apple_afib_burden),
+            "irregular_rhythm_event_rows": _rows(tables.irregular_heart_rhythm_event),
+        },
+        required=(),
+    ),
+    Detector(
+        "low_oxygen_saturation_risk",
+        assess_low_oxygen_saturation_risk,
+        {"spo2_rows": _spo2, "sleep_segments": Sleep()},
+    ),
+    Detector("hypertension_risk", assess_hypertension_risk, {"sbp_rows": _sbp, "dbp_rows": _dbp}),
+    Detector(
+        "hypotension_risk",
+        assess_hypotension_risk,
+        {"sbp_rows": _sbp, "dbp_rows": _dbp, "heart_rows": _heart_180d},
+    ),
+    Detector(
+        "temperature_shift_risk",
+        assess_temperature_shift_risk,
+        {
+            "wrist_temp_rows": _rows(tables.apple_sleeping_wrist_temperature, TEMPERATURE_LOOKBACK),
+            "heart_rows": _heart_180d,
+            "respiratory_rows": _respiratory_74d,
+        },
+    ),
+    Detector("vo2max_decline_risk", assess_vo2max_decline_risk, {"vo2max_rows": _vo2max}),
+    Detector("walking_fitness_decline_risk", assess_hrr_decline_risk, {"hrr_rows": _walking_hr, "vo2max_rows": _vo2max}),
+    Detector(
+        "overload_recovery_risk",
+        assess_overload_recovery_risk,
+        {"sleep_segments": _sleep_74d, "heart_rows": _heart_180d, "hrv_rows": _hrv_74d},
+    ),
+    Detector(
+        "walking_tolerance_decline_risk",
+        assess_walking_tolerance_decline_risk,
+        {"walking_hr_rows": _walking_hr, "step_rows": _steps},
+        required=("step_rows",),
+    ),
+    Detector(
+        "respiratory_function_decline_risk",
+        assess_respiratory_function_decline_risk,
+        {
+            "respiratory_rows": _respiratory_74d,
+            "spo2_rows": _spo2,
+            "walking_hr_rows": _walking_hr,
+            "vo2max_rows": _vo2max,
+        },
+        required=(),
+    ),
+    Detector("fall_risk", assess_fall_risk, _mobility, required=()),
+    Detector(
+        "noise_exposure_risk",
+        assess_noise_exposure_risk,
+        {
+            "env_audio_rows": Rows(tables.environmental_audio_exposure),
+            "headphone_audio_rows": Rows(tables.headphone_audio_exposure),
+        },
+        required=(),
+    ),
+    Detector(
+        "overweight_risk",
+        assess_overweight_risk,
+        {"body_mass_rows": _body_mass, "bmi_rows": _bmi},
+        required=(),
+    ),
+    Detector(
+        "obesity_risk",
+        assess_obesity_risk,
+        {"body_mass_rows": _body_mass, "bmi_rows": _bmi, "body_fat_rows": _fat, "step_rows": _steps},
+        required=(),
+    ),
+    Detector("high_body_fat_risk", assess_high_body_fat_risk, {"body_fat_rows": _fat}),
+    Detector("abdominal_obesity_risk", assess_abdominal_obesity_risk, {"waist_rows": _waist}),
+    Detector("lean_mass_decline_risk", assess_lean_mass_decline_risk, {"lean_mass_rows": _lean}),
+    Detector("weight_trend_risk", assess_weight_trend_risk, {"body_mass_rows": _body_mass}),
+    Detector(
+        "fat_mass_trend_risk",
+        assess_fat_mass_trend_risk,
+        {"body_mass_rows": _body_mass, "body_fat_rows": _fat},
+        required=("body_mass_rows", "body_fat_rows"),
+    ),
+    Detector(
+        "sedentary_lifestyle_risk",
+        assess_sedentary_lifestyle_risk,
+        {"step_rows": _steps, "exercise_time_rows": _rows(tables.apple_exercise_time)},
+    ),
+    Detector("insufficient_activity_risk", assess_insufficient_activity_risk, {"step_rows": _steps}),
+    Detector("cardiometabolic_profile_risk", assess_cardiometabolic_profile_risk, _cardiometabolic, required=()),
+    Detector(
+        "metabolic_syndrome_risk",
+        assess_metabolic_syndrome_risk,
+        {
+            "waist_rows": _waist,
+            "sbp_rows": _sbp,
+            "dbp_rows": _dbp,
+            "body_mass_rows": _body_mass,
+            "bmi_rows": _bmi,
+            "step_rows": _steps,
+        },
+        required=(),
+    ),
+    Detector("cardiovascular_obesity_risk", assess_cardiovascular_obesity_risk, _cardiometabolic, required=()),
+    Detector(
+        "fitness_weight_gain_risk",
+        assess_fitness_weight_gain_risk,
+        {"body_mass_rows": _body_mass, "vo2max_rows": _vo2max, "walking_hr_rows": _walking_hr},
+    ),
+    Detector(
+        "recovery_obesity_risk",
+        assess_recovery_obesity_risk,
+        {
+            "body_mass_rows": _body_mass,
+            "bmi_rows": _bmi,
+            "body_fat_rows": _fat,
+            "step_rows": _steps,
+            "sleep_segments": _sleep_74d,
+            "hrv_rows": _hrv_74d,
+            "heart_rows": _heart_180d,
+        },
+        required=("bmi_rows", "step_rows"),
+    ),
+    Detector(
+        "body_composition_trend_risk",
+        assess_body_composition_trend_risk,
+        {"body_mass_rows": _body_mass, "body_fat_rows": _fat, "lean_mass_rows": _lean},
+        required=("body_mass_rows", "body_fat_rows"),
+    ),
+    Detector(
+        "menstrual_cycle_start_forecast",
+        assess_menstrual_cycle_start_forecast,
+        {"menstrual_rows": _menstrual},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "menstrual_cycle_delay_risk",
+        assess_menstrual_cycle_delay_risk,
+        {"menstrual_rows": _menstrual},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "ovulation_window_forecast",
+        assess_ovulation_window_forecast,
+        {"menstrual_rows": _menstrual},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "menstrual_irregularity_risk",
+        assess_menstrual_irregularity_risk,
+        {"menstrual_rows": _menstrual},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "atypical_menstrual_bleeding_risk",
+        assess_atypical_menstrual_bleeding_risk,
+        {"intermenstrual_event_rows": _rows(tables.intermenstrual_bleeding), "menstrual_rows": _menstrual},
+        required=(),
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "menstrual_start_forecast_with_temp",
+        assess_menstrual_start_forecast_with_temp,
+        {"menstrual_rows": _menstrual, "wrist_temp_rows": _wrist_temp_cycle},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+    Detector(
+        "ovulation_forecast_with_temp",
+        assess_ovulation_forecast_with_temp,
+        {"menstrual_rows": _menstrual, "wrist_temp_rows": _wrist_temp_cycle},
+        sexes=_FEMALE,
+        window_specific=True,
+    ),
+)
@@ -7,26 +7,14 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.sleep import SleepIntervals, as_sleep_intervals
 from health_log.analysis.utils import (
     EventPoint,
-    merge_datetime_intervals,
-    nearest_value,
+    nearest_values,
     to_points,
 )
 
 
-def _in_sleep_segments(ts: datetime, segments: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in segments:
-        if start <= ts <= end:
-            return True
-    return False
-
-
-def _sleep_hours_total(segments: list[tuple[datetime, datetime]]) -> float:
-    merged = merge_datetime_intervals([(s, e) for s, e in segments if s and e and e > s])
-    return sum((e - s).total_seconds() for s, e in merged) / 3600.0
-
-
 @dataclass(slots=True)
 class _ConfirmedPoint:
     timestamp: datetime
@@ -65,34 +53,28 @@ def _filter_sleep(
     respiratory: list[EventPoint],
     heart: list[EventPoint],
     hrv: list[EventPoint],
-    segments: list[tuple[datetime, datetime]],
+    sleep: SleepIntervals,
 ) -> tuple[list[EventPoint], list[EventPoint], list[EventPoint]]:
-    if not segments:
+    if not sleep:
         return [], [], []
-    return (
-        [p for p in respiratory if _in_sleep_segments(p.timestamp, segments)],
-        [p for p in heart if _in_sleep_segments(p.timestamp, segments)],
-        [p for p in hrv if _in_sleep_segments(p.timestamp, segments)],
-    )
+    return sleep.within(respiratory), sleep.within(heart), sleep.within(hrv)
 
 
 def _analyze_sleep_apnea(
     respiratory_rows: Iterable[tuple],
     heart_rows: Iterable[tuple],
     hrv_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None,
 ) -> _ApneaAnalysis | None:
     respiratory = sorted(to_points(respiratory_rows), key=lambda p: p.timestamp)
     heart = sorted(to_points(heart_rows), key=lambda p: p.timestamp)
     hrv = sorted(to_points(hrv_rows), key=lambda p: p.timestamp)
-    segments = merge_datetime_intervals(
-        [(s, e) for s, e in (sleep_segments or []) if s and e and e > s]
-    )
+    segments = as_sleep_intervals(sleep_segments)
 
     if not segments:
         return None
 
-    sleep_hours = _sleep_hours_total(segments)
+    sleep_hours = segments.total_hours()
     if sleep_hours < 4.0:
         return None
 
@@ -107,12 +89,15 @@ def _analyze_sleep_apnea(
     baseline_hr = float(median([p.value for p in heart])) if heart else 0.0
     baseline_hrv = float(median([p.value for p in hrv])) if hrv else 0.0
 
+    low = [p for p in respiratory if p.value < 10.0]
+    low_ts = [p.timestamp for p in low]
     confirmed: list[_ConfirmedPoint] = []
-    for p in respiratory:
-        if p.value >= 10.0:
-            continue
-        hr_near = nearest_value(heart, p.timestamp, max_seconds=120)
-        hrv_near = nearest_value(hrv, p.timestamp, max_seconds=120)
+    for p, hr_near, hrv_near in zip(
+        low,
+        nearest_values(heart, low_ts, max_seconds=120),
+        nearest_values(hrv, low_ts, max_seconds=120),
+        strict=True,
+    ):
         supported_by_hr = (
             hr_near is not None and baseline_hr > 0 and hr_near >= baseline_hr + 12.0
         )
@@ -211,7 +196,7 @@ def build_sleep_apnea_event_rows(
     respiratory_rows: Iterable[tuple],
     heart_rows: Iterable[tuple],
     hrv_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     *,
     detected_by: str = "rule_engine_v1",
 ) -> list[dict[str, object]]:
@@ -234,11 +219,14 @@ def build_sleep_apnea_event_rows(
     for ep in result.risk_episodes:
         max_hr_spike = 0.0
         max_hrv_drop_pct = 0.0
-        for p in ep.points:
-            hr_near = nearest_value(heart_pts, p.timestamp, max_seconds=120)
+        ep_ts = [p.timestamp for p in ep.points]
+        for hr_near, hrv_near in zip(
+            nearest_values(heart_pts, ep_ts, max_seconds=120),
+            nearest_values(hrv_pts, ep_ts, max_seconds=120),
+            strict=True,
+        ):
             if hr_near is not None and baseline_hr_v > 0:
                 max_hr_spike = max(max_hr_spike, hr_near - baseline_hr_v)
-            hrv_near = nearest_value(hrv_pts, p.timestamp, max_seconds=120)
             if hrv_near is not None and baseline_hrv_v > 0:
                 drop_pct = max(0.0, (baseline_hrv_v - hrv_near) / baseline_hrv_v * 100.0)
                 max_hrv_drop_pct = max(max_hrv_drop_pct, drop_pct)
@@ -268,7 +256,7 @@ def assess_sleep_apnea_risk(
     respiratory_rows: Iterable[tuple],
     heart_rows: Iterable[tuple],
     hrv_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     *,
     window: TimeWindow,
 ) -> RiskAssessment:
@@ -6,23 +6,12 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, merge_datetime_intervals, to_points
+from health_log.analysis.sleep import SleepIntervals, as_sleep_intervals
+from health_log.analysis.utils import EventPoint, to_points
 
 
-def _in_sleep(ts: datetime, segments: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in segments:
-        if start <= ts <= end:
-            return True
-    return False
-
-
-def _sleep_total_hours(segments: list[tuple[datetime, datetime]]) -> float:
-    merged = merge_datetime_intervals([(s, e) for s, e in segments if s is not None and e is not None and e > s])
-    return sum((e - s).total_seconds() for s, e in merged) / 3600.0
-
-
-def _rest_points_from_sleep(heart: list[EventPoint], segments: list[tuple[datetime, datetime]]) -> list[EventPoint]:
-    return [p for p in heart if _in_sleep(p.timestamp, segments)]
+def _rest_points_from_sleep(heart: list[EventPoint], sleep: SleepIntervals) -> list[EventPoint]:
+    return sleep.within(heart)
 
 
 def _percentile_20_threshold(values: list[float]) -> float | None:
@@ -33,8 +22,8 @@ def _percentile_20_threshold(values: list[float]) -> float | None:
     return s[idx]
 
 
-def _rest_like_daytime_points(heart: list[EventPoint], segments: list[tuple[datetime, datetime]]) -> list[EventPoint]:
-    outside = [p for p in heart if not _in_sleep(p.timestamp, segments)]
+def _rest_like_daytime_points(heart: list[EventPoint], sleep: SleepIntervals) -> list[EventPoint]:
+    _, outside = sleep.split(heart)
     if not outside:
         return []
     thr = _percentile_20_threshold([p.value for p in heart])
@@ -64,15 +53,15 @@ def _rest_like_daytime_points(heart: list[EventPoint], segments: list[tuple[date
 def _rest_context_intervals(
     used_sleep: bool,
     heart: list[EventPoint],
-    segments: list[tuple[datetime, datetime]],
+    sleep: SleepIntervals,
     rest_points: list[EventPoint],
-) -> list[tuple[datetime, datetime]]:
+) -> SleepIntervals:
     if used_sleep:
-        return merge_datetime_intervals(list(segments))
+        return sleep
     clusters: list[list[EventPoint]] = []
     rest_sorted = sorted(rest_points, key=lambda p: p.timestamp)
     if not rest_sorted:
-        return []
+        return SleepIntervals()
     cur = [rest_sorted[0]]
     for p in rest_sorted[1:]:
         if (p.timestamp - cur[-1].timestamp).total_seconds() <= 120:
@@ -86,25 +75,18 @@ def _rest_context_intervals(
         span = (cl[-1].timestamp - cl[0].timestamp).total_seconds()
         if span >= 300:
             intervals.append((cl[0].timestamp, cl[-1].timestamp))
-    return merge_datetime_intervals(intervals)
-
-
-def _point_in_intervals(ts: datetime, intervals: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in intervals:
-        if start <= ts <= end:
-            return True
-    return False
+    return SleepIntervals(intervals)
 
 
 def _build_episodes(
     heart_sorted: list[EventPoint],
-    rest_intervals: list[tuple[datetime, datetime]],
+    rest_intervals: SleepIntervals,
     rest_baseline_hr: float,
 ) -> list[dict[str, float | int]]:
     # Cluster ALL resting points (not just >100) so the 70% check evaluates
     # the full continuous timeline; two isolated spikes separated by normal
     # measurements cannot silently merge into a single "episode".
-    rest_all = [p for p in heart_sorted if _point_in_intervals(p.timestamp, rest_intervals)]
+    rest_all = [p for p in heart_sorted if p.timestamp in rest_intervals]
     if not rest_all:
         return []
     episodes_raw: list[list[EventPoint]] = []
@@ -144,13 +126,12 @@ def _build_episodes(
 
 def assess_tachycardia_risk(
     heart_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     *,
     window: TimeWindow,
 ) -> RiskAssessment:
     heart = sorted(to_points(heart_rows), key=lambda p: p.timestamp)
-    segments = list(sleep_segments or [])
-    merged_sleep = merge_datetime_intervals([(s, e) for s, e in segments if s and e and e > s])
+    merged_sleep = as_sleep_intervals(sleep_segments)
 
     if not heart:
         return RiskAssessment(
@@ -273,11 +254,11 @@ def assess_tachycardia_risk(
 def _tachycardia_confidence(
     *,
     used_sleep: bool,
-    merged_sleep: list[tuple[datetime, datetime]],
+    merged_sleep: SleepIntervals,
     rest_points_count: int,
     episode_count: int,
 ) -> float:
-    sleep_hours = _sleep_total_hours(merged_sleep)
+    sleep_hours = merged_sleep.total_hours()
     sleep_coverage_component = min(1.0, sleep_hours / 6.0)
     point_density_component = min(1.0, rest_points_count / 60.0)
     signal_consistency_component = min(1.0, episode_count / 2.0)
@@ -6,6 +6,7 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.sleep import SleepIntervals, as_sleep_intervals
 from health_log.analysis.utils import EventPoint, to_points
 from health_log.utils import utcnow
 
@@ -13,29 +14,17 @@ _MIN_MEASUREMENTS = 10
 _LOOKBACK_DAYS = 14
 
 
-def _in_sleep(ts: datetime, segments: list[tuple[datetime, datetime]]) -> bool:
-    for start, end in segments:
-        if start <= ts <= end:
-            return True
-    return False
-
-
-def _nights_with_low_spo2(
-    points: list[EventPoint],
-    segments: list[tuple[datetime, datetime]],
-    threshold: float,
-) -> int:
+def _nights_with_low_spo2(points: list[EventPoint], sleep: SleepIntervals, threshold: float) -> int:
     nights: set[int] = set()
-    for seg_start, seg_end in segments:
-        night_points = [p for p in points if seg_start <= p.timestamp <= seg_end and p.value < threshold]
-        if night_points:
-            nights.add(seg_start.toordinal())
+    for p in points:
+        if p.value < threshold and (night := sleep.containing(p.timestamp)) is not None:
+            nights.add(night[0].toordinal())
     return len(nights)
 
 
 def assess_low_oxygen_saturation_risk(
     spo2_rows: Iterable[tuple],
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     *,
     window: TimeWindow,
     now: datetime | None = None,
@@ -44,7 +33,7 @@ def assess_low_oxygen_saturation_risk(
     cutoff = now - timedelta(days=_LOOKBACK_DAYS)
     all_points = to_points(spo2_rows)
     points = [p for p in all_points if p.timestamp >= cutoff]
-    segments = list(sleep_segments or [])
+    segments = as_sleep_intervals(sleep_segments)
 
     if len(points) < _MIN_MEASUREMENTS:
         return RiskAssessment(
@@ -100,9 +89,7 @@ def assess_low_oxygen_saturation_risk(
 
     if segments:
         nights_low_94 = _nights_with_low_spo2(points, segments, 94)
-        sleep_overlap_low_spo2_count = sum(
-            1 for p in points if p.value < 94 and _in_sleep(p.timestamp, segments)
-        )
+        sleep_overlap_low_spo2_count = len(segments.within([p for p in points if p.value < 94]))
 
     confidence = min(1.0, len(points) / 30.0) * 0.6
     if sleep_overlap_low_spo2_count > 0:
@@ -6,7 +6,8 @@ from typing import Iterable
 
 from health_log.analysis.constants import CLINICAL_SAFETY_NOTE
 from health_log.analysis.models import RiskAssessment, TimeWindow
-from health_log.analysis.utils import EventPoint, to_points
+from health_log.analysis.series import daily_rollups
+from health_log.analysis.utils import to_points
 from health_log.utils import utcnow
 
 _MIN_BASELINE_NIGHTS = 7
@@ -15,18 +16,6 @@ _BASELINE_LOOKBACK_DAYS = 14
 _RECENT_LOOKBACK_DAYS = 2
 
 
-def _group_by_date(points: list[EventPoint]) -> dict[int, list[float]]:
-    by_date: dict[int, list[float]] = {}
-    for p in points:
-        key = p.timestamp.toordinal()
-        by_date.setdefault(key, []).append(p.value)
-    return by_date
-
-
-def _daily_medians(by_date: dict[int, list[float]]) -> list[tuple[int, float]]:
-    return sorted((day, median(vals)) for day, vals in by_date.items())
-
-
 def assess_temperature_shift_risk(
     wrist_temp_rows: Iterable[tuple],
     heart_rows: Iterable[tuple] | None = None,
@@ -44,8 +33,8 @@ def assess_temperature_shift_risk(
     baseline_points = [p for p in all_temp_points if baseline_cutoff <= p.timestamp < recent_cutoff]
     recent_points = [p for p in all_temp_points if p.timestamp >= recent_cutoff]
 
-    baseline_by_date = _group_by_date(baseline_points)
-    recent_by_date = _group_by_date(recent_points)
+    baseline_by_date = daily_rollups(baseline_points)
+    recent_by_date = daily_rollups(recent_points)
 
     if len(baseline_by_date) < _MIN_BASELINE_NIGHTS:
         return RiskAssessment(
@@ -78,8 +67,8 @@ def assess_temperature_shift_risk(
             supporting_metrics={"baseline_nights": len(baseline_by_date), "recent_nights": len(recent_by_date)},
         )
 
-    baseline_values = [m for _, m in _daily_medians(baseline_by_date)]
-    recent_values = [m for _, m in _daily_medians(recent_by_date)]
+    baseline_values = [day.median for day in baseline_by_date.values()]
+    recent_values = [day.median for day in recent_by_date.values()]
     baseline_temp = median(baseline_values)
     recent_temp = median(recent_values)
     delta = recent_temp - baseline_temp
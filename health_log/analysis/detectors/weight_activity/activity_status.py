@@ -26,6 +26,7 @@ from health_log.analysis.detectors.weight_activity.recommendations import (
     build_weight_activity_recommendations,
 )
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.series import as_time_series
 from health_log.analysis.utils import to_points
 from health_log.utils import utcnow
 
@@ -39,13 +40,15 @@ def assess_sedentary_lifestyle_risk(
 ) -> RiskAssessment:
     now = now or utcnow()
     cutoff = now - timedelta(days=MIN_ACTIVITY_DAYS)
-    step_points = [p for p in to_points(step_rows) if p.timestamp >= cutoff]
-    exercise_points = [p for p in to_points(exercise_time_rows or []) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows)
+    exercise = as_time_series(exercise_time_rows or [])
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
+    exercise_points = [p for p in to_points(exercise) if p.timestamp >= cutoff]
 
-    if distinct_day_count(step_points, cutoff, now) < MIN_ACTIVITY_DAYS:
+    if distinct_day_count(steps, cutoff, now) < MIN_ACTIVITY_DAYS:
         return _insufficient("sedentary_lifestyle_risk", window, len(step_points), "мало дней с данными шагов")
 
-    daily_steps = daily_medians(step_points, cutoff, now)
+    daily_steps = daily_medians(steps, cutoff, now)
     median_steps = median(daily_steps)
 
     if median_steps < STEP_LOW_SEDENTARY:
@@ -71,7 +74,7 @@ def assess_sedentary_lifestyle_risk(
     score = score_base
     weekly_exercise = None
     if exercise_points:
-        daily_ex = daily_medians(exercise_points, cutoff, now)
+        daily_ex = daily_medians(exercise, cutoff, now)
         weekly_exercise = sum(daily_ex) / len(daily_ex) * 7 if daily_ex else 0.0
         if weekly_exercise < EXERCISE_TIME_WEEKLY_MIN:
             score = min(1.0, score + 0.1)
@@ -124,12 +127,13 @@ def assess_insufficient_activity_risk(
 ) -> RiskAssessment:
     now = now or utcnow()
     cutoff = now - timedelta(days=MIN_ACTIVITY_DAYS)
-    step_points = [p for p in to_points(step_rows) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows)
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
 
-    if distinct_day_count(step_points, cutoff, now) < MIN_ACTIVITY_DAYS:
+    if distinct_day_count(steps, cutoff, now) < MIN_ACTIVITY_DAYS:
         return _insufficient("insufficient_activity_risk", window, len(step_points), "мало дней с данными шагов")
 
-    daily_steps = daily_medians(step_points, cutoff, now)
+    daily_steps = daily_medians(steps, cutoff, now)
     median_steps = median(daily_steps)
 
     if median_steps < STEP_INSUFFICIENT_HIGH:
@@ -25,6 +25,8 @@ from health_log.analysis.detectors.weight_activity.recommendations import (
     build_weight_activity_recommendations,
 )
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.series import as_time_series
+from health_log.analysis.sleep import as_sleep_intervals
 from health_log.analysis.utils import to_points
 from health_log.utils import utcnow
 
@@ -49,7 +51,8 @@ def assess_cardiometabolic_profile_risk(
 
     mass_points = [p for p in to_points(body_mass_rows or []) if p.timestamp >= cutoff]
     fat_points = [p for p in to_points(body_fat_rows or []) if p.timestamp >= cutoff]
-    step_points = [p for p in to_points(step_rows or []) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows or [])
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
     hr_points = [p for p in to_points(heart_rows or []) if p.timestamp >= cutoff]
     sbp_points = [p for p in to_points(sbp_rows or []) if p.timestamp >= cutoff]
     bmi_points = [p for p in to_points(bmi_rows or []) if p.timestamp >= cutoff]
@@ -78,7 +81,7 @@ def assess_cardiometabolic_profile_risk(
         component_names.append("body_fat")
 
     if step_points:
-        daily_steps = daily_medians(step_points, cutoff, now)
+        daily_steps = daily_medians(steps, cutoff, now)
         med_steps = median(daily_steps) if daily_steps else 5000.0
         comp = min(1.0, max(0.0, (5000 - med_steps) / 5000))
         components.append(comp)
@@ -162,7 +165,8 @@ def assess_metabolic_syndrome_risk(
     sbp_points = [p for p in to_points(sbp_rows or []) if p.timestamp >= cutoff]
     dbp_points = [p for p in to_points(dbp_rows or []) if p.timestamp >= cutoff]
     mass_points = [p for p in to_points(body_mass_rows or []) if p.timestamp >= cutoff]
-    step_points = [p for p in to_points(step_rows or []) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows or [])
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
     bmi_points = [p for p in to_points(bmi_rows or []) if p.timestamp >= cutoff]
 
     criteria_count = 0
@@ -183,7 +187,7 @@ def assess_metabolic_syndrome_risk(
             met_criteria.append(f"повышенное АД ({avg_sbp:.0f}/{avg_dbp:.0f} мм рт.ст.)")
 
     if step_points:
-        daily_steps = daily_medians(step_points, cutoff, now)
+        daily_steps = daily_medians(steps, cutoff, now)
         if median(daily_steps) < 5000:
             criteria_count += 1
             met_criteria.append(f"низкая активность ({median(daily_steps):.0f} шагов/день)")
@@ -280,7 +284,8 @@ def assess_cardiovascular_obesity_risk(
 
     mass_points = [p for p in to_points(body_mass_rows or []) if p.timestamp >= cutoff]
     bmi_points = [p for p in to_points(bmi_rows or []) if p.timestamp >= cutoff]
-    step_points = [p for p in to_points(step_rows or []) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows or [])
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
     vo2_points = [p for p in to_points(vo2max_rows or []) if p.timestamp >= cutoff]
     hr_points = [p for p in to_points(heart_rows or []) if p.timestamp >= cutoff]
     sbp_points = [p for p in to_points(sbp_rows or []) if p.timestamp >= cutoff]
@@ -293,7 +298,7 @@ def assess_cardiovascular_obesity_risk(
 
     step_median = None
     if step_points:
-        daily_steps = daily_medians(step_points, cutoff, now)
+        daily_steps = daily_medians(steps, cutoff, now)
         step_median = median(daily_steps) if daily_steps else None
 
     overweight = bmi_val is not None and bmi_val >= 25
@@ -504,7 +509,7 @@ def assess_recovery_obesity_risk(
     bmi_rows: Iterable[tuple] | None = None,
     body_fat_rows: Iterable[tuple] | None = None,
     step_rows: Iterable[tuple] | None = None,
-    sleep_segments: list[tuple[datetime, datetime]] | None = None,
+    sleep_segments: Iterable[tuple[datetime, datetime]] | None = None,
     hrv_rows: Iterable[tuple] | None = None,
     heart_rows: Iterable[tuple] | None = None,
     *,
@@ -518,10 +523,11 @@ def assess_recovery_obesity_risk(
 
     mass_points = [p for p in to_points(body_mass_rows or []) if p.timestamp >= cutoff]
     bmi_points = [p for p in to_points(bmi_rows or []) if p.timestamp >= cutoff]
-    step_points = [p for p in to_points(step_rows or []) if p.timestamp >= cutoff]
+    steps = as_time_series(step_rows or [])
+    step_points = [p for p in to_points(steps) if p.timestamp >= cutoff]
     hrv_points = [p for p in to_points(hrv_rows or []) if p.timestamp >= cutoff]
     hr_points = [p for p in to_points(heart_rows or []) if p.timestamp >= cutoff]
-    segments = list(sleep_segments or [])
+    segments = as_sleep_intervals(sleep_segments)
 
     bmi_val = None
     if bmi_points:
@@ -531,7 +537,7 @@ def assess_recovery_obesity_risk(
 
     step_median = None
     if step_points:
-        daily_steps = daily_medians(step_points, cutoff, now)
+        daily_steps = daily_medians(steps, cutoff, now)
         step_median = median(daily_steps) if daily_steps else None
 
     overweight = bmi_val is not None and bmi_val >= 25
@@ -4,24 +4,13 @@ from datetime import datetime, timedelta
 from statistics import median
 from typing import TypeVar
 
+from health_log.analysis.series import TimeSeries, daily_medians, daily_rollups
 from health_log.analysis.utils import EventPoint
 
 T = TypeVar("T")
 
 
-def group_by_day(points: list[EventPoint]) -> dict[int, list[float]]:
-    by_day: dict[int, list[float]] = {}
-    for p in points:
-        by_day.setdefault(p.timestamp.toordinal(), []).append(p.value)
-    return by_day
-
-
-def daily_medians(points: list[EventPoint], start: datetime, end: datetime) -> list[float]:
-    by_day = group_by_day([p for p in points if start <= p.timestamp <= end])
-    return [median(vals) for vals in by_day.values()]
-
-
-def window_median(points: list[EventPoint], start: datetime, end: datetime) -> float | None:
+def window_median(points: TimeSeries | list[EventPoint], start: datetime, end: datetime) -> float | None:
     vals = daily_medians(points, start, end)
     return median(vals) if vals else None
 
@@ -47,7 +36,7 @@ def compute_bmi(weight_kg: float, height_m: float) -> float | None:
 
 
 def smoothed_median(
-    points: list[EventPoint],
+    points: TimeSeries | list[EventPoint],
     start: datetime,
     end: datetime,
     *,
@@ -63,5 +52,5 @@ def smoothed_median(
     return None, None
 
 
-def distinct_day_count(points: list[EventPoint], start: datetime, end: datetime) -> int:
-    return len({p.timestamp.toordinal() for p in points if start <= p.timestamp <= end})
+def distinct_day_count(points: TimeSeries | list[EventPoint], start: datetime, end: datetime) -> int:
+    return len(daily_rollups(points, start, end))
@@ -1,72 +1,47 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_, select
+from sqlalchemy import Select, and_, select
 from sqlalchemy.ext.asyncio import AsyncConnection
 
-from health_log.analysis.detectors import (
-    assess_abdominal_obesity_risk,
-    assess_atrial_fibrillation_risk,
-    assess_atypical_menstrual_bleeding_risk,
-    assess_body_composition_trend_risk,
-    assess_bradycardia_risk,
-    assess_cardiometabolic_profile_risk,
-    assess_cardiovascular_obesity_risk,
-    assess_fall_risk,
-    assess_fat_mass_trend_risk,
-    assess_fitness_weight_gain_risk,
-    assess_high_body_fat_risk,
-    assess_hrr_decline_risk,
-    assess_hypertension_risk,
-    assess_hypotension_risk,
-    assess_illness_onset_risk,
-    assess_insufficient_activity_risk,
-    assess_irregular_rhythm_risk,
-    assess_lean_mass_decline_risk,
-    assess_low_oxygen_saturation_risk,
-    assess_menstrual_cycle_delay_risk,
-    assess_menstrual_cycle_start_forecast,
-    assess_menstrual_irregularity_risk,
-    assess_menstrual_start_forecast_with_temp,
-    assess_metabolic_syndrome_risk,
-    assess_noise_exposure_risk,
-    assess_obesity_risk,
-    assess_overload_recovery_risk,
-    assess_overweight_risk,
-    assess_ovulation_forecast_with_temp,
-    assess_ovulation_window_forecast,
-    assess_recovery_obesity_risk,
-    assess_respiratory_function_decline_risk,
-    assess_sedentary_lifestyle_risk,
-    assess_sleep_apnea_risk,
-    assess_tachycardia_risk,
-    assess_temperature_shift_risk,
-    assess_vo2max_decline_risk,
-    assess_walking_tolerance_decline_risk,
-    assess_weight_trend_risk,
-    build_sleep_apnea_event_rows,
-)
-from health_log.analysis.detectors.illness.constants import ILLNESS_TREND_LOOKBACK_DAYS
+from health_log.analysis.context import AnalysisContext
+from health_log.analysis.detectors import build_sleep_apnea_event_rows
+from health_log.analysis.detectors.registry import DETECTORS
+from health_log.analysis.loader import TableRows, load_tables
 from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.registry import plan_data
+from health_log.analysis.rollups import DailyRollup
+from health_log.analysis.series import TimeSeries
+from health_log.analysis.sleep import SleepIntervals
 from health_log.analysis.windows import resolve_window_range
 from health_log.repositories.analysis import AnalysisReportsRepository
-from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.repository import RecordsRepository, numeric_value
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
+from health_log.repositories.snapshot import SnapshotReaders
 from health_log.repositories.v1 import tables
+from health_log.settings import settings
 from health_log.utils import utcnow
 
 
 class HealthRiskAnalyzer:
-    def __init__(self, connection: AsyncConnection, user_id: int):
+    def __init__(self, connection: AsyncConnection, user_id: int, *, fetch_connections: int | None = None):
         self._connection = connection
         self._user_id = user_id
+        self._fetch_connections = fetch_connections or settings.analysis_fetch_connections
         self._user_sex: str | None = None
         self._records_repo = RecordsRepository(connection)
         self._reports_repo = AnalysisReportsRepository(connection)
-
-    async def _fetch_rows(self, table, start: datetime, end: datetime):
-        query = (
-            select(table.c.startDate, table.c.value)
+        self._rollups_repo = DailyRollupsRepository(connection)
+        self._sleep_sessions_repo = SleepSessionsRepository(connection)
+
+    def _rows_query(self, table, start: datetime, end: datetime) -> Select:
+        # Quantity tables return floats from value_num; category tables keep their text values.
+        value_column = numeric_value(table) if "value_num" in table.c else table.c.value
+        return (
+            select(table.c.startDate, value_column)
             .where(
                 and_(
                     table.c.user_id == self._user_id,
@@ -76,22 +51,38 @@ class HealthRiskAnalyzer:
             )
             .order_by(table.c.startDate)
         )
-        return (await self._connection.execute(query)).all()
 
-    async def _fetch_sleep_segments(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
-        query = (
-            select(tables.sleep_analysis.c.startDate, tables.sleep_analysis.c.endDate)
-            .where(
-                and_(
-                    tables.sleep_analysis.c.user_id == self._user_id,
-                    tables.sleep_analysis.c.startDate <= end,
-                    tables.sleep_analysis.c.endDate >= start,
-                )
+    async def _fetch_rows(self, table, start: datetime, end: datetime):
+        return (await self._connection.execute(self._rows_query(table, start, end))).all()
+
+    async def _load_tables(self, starts: dict, end: datetime) -> dict:
+        if self._fetch_connections <= 1:
+            return await load_tables(self._fetch_rows, starts, end, wrap=_table_data)
+
+        # Extra connections come from the same pool; they see committed data only.
+        async with SnapshotReaders(self._connection.engine, self._fetch_connections) as readers:
+
+            async def fetch(table, start: datetime, end: datetime):
+                async with readers.connection() as conn:
+                    return (await conn.execute(self._rows_query(table, start, end))).all()
+
+            return await load_tables(fetch, starts, end, concurrent=True, wrap=_table_data)
+
+    async def _fetch_rollups(self, table, start: datetime, end: datetime) -> list[DailyRollup]:
+        # Whole days: the first day may include samples from just before ``start``.
+        first_day, last_day = start.date(), end.date()
+        rollups = await self._rollups_repo.get_rollups(self._user_id, table.name, first_day, last_day)
+        stored_from = rollups[0].day if rollups else last_day + timedelta(days=1)
+        if stored_from > first_day:
+            # Days before the first stored rollup may predate the table (no backfill yet): build them from raw rows.
+            missing = await self._rollups_repo.compute_rollups(
+                self._user_id, table.name, [(first_day, stored_from - timedelta(days=1))]
             )
-            .order_by(tables.sleep_analysis.c.startDate)
-        )
-        rows = (await self._connection.execute(query)).all()
-        return [(r[0], r[1]) for r in rows]
+            rollups = [*missing.values(), *rollups]
+        return rollups
+
+    async def _fetch_sleep_sessions(self, start: datetime, end: datetime) -> SleepIntervals:
+        return await self._sleep_sessions_repo.get_sessions(self._user_id, start, end)
 
     async def _fetch_user_sex(self) -> str:
         if self._user_sex is not None:
@@ -101,557 +92,102 @@ class HealthRiskAnalyzer:
         self._user_sex = str(sex)
         return self._user_sex
 
-    def _build_cardiac_assessments(
-        self,
-        *,
-        heart_rows,
-        sleep_segments,
-        low_hr_event_rows,
-        irregular_rhythm_rows,
-        afib_burden_rows,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        low_hr_event_count = len(list(low_hr_event_rows))
-        afib_burden_list = list(afib_burden_rows)
-        afib_burden_pct: float | None = None
-        if afib_burden_list:
-            try:
-                vals = [float(v) for _, v in afib_burden_list if v is not None]
-                afib_burden_pct = max(vals) if vals else None
-            except (TypeError, ValueError):
-                afib_burden_pct = None
-
-        return [
-            assess_bradycardia_risk(
-                heart_rows,
-                sleep_segments=sleep_segments,
-                low_hr_event_count=low_hr_event_count,
-                window=window,
-            ),
-            assess_irregular_rhythm_risk(
-                irregular_rhythm_rows,
-                afib_burden_pct=afib_burden_pct,
-                window=window,
-                now=now,
-            ),
-            assess_atrial_fibrillation_risk(
-                afib_burden_list,
-                irregular_rhythm_event_rows=irregular_rhythm_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    def _build_vitals_assessments(
-        self,
-        *,
-        spo2_rows,
-        sleep_segments,
-        sbp_rows,
-        dbp_rows,
-        heart_rows,
-        wrist_temp_rows,
-        respiratory_rows,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        return [
-            assess_low_oxygen_saturation_risk(
-                spo2_rows,
-                sleep_segments=sleep_segments,
-                window=window,
-                now=now,
-            ),
-            assess_hypertension_risk(
-                sbp_rows,
-                dbp_rows,
-                window=window,
-            ),
-            assess_hypotension_risk(
-                sbp_rows,
-                dbp_rows=dbp_rows,
-                heart_rows=heart_rows,
-                window=window,
-            ),
-            assess_temperature_shift_risk(
-                wrist_temp_rows,
-                heart_rows=heart_rows,
-                respiratory_rows=respiratory_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    def _build_fitness_assessments(
-        self,
-        *,
-        vo2max_rows,
-        walking_hr_rows,
-        sleep_segments,
-        heart_rows,
-        hrv_rows,
-        respiratory_rows,
-        spo2_rows,
-        step_rows,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        return [
-            assess_vo2max_decline_risk(
-                vo2max_rows,
-                window=window,
-                now=now,
-            ),
-            assess_hrr_decline_risk(
-                walking_hr_rows,
-                vo2max_rows=vo2max_rows,
-                window=window,
-                now=now,
-            ),
-            assess_overload_recovery_risk(
-                sleep_segments,
-                heart_rows=heart_rows,
-                hrv_rows=hrv_rows,
-                window=window,
-                now=now,
-            ),
-            assess_walking_tolerance_decline_risk(
-                walking_hr_rows,
-                step_rows=step_rows,
-                window=window,
-                now=now,
-            ),
-            assess_respiratory_function_decline_risk(
-                respiratory_rows,
-                spo2_rows=spo2_rows,
-                walking_hr_rows=walking_hr_rows,
-                vo2max_rows=vo2max_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    def _build_mobility_assessments(
-        self,
-        *,
-        steadiness_rows,
-        walking_speed_rows,
-        step_length_rows,
-        double_support_rows,
-        env_audio_rows,
-        headphone_audio_rows,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        return [
-            assess_fall_risk(
-                steadiness_rows,
-                walking_speed_rows=walking_speed_rows,
-                step_length_rows=step_length_rows,
-                double_support_rows=double_support_rows,
-                window=window,
-                now=now,
-            ),
-            assess_noise_exposure_risk(
-                env_audio_rows,
-                headphone_audio_rows=headphone_audio_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    def _build_weight_activity_assessments(
-        self,
-        *,
-        body_mass_rows,
-        bmi_rows,
-        fat_rows,
-        lean_rows,
-        waist_rows,
-        step_rows,
-        exercise_rows,
-        vo2max_rows,
-        heart_rows,
-        sbp_rows,
-        dbp_rows,
-        sleep_segments,
-        hrv_rows,
-        walking_hr_rows,
-        user_sex: str,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        return [
-            assess_overweight_risk(
-                body_mass_rows,
-                bmi_rows=bmi_rows,
-                window=window,
-                now=now,
-            ),
-            assess_obesity_risk(
-                body_mass_rows,
-                bmi_rows=bmi_rows,
-                body_fat_rows=fat_rows,
-                step_rows=step_rows,
-                window=window,
-                now=now,
-            ),
-            assess_high_body_fat_risk(
-                fat_rows,
-                sex=user_sex,
-                window=window,
-                now=now,
-            ),
-            assess_abdominal_obesity_risk(
-                waist_rows,
-                sex=user_sex,
-                window=window,
-                now=now,
-            ),
-            assess_lean_mass_decline_risk(
-                lean_rows,
-                window=window,
-                now=now,
-            ),
-            assess_weight_trend_risk(
-                body_mass_rows,
-                window=window,
-                now=now,
-            ),
-            assess_fat_mass_trend_risk(
-                body_mass_rows,
-                fat_rows,
-                window=window,
-                now=now,
-            ),
-            assess_sedentary_lifestyle_risk(
-                step_rows,
-                exercise_time_rows=exercise_rows,
-                window=window,
-                now=now,
-            ),
-            assess_insufficient_activity_risk(
-                step_rows,
-                window=window,
-                now=now,
-            ),
-            assess_cardiometabolic_profile_risk(
-                body_mass_rows,
-                bmi_rows=bmi_rows,
-                body_fat_rows=fat_rows,
-                waist_rows=waist_rows,
-                step_rows=step_rows,
-                vo2max_rows=vo2max_rows,
-                heart_rows=heart_rows,
-                sbp_rows=sbp_rows,
-                sex=user_sex,
-                window=window,
-                now=now,
-            ),
-            assess_metabolic_syndrome_risk(
-                waist_rows,
-                sbp_rows=sbp_rows,
-                dbp_rows=dbp_rows,
-                body_mass_rows=body_mass_rows,
-                bmi_rows=bmi_rows,
-                step_rows=step_rows,
-                sex=user_sex,
-                window=window,
-                now=now,
-            ),
-            assess_cardiovascular_obesity_risk(
-                body_mass_rows,
-                bmi_rows=bmi_rows,
-                body_fat_rows=fat_rows,
-                waist_rows=waist_rows,
-                step_rows=step_rows,
-                vo2max_rows=vo2max_rows,
-                heart_rows=heart_rows,
-                sbp_rows=sbp_rows,
-                sex=user_sex,
-                window=window,
-                now=now,
-            ),
-            assess_fitness_weight_gain_risk(
-                body_mass_rows,
-                vo2max_rows=vo2max_rows,
-                walking_hr_rows=walking_hr_rows,
-                window=window,
-                now=now,
-            ),
-            assess_recovery_obesity_risk(
-                body_mass_rows,
-                bmi_rows=bmi_rows,
-                body_fat_rows=fat_rows,
-                step_rows=step_rows,
-                sleep_segments=sleep_segments,
-                hrv_rows=hrv_rows,
-                heart_rows=heart_rows,
-                window=window,
-                now=now,
-            ),
-            assess_body_composition_trend_risk(
-                body_mass_rows,
-                fat_rows,
-                lean_mass_rows=lean_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    def _build_menstrual_assessments(
-        self,
-        *,
-        menstrual_rows,
-        intermenstrual_rows,
-        wrist_temp_rows,
-        window: TimeWindow,
-        now: datetime,
-    ) -> list[RiskAssessment]:
-        return [
-            assess_menstrual_cycle_start_forecast(menstrual_rows, window=window, now=now),
-            assess_menstrual_cycle_delay_risk(menstrual_rows, window=window, now=now),
-            assess_ovulation_window_forecast(menstrual_rows, window=window, now=now),
-            assess_menstrual_irregularity_risk(menstrual_rows, window=window, now=now),
-            assess_atypical_menstrual_bleeding_risk(
-                intermenstrual_event_rows=intermenstrual_rows,
-                menstrual_rows=menstrual_rows,
-                window=window,
-                now=now,
-            ),
-            assess_menstrual_start_forecast_with_temp(
-                menstrual_rows,
-                wrist_temp_rows=wrist_temp_rows,
-                window=window,
-                now=now,
-            ),
-            assess_ovulation_forecast_with_temp(
-                menstrual_rows,
-                wrist_temp_rows=wrist_temp_rows,
-                window=window,
-                now=now,
-            ),
-        ]
-
-    async def analyze_window(self, window: TimeWindow, now: datetime | None = None) -> dict[str, object]:
-        now = now or utcnow()
-        start, end = resolve_window_range(window, now)
-
-        illness_start = end - timedelta(days=ILLNESS_TREND_LOOKBACK_DAYS)
-        cycle_start = end - timedelta(days=180)
-        extended_start = end - timedelta(days=180)
-        fitness_baseline_start = end - timedelta(days=74)
-        temperature_start = end - timedelta(days=16)
-        mobility_start = end - timedelta(days=90)
-
+    async def _load_context(self, now: datetime, windows: Iterable[TimeWindow]) -> AnalysisContext:
+        """Load what the detectors that apply to ``windows`` read, each source once over its widest range."""
         user_sex = await self._fetch_user_sex()
-
-        # Window-bounded: used by window-specific detectors (sleep_apnea, tachycardia, bradycardia).
-        heart_rows = await self._fetch_rows(tables.heart_rate, start, end)
-        hrv_rows = await self._fetch_rows(tables.heart_rate_variability, start, end)
-        respiratory_rows = await self._fetch_rows(tables.respiratory_rate, start, end)
-        sleep_segments = await self._fetch_sleep_segments(start, end)
-
-        # Extended: needed by baseline+recent detectors regardless of window size.
-        heart_rows_180d = await self._fetch_rows(tables.heart_rate, extended_start, end)
-        hrv_rows_74d = await self._fetch_rows(tables.heart_rate_variability, fitness_baseline_start, end)
-        respiratory_rows_74d = await self._fetch_rows(tables.respiratory_rate, fitness_baseline_start, end)
-        sleep_segments_74d = await self._fetch_sleep_segments(fitness_baseline_start, end)
-        wrist_temp_rows_16d = await self._fetch_rows(tables.apple_sleeping_wrist_temperature, temperature_start, end)
-        wrist_temp_rows = await self._fetch_rows(tables.apple_sleeping_wrist_temperature, cycle_start, end)
-
-        vo2max_rows = await self._fetch_rows(tables.vo_2_max, extended_start, end)
-
-        illness_heart_rows = await self._fetch_rows(tables.heart_rate, illness_start, end)
-        illness_hrv_rows = await self._fetch_rows(tables.heart_rate_variability, illness_start, end)
-        illness_respiratory_rows = await self._fetch_rows(tables.respiratory_rate, illness_start, end)
-        illness_sleep_segments = await self._fetch_sleep_segments(illness_start, end)
-
-        spo2_rows = await self._fetch_rows(tables.oxygen_saturation, end - timedelta(days=30), end)
-        sbp_rows = await self._fetch_rows(tables.blood_pressure_systolic, start, end)
-        dbp_rows = await self._fetch_rows(tables.blood_pressure_diastolic, start, end)
-        walking_hr_rows = await self._fetch_rows(tables.walking_heart_rate_average, extended_start, end)
-        walking_speed_rows = await self._fetch_rows(tables.walking_speed, mobility_start, end)
-        step_length_rows = await self._fetch_rows(tables.walking_step_length, mobility_start, end)
-        double_support_rows = await self._fetch_rows(tables.walking_double_support_percentage, mobility_start, end)
-        steadiness_rows = await self._fetch_rows(tables.walking_steadiness, mobility_start, end)
-        env_audio_rows = await self._fetch_rows(tables.environmental_audio_exposure, start, end)
-        headphone_audio_rows = await self._fetch_rows(tables.headphone_audio_exposure, start, end)
-        body_mass_rows = await self._fetch_rows(tables.body_mass, extended_start, end)
-        bmi_rows = await self._fetch_rows(tables.body_mass_index, extended_start, end)
-        fat_rows = await self._fetch_rows(tables.body_fat_percentage, extended_start, end)
-        lean_rows = await self._fetch_rows(tables.lean_body_mass, extended_start, end)
-        waist_rows = await self._fetch_rows(tables.waist_circumference, extended_start, end)
-        step_rows = await self._fetch_rows(tables.step_count, extended_start, end)
-        exercise_rows = await self._fetch_rows(tables.apple_exercise_time, extended_start, end)
-        afib_burden_rows = await self._fetch_rows(tables.apple_afib_burden, extended_start, end)
-        low_hr_event_rows = await self._fetch_rows(tables.low_heart_rate_event, extended_start, end)
-        irregular_rhythm_rows = await self._fetch_rows(tables.irregular_heart_rhythm_event, extended_start, end)
-
-        menstrual_rows = []
-        intermenstrual_rows = []
-        if user_sex == "female":
-            menstrual_rows = await self._fetch_rows(tables.menstrual_flow, cycle_start, end)
-            intermenstrual_rows = await self._fetch_rows(tables.intermenstrual_bleeding, extended_start, end)
-
-        sleep_apnea_result = assess_sleep_apnea_risk(
-            respiratory_rows,
-            heart_rows,
-            hrv_rows,
-            sleep_segments=sleep_segments,
-            window=window,
-        )
-        tachycardia_result = assess_tachycardia_risk(
-            heart_rows,
-            sleep_segments=sleep_segments,
-            window=window,
-        )
-        illness_onset_result = assess_illness_onset_risk(
-            illness_heart_rows,
-            illness_hrv_rows,
-            respiratory_rows=illness_respiratory_rows,
-            sleep_rows=illness_sleep_segments,
-            window=window,
-        )
-
-        cardiac_results = self._build_cardiac_assessments(
-            heart_rows=heart_rows,
-            sleep_segments=sleep_segments,
-            low_hr_event_rows=low_hr_event_rows,
-            irregular_rhythm_rows=irregular_rhythm_rows,
-            afib_burden_rows=afib_burden_rows,
-            window=window,
-            now=now,
-        )
-        vitals_results = self._build_vitals_assessments(
-            spo2_rows=spo2_rows,
-            sleep_segments=sleep_segments,
-            sbp_rows=sbp_rows,
-            dbp_rows=dbp_rows,
-            heart_rows=heart_rows_180d,
-            wrist_temp_rows=wrist_temp_rows_16d,
-            respiratory_rows=respiratory_rows_74d,
-            window=window,
-            now=now,
-        )
-        fitness_results = self._build_fitness_assessments(
-            vo2max_rows=vo2max_rows,
-            walking_hr_rows=walking_hr_rows,
-            sleep_segments=sleep_segments_74d,
-            heart_rows=heart_rows_180d,
-            hrv_rows=hrv_rows_74d,
-            respiratory_rows=respiratory_rows_74d,
-            spo2_rows=spo2_rows,
-            step_rows=step_rows,
-            window=window,
+        plan = plan_data(DETECTORS, windows, now=now, sex=user_sex)
+        sleep_sessions = SleepIntervals()
+        if plan.sleep is not None:
+            sleep_sessions = await self._fetch_sleep_sessions(plan.sleep, plan.end)
+        return AnalysisContext(
             now=now,
-        )
-        mobility_results = self._build_mobility_assessments(
-            steadiness_rows=steadiness_rows,
-            walking_speed_rows=walking_speed_rows,
-            step_length_rows=step_length_rows,
-            double_support_rows=double_support_rows,
-            env_audio_rows=env_audio_rows,
-            headphone_audio_rows=headphone_audio_rows,
-            window=window,
-            now=now,
-        )
-        weight_activity_results = self._build_weight_activity_assessments(
-            body_mass_rows=body_mass_rows,
-            bmi_rows=bmi_rows,
-            fat_rows=fat_rows,
-            lean_rows=lean_rows,
-            waist_rows=waist_rows,
-            step_rows=step_rows,
-            exercise_rows=exercise_rows,
-            vo2max_rows=vo2max_rows,
-            heart_rows=heart_rows_180d,
-            sbp_rows=sbp_rows,
-            dbp_rows=dbp_rows,
-            sleep_segments=sleep_segments_74d,
-            hrv_rows=hrv_rows_74d,
-            walking_hr_rows=walking_hr_rows,
+            end=plan.end,
             user_sex=user_sex,
-            window=window,
-            now=now,
+            tables=await self._load_tables(plan.tables, plan.end),
+            sleep_sessions=sleep_sessions,
+            rollups={table: await self._fetch_rollups(table, start, plan.end) for table, start in plan.rollups.items()},
         )
 
-        menstrual_assessments: list[RiskAssessment] = []
-        if user_sex == "female":
-            menstrual_assessments = self._build_menstrual_assessments(
-                menstrual_rows=menstrual_rows,
-                intermenstrual_rows=intermenstrual_rows,
-                wrist_temp_rows=wrist_temp_rows,
-                window=window,
-                now=now,
-            )
+    async def _assess_window(self, ctx: AnalysisContext, window: TimeWindow) -> dict[str, object]:
+        start, end = resolve_window_range(window, ctx.now)
+        assessments = [
+            ctx.assess(detector, window, start)
+            for detector in DETECTORS
+            if detector.applies_to(window, ctx.user_sex)
+        ]
 
         inserted_events = 0
         if window == TimeWindow.NIGHT:
             events = build_sleep_apnea_event_rows(
-                respiratory_rows,
-                heart_rows,
-                hrv_rows,
-                sleep_segments=sleep_segments,
+                ctx.rows(tables.respiratory_rate, start),
+                ctx.rows(tables.heart_rate, start),
+                ctx.rows(tables.heart_rate_variability, start),
+                sleep_segments=ctx.sleep(start),
             )
             inserted_events = await self._records_repo.insert_sleep_apnea_events(self._user_id, events)
 
-        assessments = [
-            sleep_apnea_result,
-            tachycardia_result,
-            illness_onset_result,
-            *cardiac_results,
-            *vitals_results,
-            *fitness_results,
-            *mobility_results,
-            *weight_activity_results,
-            *menstrual_assessments,
-        ]
+        return {
+            "window": window,
+            "start": start,
+            "end": end,
+            "assessments": assessments,
+            "inserted_sleep_apnea_events": inserted_events,
+        }
 
-        active_risks = [
+    async def _save_reports(self, now: datetime, results: Iterable[dict[str, object]]) -> None:
+        reports = [
             {
-                "condition": a.condition,
-                "severity": a.severity,
-                "confidence": round(a.confidence, 4),
-                "interpretation": _CONDITION_LABELS.get(a.condition, a.condition),
+                "analyzed_at": now,
+                "period_from": result["start"],
+                "period_to": result["end"],
+                "window": result["window"].value,
+                "risks": [
+                    {
+                        "condition": a.condition,
+                        "severity": a.severity,
+                        "confidence": round(a.confidence, 4),
+                        "interpretation": _CONDITION_LABELS.get(a.condition, a.condition),
+                    }
+                    for a in result["assessments"]
+                    if a.score > 0
+                ],
             }
-            for a in assessments
-            if a.score > 0
+            for result in results
         ]
-
         try:
             if self._connection is not None:
-                await self._reports_repo.save_report(
-                    user_id=self._user_id,
-                    analyzed_at=now,
-                    period_from=start,
-                    period_to=end,
-                    window=window.value,
-                    risks=active_risks,
-                )
+                await self._reports_repo.save_reports(user_id=self._user_id, reports=reports)
         except Exception:
             import logging
             logging.getLogger(__name__).warning(
                 "Не удалось сохранить отчёт об анализе (user=%d, window=%s)",
                 self._user_id,
-                window.value,
+                ",".join(report["window"] for report in reports),
                 exc_info=True,
             )
 
-        return {
-            "window": window,
-            "start": start,
-            "end": end,
-            "assessments": assessments,
-            "inserted_sleep_apnea_events": inserted_events,
-        }
+    async def analyze_window(self, window: TimeWindow, now: datetime | None = None) -> dict[str, object]:
+        now = now or utcnow()
+        ctx = await self._load_context(now, (window,))
+        result = await self._assess_window(ctx, window)
+        await self._save_reports(now, [result])
+        return result
 
     async def analyze_all_windows(self, now: datetime | None = None) -> dict[TimeWindow, dict[str, object]]:
-        return {
-            window: await self.analyze_window(window, now=now)
-            for window in (TimeWindow.NIGHT, TimeWindow.WEEK, TimeWindow.MONTH)
-        }
+        """All windows from one data load; window-independent detectors run once."""
+        now = now or utcnow()
+        windows = (TimeWindow.NIGHT, TimeWindow.WEEK, TimeWindow.MONTH)
+        ctx = await self._load_context(now, windows)
+        results = {window: await self._assess_window(ctx, window) for window in windows}
+        await self._save_reports(now, results.values())
+        return results
+
+
+def _table_data(table, rows):
+    # Numeric tables are parsed once per run; category tables keep their raw rows.
+    if "value_num" in table.c:
+        return TimeSeries.from_rows(rows)
+    return TableRows(rows)
 
 
 _CONDITION_LABELS: dict[str, str] = {
@@ -0,0 +1,92 @@
+"""Fetch each metric table once per analysis run and slice it in memory.
+
+Every table is read once over the widest range any detector needs; the
+narrower ranges are binary-searched views over the same ``startDate``-sorted
+rows, so the rows are neither re-fetched nor copied.
+"""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections.abc import Awaitable, Callable, Iterator, Mapping, Sequence
+from datetime import datetime
+from operator import itemgetter
+from typing import Any, overload
+
+_start_date = itemgetter(0)
+
+RowsFetcher = Callable[[Any, datetime, datetime], Awaitable[Sequence[Any]]]
+
+
+class RowsView(Sequence):
+    """Read-only view of ``rows[start:stop]`` without copying."""
+
+    __slots__ = ("_rows", "_start", "_stop")
+
+    def __init__(self, rows: Sequence[Any], start: int = 0, stop: int | None = None) -> None:
+        self._rows = rows
+        self._start = start
+        self._stop = len(rows) if stop is None else stop
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Any]: ...
+
+    def __getitem__(self, index):
+        positions = range(self._start, self._stop)[index]
+        if isinstance(index, slice):
+            if positions.step == 1:
+                return RowsView(self._rows, positions.start, positions.stop)
+            return [self._rows[i] for i in positions]
+        return self._rows[positions]
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._rows.__getitem__, range(self._start, self._stop))
+
+    def __repr__(self) -> str:
+        return f"RowsView({list(self)!r})"
+
+
+class TableRows:
+    """Rows of one table sorted by ``startDate`` (first column)."""
+
+    __slots__ = ("_rows",)
+
+    def __init__(self, rows: Sequence[Any]) -> None:
+        self._rows = rows
+
+    def between(self, start: datetime, end: datetime) -> RowsView:
+        """Rows with ``start <= startDate <= end``, as the range query would return them."""
+        lo = bisect_left(self._rows, start, key=_start_date)
+        hi = bisect_right(self._rows, end, lo=lo, key=_start_date)
+        return RowsView(self._rows, lo, hi)
+
+
+async def load_tables(
+    fetch: RowsFetcher,
+    starts: Mapping[Any, datetime],
+    end: datetime,
+    *,
+    concurrent: bool = False,
+    wrap: Callable[[Any, Sequence[Any]], Any] | None = None,
+) -> dict[Any, Any]:
+    """One ``fetch(table, start, end)`` per table, from the widest start it was requested with.
+
+    ``concurrent`` gathers the fetches; ``fetch`` then has to be safe to run
+    concurrently and bound its own parallelism. ``wrap(table, rows)`` builds
+    what is kept per table, :class:`TableRows` by default.
+    """
+    wrap = wrap or _table_rows
+    if concurrent:
+        results = await asyncio.gather(*(fetch(table, start, end) for table, start in starts.items()))
+        return {table: wrap(table, rows) for table, rows in zip(starts, results, strict=True)}
+    return {table: wrap(table, await fetch(table, start, end)) for table, start in starts.items()}
+
+
+def _table_rows(table: Any, rows: Sequence[Any]) -> TableRows:
+    return TableRows(rows)
@@ -0,0 +1,148 @@
+"""Declarative detector specs and the planner that turns them into fetches.
+
+A :class:`Detector` names the inputs its ``assess`` function takes (by
+parameter name), where each input comes from and how far back it reaches.
+:func:`plan_data` folds the inputs of the detectors that apply to a run into
+one range per table, so each table is read once no matter how many detectors
+or windows use it.
+"""
+from __future__ import annotations
+
+import inspect
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Table
+
+from health_log.analysis.models import RiskAssessment, TimeWindow
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.windows import resolve_window_range
+
+ALL_WINDOWS = frozenset(TimeWindow)
+
+
+@dataclass(frozen=True, slots=True)
+class Rows:
+    """``(startDate, value)`` rows of ``table``; ``lookback=None`` means the analysed window."""
+
+    table: Table
+    lookback: timedelta | None = None
+
+    @property
+    def empty(self) -> Sequence[Any]:
+        return ()
+
+
+@dataclass(frozen=True, slots=True)
+class Sleep:
+    """Merged sleep sessions; ``lookback=None`` means the analysed window."""
+
+    lookback: timedelta | None = None
+
+    @property
+    def empty(self) -> SleepIntervals:
+        return SleepIntervals()
+
+
+@dataclass(frozen=True, slots=True)
+class Rollups:
+    """Daily rollups of ``table`` (see ``daily_metric_rollups``)."""
+
+    table: Table
+    lookback: timedelta
+
+    @property
+    def empty(self) -> Sequence[Any]:
+        return ()
+
+
+Input = Rows | Sleep | Rollups
+
+
+@dataclass(frozen=True, slots=True)
+class Detector:
+    """One ``assess_*`` function and the data it reads.
+
+    ``inputs`` maps ``assess`` parameter names to their data. ``window``,
+    ``now`` and ``sex`` are passed when ``assess`` accepts them. When any of
+    the ``required`` inputs (default: the first one) is empty the detector is
+    called with every input empty, so it reports insufficient data without
+    touching the rest.
+
+    A detector whose inputs all have a lookback and that is not
+    ``window_specific`` gives the same result for every window and is
+    computed once per run.
+    """
+
+    condition: str
+    assess: Callable[..., RiskAssessment]
+    inputs: Mapping[str, Input]
+    required: tuple[str, ...] | None = None
+    windows: frozenset[TimeWindow] = ALL_WINDOWS
+    sexes: frozenset[str] | None = None
+    window_specific: bool = False
+    _context_params: frozenset[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.required is None:
+            object.__setattr__(self, "required", tuple(self.inputs)[:1])
+        unknown = set(self.required) - set(self.inputs)
+        if unknown:
+            raise ValueError(f"{self.condition}: required inputs {sorted(unknown)} are not declared")
+        params = inspect.signature(self.assess).parameters
+        object.__setattr__(self, "_context_params", frozenset({"window", "now", "sex"} & set(params)))
+
+    @property
+    def window_independent(self) -> bool:
+        return not self.window_specific and all(spec.lookback is not None for spec in self.inputs.values())
+
+    def applies_to(self, window: TimeWindow, sex: str) -> bool:
+        return window in self.windows and (self.sexes is None or sex in self.sexes)
+
+    def run(self, data: Mapping[str, Any], *, window: TimeWindow, now: datetime, sex: str) -> RiskAssessment:
+        if any(len(data[name]) == 0 for name in self.required):
+            data = {name: spec.empty for name, spec in self.inputs.items()}
+        context = {"window": window, "now": now, "sex": sex}
+        return self.assess(**data, **{name: context[name] for name in self._context_params})
+
+
+@dataclass(slots=True)
+class DataPlan:
+    """Earliest start each source has to be read from; everything ends at ``end``."""
+
+    end: datetime
+    tables: dict[Table, datetime] = field(default_factory=dict)
+    rollups: dict[Table, datetime] = field(default_factory=dict)
+    sleep: datetime | None = None
+
+
+def _widen(starts: dict[Table, datetime], table: Table, start: datetime) -> None:
+    current = starts.get(table)
+    starts[table] = start if current is None else min(current, start)
+
+
+def plan_data(
+    detectors: Iterable[Detector],
+    windows: Iterable[TimeWindow],
+    *,
+    now: datetime,
+    sex: str,
+) -> DataPlan:
+    """Minimal fetches covering every input of the detectors that apply to ``windows``."""
+    window_starts = {window: resolve_window_range(window, now)[0] for window in windows}
+    plan = DataPlan(end=now)
+    for detector in detectors:
+        applicable = [start for window, start in window_starts.items() if detector.applies_to(window, sex)]
+        if not applicable:
+            continue
+        for spec in detector.inputs.values():
+            start = min(applicable) if spec.lookback is None else now - spec.lookback
+            if isinstance(spec, Rows):
+                _widen(plan.tables, spec.table, start)
+            elif isinstance(spec, Rollups):
+                _widen(plan.rollups, spec.table, start)
+            else:
+                plan.sleep = start if plan.sleep is None else min(plan.sleep, start)
+    return plan
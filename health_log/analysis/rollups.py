@@ -0,0 +1,95 @@
+"""Per-day aggregates of metric samples (``daily_metric_rollups``).
+
+One row per user, metric (table name) and calendar day of ``startDate``
+replaces that day's raw samples for detectors whose features are per-day:
+sample count, sum, min, max, median, the median of the lowest 20% of samples
+(resting-HR estimate) and, for metrics read against sleep, the median of the
+samples taken during sleep.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from statistics import median
+from typing import Any
+
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import EventPoint
+
+# Metrics whose rollups carry ``sleep_median``; their days are refreshed when sleep data arrives.
+SLEEP_MEDIAN_METRICS = frozenset({"heart_rate", "heart_rate_variability", "respiratory_rate"})
+SLEEP_TABLE = "sleep_analysis"
+
+
+@dataclass(slots=True, frozen=True)
+class DailyRollup:
+    day: date
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+    median: float
+    bottom20_median: float
+    sleep_median: float | None = None
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+
+def _sorted_median(ordered: list[float]) -> float:
+    # statistics.median without its own sort.
+    mid = len(ordered) // 2
+    return float(ordered[mid] if len(ordered) % 2 else (ordered[mid - 1] + ordered[mid]) / 2)
+
+
+def rollup_day(day: date, values: Sequence[float], sleep_values: list[float] | None = None) -> DailyRollup:
+    # One sort serves min, max, the median and the bottom-20% median (same result as bottom_fraction_median).
+    ordered = sorted(values)
+    return DailyRollup(
+        day=day,
+        count=len(ordered),
+        total=float(sum(values)),
+        minimum=float(ordered[0]),
+        maximum=float(ordered[-1]),
+        median=_sorted_median(ordered),
+        bottom20_median=_sorted_median(ordered[: max(1, int(len(ordered) * 0.2))]),
+        sleep_median=float(median(sleep_values)) if sleep_values else None,
+    )
+
+
+def build_daily_rollups(
+    points: Iterable[EventPoint],
+    sleep: SleepIntervals | None = None,
+) -> dict[date, DailyRollup]:
+    points = list(points)
+    by_day: dict[date, list[float]] = defaultdict(list)
+    sleep_by_day: dict[date, list[float]] = defaultdict(list)
+    for point in points:
+        by_day[point.timestamp.date()].append(point.value)
+    for point in sleep.within(points) if sleep is not None else ():
+        sleep_by_day[point.timestamp.date()].append(point.value)
+    return {day: rollup_day(day, values, sleep_by_day.get(day)) for day, values in sorted(by_day.items())}
+
+
+def _days_between(start: datetime, end: datetime) -> Iterable[date]:
+    day = start.date()
+    while day <= end.date():
+        yield day
+        day += timedelta(days=1)
+
+
+def touched_days(table_name: str, rows: Iterable[dict[str, Any]], metrics: Iterable[str]) -> dict[str, set[date]]:
+    """Rollup days a batch of rows for ``table_name`` can change, keyed by metric."""
+    metrics = frozenset(metrics)
+    if table_name in metrics:
+        return {table_name: {row["startDate"].date() for row in rows if row.get("startDate")}}
+    if table_name == SLEEP_TABLE:
+        days: set[date] = set()
+        for row in rows:
+            if row.get("startDate") and row.get("endDate"):
+                days.update(_days_between(row["startDate"], row["endDate"]))
+        return {metric: set(days) for metric in SLEEP_MEDIAN_METRICS & metrics} if days else {}
+    return {}
@@ -0,0 +1,207 @@
+"""Compact, time-sorted numeric samples for the analysis hot path.
+
+A :class:`TimeSeries` keeps int64 epoch microseconds and float64 values in
+``array.array`` buffers, built once per table per analysis run. Contiguous
+slices, ``between`` and ``by_day`` are views over the same buffers; ``mask``
+copies only the kept samples. ``daily_rollups`` buckets a range by calendar
+day and is memoized on the buffers, so detectors asking for the same range
+in one run share the work.
+
+It still iterates as ``(datetime, float)`` rows, so detectors that take rows
+work unchanged, and ``to_points`` hands out the series' ``EventPoint`` list
+(built once and shared) instead of re-parsing the rows.
+"""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from datetime import date, datetime, timedelta
+from itertools import compress, pairwise
+from typing import overload
+
+from health_log.analysis.rollups import DailyRollup, build_daily_rollups, rollup_day
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import EventPoint, safe_float
+
+# Naive local time throughout, so whole days since the epoch are local calendar days.
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_DATE = _EPOCH.date()
+_MICROSECOND = timedelta(microseconds=1)
+_DAY_US = 86_400_000_000
+
+
+def epoch_us(ts: datetime) -> int:
+    return (ts - _EPOCH) // _MICROSECOND
+
+
+class _Samples:
+    __slots__ = ("stamps", "values", "datetimes", "_points", "daily")
+
+    def __init__(self, stamps: array, values: array, datetimes: list[datetime]) -> None:
+        self.stamps = stamps
+        self.values = values
+        self.datetimes = datetimes
+        self._points: list[EventPoint] | None = None
+        # Daily rollups by (start, stop) position range.
+        self.daily: dict[tuple[int, int], dict[date, DailyRollup]] = {}
+
+    @property
+    def points(self) -> list[EventPoint]:
+        if self._points is None:
+            self._points = list(map(EventPoint, self.datetimes, self.values))
+        return self._points
+
+
+class TimeSeries(Sequence):
+    """Numeric ``(datetime, float)`` samples sorted by time."""
+
+    __slots__ = ("_samples", "_start", "_stop")
+
+    def __init__(self, samples: _Samples, start: int = 0, stop: int | None = None) -> None:
+        self._samples = samples
+        self._start = start
+        self._stop = len(samples.values) if stop is None else stop
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[datetime, object]]) -> TimeSeries:
+        """Samples of ``rows`` with a timestamp and a numeric value, as ``to_points`` would keep them."""
+        datetimes: list[datetime] = []
+        values = array("d")
+        for ts, raw in rows:
+            value = safe_float(raw)
+            if ts is None or value is None:
+                continue
+            datetimes.append(ts)
+            values.append(value)
+        if any(a > b for a, b in pairwise(datetimes)):
+            order = sorted(range(len(datetimes)), key=datetimes.__getitem__)
+            datetimes = [datetimes[i] for i in order]
+            values = array("d", (values[i] for i in order))
+        stamps = array("q", map(epoch_us, datetimes))
+        return cls(_Samples(stamps, values, datetimes))
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    @overload
+    def __getitem__(self, index: int) -> tuple[datetime, float]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[tuple[datetime, float]]: ...
+
+    def __getitem__(self, index):
+        positions = range(self._start, self._stop)[index]
+        if isinstance(index, slice):
+            if positions.step != 1:
+                return [self._sample(i) for i in positions]
+            return TimeSeries(self._samples, positions.start, max(positions.start, positions.stop))
+        return self._sample(positions)
+
+    def _sample(self, position: int) -> tuple[datetime, float]:
+        return self._samples.datetimes[position], self._samples.values[position]
+
+    def __iter__(self) -> Iterator[tuple[datetime, float]]:
+        samples = self._samples
+        return zip(
+            samples.datetimes[self._start : self._stop], samples.values[self._start : self._stop], strict=True
+        )
+
+    def __repr__(self) -> str:
+        return f"TimeSeries({len(self)} samples)"
+
+    @property
+    def epoch_us(self) -> memoryview:
+        """Timestamps as int64 microseconds since 1970-01-01 (naive), without copying."""
+        return memoryview(self._samples.stamps)[self._start : self._stop]
+
+    @property
+    def values(self) -> memoryview:
+        return memoryview(self._samples.values)[self._start : self._stop]
+
+    @property
+    def datetimes(self) -> list[datetime]:
+        return self._samples.datetimes[self._start : self._stop]
+
+    def points(self) -> list[EventPoint]:
+        """``EventPoint``s of the samples; the objects are shared by every view of the series."""
+        return self._samples.points[self._start : self._stop]
+
+    def between(self, start: datetime, end: datetime) -> TimeSeries:
+        """Samples with ``start <= timestamp <= end``."""
+        stamps = self._samples.stamps
+        lo = bisect_left(stamps, epoch_us(start), self._start, self._stop)
+        hi = bisect_right(stamps, epoch_us(end), lo, self._stop)
+        return TimeSeries(self._samples, lo, hi)
+
+    def mask(self, keep: Iterable[bool]) -> TimeSeries:
+        """Samples whose flag in ``keep`` is true, as a new compact series."""
+        flags = list(keep)
+        if len(flags) != len(self):
+            raise ValueError(f"mask has {len(flags)} flags for {len(self)} samples")
+        return TimeSeries(
+            _Samples(
+                array("q", compress(self.epoch_us, flags)),
+                array("d", compress(self.values, flags)),
+                list(compress(self.datetimes, flags)),
+            )
+        )
+
+    def within(self, intervals: SleepIntervals) -> TimeSeries:
+        """Samples inside ``intervals`` (inclusive bounds)."""
+        return self.mask(intervals.mask(self.datetimes))
+
+    def by_day(self) -> dict[date, TimeSeries]:
+        """Samples per calendar day, each a view of a contiguous run."""
+        groups: dict[date, TimeSeries] = {}
+        stamps = self._samples.stamps
+        lo = self._start
+        while lo < self._stop:
+            day = stamps[lo] // _DAY_US
+            hi = bisect_left(stamps, (day + 1) * _DAY_US, lo, self._stop)
+            groups[_EPOCH_DATE + timedelta(days=day)] = TimeSeries(self._samples, lo, hi)
+            lo = hi
+        return groups
+
+    def daily_rollups(self) -> Mapping[date, DailyRollup]:
+        """Per-day count, total, min, max, median and bottom-20% median, oldest day first.
+
+        Computed once per range and shared by every view of the series; treat the result as read-only.
+        """
+        key = (self._start, self._stop)
+        rollups = self._samples.daily.get(key)
+        if rollups is None:
+            rollups = self._samples.daily[key] = {
+                day: rollup_day(day, view.values) for day, view in self.by_day().items()
+            }
+        return rollups
+
+
+def daily_rollups(
+    samples: TimeSeries | Iterable[EventPoint],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Mapping[date, DailyRollup]:
+    """Per-day rollups of the samples with ``start <= timestamp <= end`` (either bound optional).
+
+    A ``TimeSeries`` answers from its memo; plain points are bucketed from scratch.
+    """
+    if isinstance(samples, TimeSeries):
+        if start is not None or end is not None:
+            samples = samples.between(start or datetime.min, end or datetime.max)
+        return samples.daily_rollups()
+    return build_daily_rollups(
+        p for p in samples if (start is None or start <= p.timestamp) and (end is None or p.timestamp <= end)
+    )
+
+
+def daily_medians(
+    samples: TimeSeries | Iterable[EventPoint],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[float]:
+    return [day.median for day in daily_rollups(samples, start, end).values()]
+
+
+def as_time_series(rows: Iterable[tuple[datetime, object]]) -> TimeSeries:
+    return rows if isinstance(rows, TimeSeries) else TimeSeries.from_rows(rows)
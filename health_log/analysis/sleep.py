@@ -0,0 +1,99 @@
+"""Merged sleep intervals shared by the analyzer and detectors."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime
+from itertools import compress, pairwise
+from typing import TypeVar
+
+from health_log.analysis.utils import EventPoint, merge_datetime_intervals
+
+_P = TypeVar("_P", bound=EventPoint)
+
+
+class SleepIntervals:
+    """Sorted, disjoint sleep intervals; overlapping or touching segments are merged.
+
+    Iterates as ``(start, end)`` tuples, so it can stand in for a list of
+    segments. Membership checks are binary searches with inclusive bounds.
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, segments: Iterable[tuple[datetime, datetime]] = ()) -> None:
+        merged = merge_datetime_intervals([(s, e) for s, e in segments if s and e and e > s])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    @classmethod
+    def _from_sorted(cls, starts: list[datetime], ends: list[datetime]) -> SleepIntervals:
+        intervals = cls.__new__(cls)
+        intervals._starts = starts
+        intervals._ends = ends
+        return intervals
+
+    def __contains__(self, ts: datetime) -> bool:
+        return self.containing(ts) is not None
+
+    def containing(self, ts: datetime) -> tuple[datetime, datetime] | None:
+        idx = bisect_right(self._starts, ts) - 1
+        if idx >= 0 and ts <= self._ends[idx]:
+            return self._starts[idx], self._ends[idx]
+        return None
+
+    def __iter__(self) -> Iterator[tuple[datetime, datetime]]:
+        return zip(self._starts, self._ends, strict=True)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __repr__(self) -> str:
+        return f"SleepIntervals({list(self)!r})"
+
+    def overlapping(self, start: datetime, end: datetime) -> SleepIntervals:
+        """Intervals that overlap ``[start, end]``, unclipped."""
+        # Ends are sorted too, since the intervals are disjoint.
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        return self._from_sorted(self._starts[lo:hi], self._ends[lo:hi])
+
+    def mask(self, timestamps: Sequence[datetime]) -> list[bool]:
+        """``ts in self`` for every timestamp.
+
+        Sorted timestamps (the common case: rows come ordered by
+        ``startDate``) take one pair of binary searches per interval, instead
+        of one per timestamp.
+        """
+        if any(a > b for a, b in pairwise(timestamps)):
+            return [ts in self for ts in timestamps]
+        flags = [False] * len(timestamps)
+        if not timestamps:
+            return flags
+        lo = 0
+        for start, end in self.overlapping(timestamps[0], timestamps[-1]):
+            lo = bisect_left(timestamps, start, lo)
+            hi = bisect_right(timestamps, end, lo)
+            flags[lo:hi] = [True] * (hi - lo)
+            lo = hi
+        return flags
+
+    def within(self, points: Sequence[_P]) -> list[_P]:
+        """``points`` inside the intervals, in the original order."""
+        return list(compress(points, self.mask([p.timestamp for p in points])))
+
+    def split(self, points: Sequence[_P]) -> tuple[list[_P], list[_P]]:
+        """``points`` inside and outside the intervals, each in the original order."""
+        flags = self.mask([p.timestamp for p in points])
+        inside = list(compress(points, flags))
+        outside = list(compress(points, (not flag for flag in flags)))
+        return inside, outside
+
+    def total_hours(self) -> float:
+        return sum((end - start).total_seconds() for start, end in self) / 3600.0
+
+
+def as_sleep_intervals(segments: Iterable[tuple[datetime, datetime]] | None) -> SleepIntervals:
+    if isinstance(segments, SleepIntervals):
+        return segments
+    return SleepIntervals(segments or ())
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from statistics import median
 from typing import Iterable
 
+# Sleep stages are recorded as segments well under a day long.
+MAX_SLEEP_SEGMENT = timedelta(days=1)
+
 
 @dataclass(slots=True)
 class EventPoint:
@@ -39,6 +43,11 @@ def safe_float(raw: object) -> float | None:
 
 
 def to_points(rows: Iterable[tuple[datetime, object]]) -> list[EventPoint]:
+    from health_log.analysis.series import TimeSeries
+
+    if isinstance(rows, TimeSeries):
+        # Already parsed and sorted; the points are built once per series.
+        return rows.points()
     points: list[EventPoint] = []
     for ts, raw in rows:
         value = safe_float(raw)
@@ -63,6 +72,34 @@ def nearest_value(points: list[EventPoint], target_ts: datetime, max_seconds: in
     return nearest.value if nearest else None
 
 
+def nearest_values(points: list[EventPoint], targets: list[datetime], max_seconds: int) -> list[float | None]:
+    """``nearest_value`` for every target at once; ``points`` must be sorted by timestamp.
+
+    One merge pass over the sorted targets instead of a scan per target. Ties go
+    to the earlier point, as in ``nearest_value``.
+    """
+    if not points:
+        return [None] * len(targets)
+    stamps = [p.timestamp for p in points]
+    tolerance = timedelta(seconds=max_seconds)
+    order = sorted(range(len(targets)), key=targets.__getitem__)
+    result: list[float | None] = [None] * len(targets)
+    after = 0
+    for index in order:
+        target = targets[index]
+        while after < len(stamps) and stamps[after] < target:
+            after += 1
+        best: int | None = None
+        if after > 0:
+            # First of any run of equal timestamps, like the linear scan.
+            best = bisect_left(stamps, stamps[after - 1], 0, after)
+        if after < len(stamps) and (best is None or stamps[after] - target < target - stamps[best]):
+            best = after
+        if best is not None and abs(stamps[best] - target) <= tolerance:
+            result[index] = points[best].value
+    return result
+
+
 def merge_datetime_intervals(intervals: list[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
     if not intervals:
         return []
@@ -85,6 +122,12 @@ def split_baseline_recent(points: list[EventPoint]) -> tuple[list[EventPoint], l
     return points[:split_idx], points[split_idx:]
 
 
+def bottom_fraction_median(values: list[float], fraction: float) -> float:
+    """Median of the lowest ``fraction`` of ``values`` (at least one value); ``values`` must be non-empty."""
+    low = sorted(values)[: max(1, int(len(values) * fraction))]
+    return float(median(low))
+
+
 def resting_like_median(values: list[float]) -> float | None:
     if not values:
         return None
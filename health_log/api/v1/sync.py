@@ -1,24 +1,52 @@
-import json
+import asyncio
 import re
+import tempfile
 import uuid
+import zlib
+from collections.abc import Callable, Iterator
+from contextlib import AbstractAsyncContextManager
 from datetime import datetime
+from pathlib import Path
 from typing import Any
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, ValidationError, field_validator
 from sqlalchemy.ext.asyncio import AsyncConnection
 
-from health_log.dependencies import db_connect, get_current_user
+from health_log.dependencies import (
+    db_connect,
+    db_transaction_factory,
+    get_current_user,
+    get_current_user_detached,
+)
 from health_log.limiter import limiter
 from health_log.repositories.analysis import SyncScheduleRepository
 from health_log.repositories.auth import AuthUser, UsersRepository
+from health_log.repositories.ingestion_jobs import IngestionJobsRepository
+from health_log.repositories.payload_store import iter_json_chunks
 from health_log.repositories.repository import IngestionRepository, RecordsRepository
-from health_log.repositories.v1.tables import TYPE_TABLE_MAP
 from health_log.services.analysis_service import analyze_for_user
-from health_log.services.apple_health_parser import ParsedRecord
+from health_log.services.apple_health_parser import ParsedRecord, TimestampParser
+from health_log.services.columnar_sync import (
+    ColumnarFormatError,
+    decode_columnar,
+    ensure_known_types,
+    write_columnar_blocks,
+)
+from health_log.services.ingestion import ingest_upload
+from health_log.services.ndjson_stream import NdjsonError, iter_ndjson_lines
+from health_log.services.record_routing import (
+    log_type_stats,
+    refresh_derived_tables,
+    route_records,
+    write_routed_records,
+)
+from health_log.services.sync_records import sync_record_to_parsed
 from health_log.utils import utcnow
 
 _MAX_SYNC_RECORDS = 10_000
+_MAX_COLUMNAR_BYTES = 64 * 1024 * 1024
+_SPOOL_WRITE_BYTES = 1024 * 1024
 
 router = APIRouter(prefix="/api/v1/sync", tags=["sync"])
 
@@ -121,21 +149,23 @@ class ScheduleRequest(BaseModel):
 
 
 def _record_to_parsed(record: SyncRecord) -> ParsedRecord:
-    attrs = {
-        "type": record.type,
-        "sourceName": record.sourceName,
-        "sourceVersion": record.sourceVersion,
-        "creationDate": record.creationDate,
-        "startDate": record.startDate,
-        "endDate": record.endDate,
-        "value": record.value,
-        "unit": record.unit,
-    }
-    metadata = {str(k): str(v) for k, v in record.metadata.items()}
-    hrv_bpm: list[dict[str, str]] = []
-    if record.instantaneous_bpm:
-        hrv_bpm = [{"bpm": str(entry.bpm), "time": entry.time} for entry in record.instantaneous_bpm]
-    return ParsedRecord(attrs=attrs, metadata=metadata, hrv_bpm=hrv_bpm)
+    return sync_record_to_parsed(record.model_dump())
+
+
+def _sync_payload_chunks(body: SyncRequest, dumped_records: list[dict[str, Any]]) -> Iterator[bytes]:
+    # Same bytes as one json.dumps, so digests of earlier sync uploads keep matching.
+    return iter_json_chunks(
+        {
+            "sync_from": body.sync_from,
+            "sync_to": body.sync_to,
+            "records": dumped_records,
+        },
+        ensure_ascii=False,
+    )
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
 
 
 # ─── Endpoints ──────────────────────────────────────────────────────────────
@@ -150,26 +180,18 @@ async def sync_health_data(
     current_user: AuthUser = Depends(get_current_user),
     conn: AsyncConnection = Depends(db_connect),
 ):
-    parsed_records = [_record_to_parsed(r) for r in body.records]
-
-    raw_payload = json.dumps(
-        {
-            "sync_from": body.sync_from,
-            "sync_to": body.sync_to,
-            "records": [r.model_dump() for r in body.records],
-        },
-        ensure_ascii=False,
-    )
+    dumped_records = [r.model_dump() for r in body.records]
+    parsed_records = [sync_record_to_parsed(r) for r in dumped_records]
 
     ingestion_repo = IngestionRepository(conn)
     records_repo = RecordsRepository(conn)
 
-    upload_id, is_new_upload = await ingestion_repo.create_upload(
+    upload_id, is_new_upload = await ingestion_repo.create_upload_from_chunks(
         user_id=current_user.id,
         provider="apple_health",
         data_format="json",
         filename=f"sync_{body.sync_from}_{body.sync_to}.json",
-        raw_payload=raw_payload,
+        chunks=_sync_payload_chunks(body, dumped_records),
     )
 
     synced_count = 0
@@ -184,18 +206,11 @@ async def sync_health_data(
         )
         synced_count += raw_count
 
-        for record_type, table in TYPE_TABLE_MAP.items():
-            await records_repo.insert_records_for_type(
-                user_id=current_user.id,
-                record_type=record_type,
-                table=table,
-                record_list=parsed_records,
-            )
-
-        hrv_inserted, _ = await records_repo.insert_hr_variability_records(
-            user_id=current_user.id,
-            records=parsed_records,
-        )
+        parse_ts = TimestampParser()
+        routed = route_records(parsed_records, user_id=current_user.id, parse_ts=parse_ts)
+        await write_routed_records(records_repo, routed, user_id=current_user.id)
+        await refresh_derived_tables(conn, records_repo, user_id=current_user.id)
+        log_type_stats(upload_id, routed.stats)
 
         # Trigger analysis in background after transaction commits
         background_tasks.add_task(analyze_for_user, current_user.id)
@@ -214,6 +229,228 @@ async def sync_health_data(
     }
 
 
+async def _spool_ndjson(request: Request, spool_path: Path) -> None:
+    """Validate NDJSON lines as they arrive and append them to ``spool_path``.
+
+    Lines are buffered and written in batches from a worker thread, so the
+    event loop never blocks on disk.
+    """
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    spool = await asyncio.to_thread(spool_path.open, "wb")
+    try:
+        pending: list[bytes] = []
+        pending_bytes = 0
+        async for line_no, line in iter_ndjson_lines(request.stream(), gzipped=gzipped):
+            try:
+                record = SyncRecord.model_validate_json(line)
+            except ValidationError as exc:
+                errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors())
+                raise NdjsonError(line_no, errors) from None
+            encoded = record.model_dump_json().encode("utf-8") + b"\n"
+            pending.append(encoded)
+            pending_bytes += len(encoded)
+            if pending_bytes >= _SPOOL_WRITE_BYTES:
+                await asyncio.to_thread(spool.write, b"".join(pending))
+                pending, pending_bytes = [], 0
+        if pending:
+            await asyncio.to_thread(spool.write, b"".join(pending))
+    finally:
+        await asyncio.to_thread(spool.close)
+
+
+@router.post("/stream", status_code=status.HTTP_201_CREATED)
+@limiter.limit("200/hour")
+async def sync_health_data_stream(
+    request: Request,
+    sync_from: str,
+    sync_to: str,
+    background_tasks: BackgroundTasks,
+    current_user: AuthUser = Depends(get_current_user_detached),
+    begin: Callable[[], AbstractAsyncContextManager[AsyncConnection]] = Depends(db_transaction_factory),
+):
+    """NDJSON body, one ``SyncRecord`` per line; ``Content-Encoding: gzip`` is accepted.
+
+    Lines are validated as they arrive and spooled to a temp file, so server
+    memory does not grow with the body and there is no per-request record cap.
+    The database transaction is opened only once the whole body is spooled.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        spool_path = Path(tmp_dir) / "sync.ndjson"
+        try:
+            await _spool_ndjson(request, spool_path)
+        except (NdjsonError, zlib.error) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
+
+        async with begin() as conn:
+            upload_id, is_new_upload = await IngestionRepository(conn).create_upload_from_file(
+                user_id=current_user.id,
+                provider="apple_health",
+                data_format="ndjson",
+                path=spool_path,
+                filename=f"sync_{sync_from}_{sync_to}.ndjson",
+            )
+
+            synced_count = 0
+            if is_new_upload:
+                with spool_path.open("rb") as source:
+                    result = await ingest_upload(
+                        conn,
+                        upload_id=upload_id,
+                        user_id=current_user.id,
+                        provider="apple_health",
+                        data_format="ndjson",
+                        source=source,
+                    )
+                synced_count = result.raw_records_count
+                background_tasks.add_task(analyze_for_user, current_user.id)
+
+            await UsersRepository(conn).update_sync_status(
+                current_user.id,
+                last_sync_at=utcnow(),
+                records_count=synced_count,
+            )
+
+    return {
+        "sync_id": str(uuid.uuid4()),
+        "synced_records": synced_count,
+        "next_sync_from": sync_to,
+    }
+
+
+def _columnar_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Тело больше {_MAX_COLUMNAR_BYTES} байт. Разбей данные на несколько синков.",
+    )
+
+
+async def _read_columnar_body(request: Request) -> bytes:
+    # Content-Length is only a hint: chunked bodies have none, so the stream itself is capped.
+    header = request.headers.get("content-length")
+    if header is not None:
+        try:
+            content_length = int(header)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный заголовок Content-Length."
+            ) from None
+        if content_length > _MAX_COLUMNAR_BYTES:
+            raise _columnar_too_large()
+    payload = bytearray()
+    async for chunk in request.stream():
+        payload += chunk
+        if len(payload) > _MAX_COLUMNAR_BYTES:
+            raise _columnar_too_large()
+    return bytes(payload)
+
+
+@router.post("/columnar", status_code=status.HTTP_201_CREATED)
+@limiter.limit("200/hour")
+async def sync_health_data_columnar(
+    request: Request,
+    sync_from: str,
+    sync_to: str,
+    background_tasks: BackgroundTasks,
+    current_user: AuthUser = Depends(get_current_user),
+    conn: AsyncConnection = Depends(db_connect),
+):
+    """Binary columnar body (``application/vnd.healthlog.columnar``, see ``columnar_sync``)."""
+    payload = await _read_columnar_body(request)
+    try:
+        blocks = decode_columnar(payload)
+        ensure_known_types(blocks)
+    except ColumnarFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from None
+
+    upload_id, is_new_upload = await IngestionRepository(conn).create_upload_from_bytes(
+        user_id=current_user.id,
+        provider="apple_health",
+        data_format="columnar",
+        filename=f"sync_{sync_from}_{sync_to}.hlc",
+        payload=payload,
+    )
+
+    synced_count = 0
+    if is_new_upload:
+        type_stats = await write_columnar_blocks(conn, blocks, user_id=current_user.id)
+        log_type_stats(upload_id, type_stats)
+        synced_count = sum(stats.inserted for stats in type_stats.values())
+        background_tasks.add_task(analyze_for_user, current_user.id)
+
+    await UsersRepository(conn).update_sync_status(
+        current_user.id,
+        last_sync_at=utcnow(),
+        records_count=synced_count,
+    )
+
+    return {
+        "sync_id": str(uuid.uuid4()),
+        "synced_records": synced_count,
+        "next_sync_from": sync_to,
+    }
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("200/hour")
+async def enqueue_sync_job(
+    request: Request,
+    body: SyncRequest,
+    current_user: AuthUser = Depends(get_current_user),
+    conn: AsyncConnection = Depends(db_connect),
+):
+    """Persist the payload and queue it for background ingestion; poll ``GET /jobs/{job_id}``."""
+    upload_id, is_new_upload = await IngestionRepository(conn).create_upload_from_chunks(
+        user_id=current_user.id,
+        provider="apple_health",
+        data_format="json",
+        filename=f"sync_{body.sync_from}_{body.sync_to}.json",
+        chunks=_sync_payload_chunks(body, [r.model_dump() for r in body.records]),
+    )
+
+    jobs_repo = IngestionJobsRepository(conn)
+    if is_new_upload:
+        job_id: int | None = await jobs_repo.enqueue(user_id=current_user.id, upload_id=upload_id)
+        job_status = "queued"
+    else:
+        # Uploads stored by the synchronous endpoint have no job row.
+        job_id = await jobs_repo.get_job_id_for_upload(upload_id)
+        job_status = "duplicate"
+
+    return {
+        "job_id": job_id,
+        "upload_id": upload_id,
+        "status": job_status,
+        "next_sync_from": body.sync_to,
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_sync_job(
+    job_id: int,
+    current_user: AuthUser = Depends(get_current_user),
+    conn: AsyncConnection = Depends(db_connect),
+):
+    job = await IngestionJobsRepository(conn).get_job(job_id, user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Задача не найдена")
+
+    result = job["result"] or {}
+    return {
+        "job_id": job["id"],
+        "upload_id": job["upload_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "records_processed": job["records_processed"],
+        "error": job["error"],
+        "normalized_counts": result.get("normalized_counts", {}),
+        "type_stats": result.get("type_stats", {}),
+        "duration_seconds": result.get("duration_seconds"),
+        "created_at": _isoformat(job["created_at"]),
+        "started_at": _isoformat(job["started_at"]),
+        "finished_at": _isoformat(job["finished_at"]),
+    }
+
+
 @router.get("/status")
 async def get_sync_status(
     current_user: AuthUser = Depends(get_current_user),
@@ -46,15 +46,36 @@ def create_app() -> FastAPI:
         task = asyncio.create_task(run_sync_scheduler())
         app.state.scheduler_task = task
 
+    @app.on_event("startup")
+    async def _start_ingestion_workers() -> None:
+        from health_log.services.ingestion_jobs import run_ingestion_workers
+        app.state.ingestion_workers_task = asyncio.create_task(run_ingestion_workers())
+
+    @app.on_event("startup")
+    async def _start_partition_maintenance() -> None:
+        from health_log.services.partition_maintenance import run_partition_maintenance
+        app.state.partition_maintenance_task = asyncio.create_task(run_partition_maintenance())
+
+    @app.on_event("startup")
+    async def _start_sample_retention() -> None:
+        from health_log.services.sample_retention import run_sample_retention
+        app.state.sample_retention_task = asyncio.create_task(run_sample_retention())
+
     @app.on_event("shutdown")
     async def _stop_scheduler() -> None:
-        task = getattr(app.state, "scheduler_task", None)
-        if task is not None:
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
-                pass
+        for name in (
+            "scheduler_task",
+            "ingestion_workers_task",
+            "partition_maintenance_task",
+            "sample_retention_task",
+        ):
+            task = getattr(app.state, name, None)
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
     return app
 
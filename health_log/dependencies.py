@@ -1,4 +1,5 @@
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -16,6 +17,11 @@ async def db_connect() -> AsyncIterator[AsyncConnection]:
         yield conn
 
 
+def db_transaction_factory() -> Callable[[], AbstractAsyncContextManager[AsyncConnection]]:
+    """For endpoints that must not hold a connection while reading a long request body."""
+    return engine.begin
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
     conn: AsyncConnection = Depends(db_connect),
@@ -31,3 +37,12 @@ async def get_current_user(
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Недействительный access token")
     return user
+
+
+async def get_current_user_detached(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    begin: Callable[[], AbstractAsyncContextManager[AsyncConnection]] = Depends(db_transaction_factory),
+) -> AuthUser:
+    """``get_current_user`` on a connection that is released before the endpoint runs."""
+    async with begin() as conn:
+        return await get_current_user(credentials, conn)
@@ -38,6 +38,16 @@ class AnalysisReportsRepository:
         result = await self._connection.execute(stmt)
         return result.scalar_one()
 
+    async def save_reports(self, *, user_id: int, reports: list[dict]) -> list[int]:
+        """Several reports in one insert; ids come back in the order of ``reports``."""
+        if not reports:
+            return []
+        stmt = pg_insert(tables.analysis_reports).returning(
+            tables.analysis_reports.c.id, sort_by_parameter_order=True
+        )
+        result = await self._connection.execute(stmt, [{"user_id": user_id, **report} for report in reports])
+        return list(result.scalars())
+
     async def get_latest_report(self, user_id: int) -> dict | None:
         row = (
             await self._connection.execute(
@@ -49,7 +59,7 @@ class AnalysisReportsRepository:
                     tables.analysis_reports.c.risks,
                 )
                 .where(tables.analysis_reports.c.user_id == user_id)
-                .order_by(desc(tables.analysis_reports.c.analyzed_at))
+                .order_by(desc(tables.analysis_reports.c.analyzed_at), desc(tables.analysis_reports.c.id))
                 .limit(1)
             )
         ).one_or_none()
@@ -84,7 +94,7 @@ class AnalysisReportsRepository:
                     tables.analysis_reports.c.risks,
                 )
                 .where(tables.analysis_reports.c.user_id == user_id)
-                .order_by(desc(tables.analysis_reports.c.analyzed_at))
+                .order_by(desc(tables.analysis_reports.c.analyzed_at), desc(tables.analysis_reports.c.id))
                 .limit(limit)
                 .offset(offset)
             )
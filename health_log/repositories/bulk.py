@@ -0,0 +1,74 @@
+"""COPY-based bulk loading for large ingestions.
+
+Rows are streamed with asyncpg's binary ``COPY`` into a temporary staging
+table shaped like the target, then moved over with a single
+``INSERT ... SELECT ... ON CONFLICT DO NOTHING``. Only the number of inserted
+rows is returned, no ids are sent back to the client.
+"""
+from __future__ import annotations
+
+import json
+from enum import Enum
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+class LoadMode(str, Enum):
+    INSERT = "insert"
+    COPY = "copy"
+
+
+def _row_columns(table, rows: list[dict[str, Any]]) -> list[str]:
+    present: set[str] = set()
+    for row in rows:
+        present.update(row)
+    return [col.name for col in table.columns if col.name in present]
+
+
+async def copy_upsert(
+    connection: AsyncConnection,
+    table,
+    rows: list[dict[str, Any]],
+    conflict_columns: list[str],
+) -> int:
+    if not rows:
+        return 0
+
+    columns = _row_columns(table, rows)
+    json_columns = {name for name in columns if isinstance(table.c[name].type, sqlalchemy.JSON)}
+    quote = connection.dialect.identifier_preparer.quote
+    target = quote(table.name)
+    staging = quote(f"_copy_stage_{table.name}")
+    column_list = ", ".join(quote(name) for name in columns)
+
+    # Goes through SQLAlchemy first so the surrounding transaction is started
+    # before COPY touches the driver connection directly.
+    await connection.exec_driver_sql(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {target} WITH NO DATA"
+    )
+
+    records = [
+        tuple(
+            json.dumps(row.get(name), ensure_ascii=False) if name in json_columns else row.get(name)
+            for name in columns
+        )
+        for row in rows
+    ]
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        f"_copy_stage_{table.name}",
+        records=records,
+        columns=columns,
+    )
+
+    conflict_list = ", ".join(quote(name) for name in conflict_columns)
+    result = await connection.exec_driver_sql(
+        f"INSERT INTO {target} ({column_list}) "
+        f"SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT ({conflict_list}) DO NOTHING"
+    )
+    await connection.exec_driver_sql(f"DROP TABLE {staging}")
+    return result.rowcount
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.repositories.v1 import tables
+from health_log.utils import utcnow
+
+MAX_ATTEMPTS = 3
+
+
+@dataclass(slots=True)
+class ClaimedJob:
+    id: int
+    user_id: int
+    upload_id: int
+    attempts: int
+
+
+class IngestionJobsRepository:
+    def __init__(self, connection: AsyncConnection) -> None:
+        self._connection = connection
+
+    async def enqueue(self, *, user_id: int, upload_id: int) -> int:
+        jobs = tables.ingestion_jobs
+        stmt = (
+            pg_insert(jobs)
+            .values(user_id=user_id, upload_id=upload_id)
+            .on_conflict_do_nothing(index_elements=["upload_id"])
+            .returning(jobs.c.id)
+        )
+        job_id = (await self._connection.execute(stmt)).scalar_one_or_none()
+        if job_id is not None:
+            return job_id
+        return (
+            await self._connection.execute(select(jobs.c.id).where(jobs.c.upload_id == upload_id))
+        ).scalar_one()
+
+    async def get_job_id_for_upload(self, upload_id: int) -> int | None:
+        jobs = tables.ingestion_jobs
+        return (
+            await self._connection.execute(select(jobs.c.id).where(jobs.c.upload_id == upload_id))
+        ).scalar_one_or_none()
+
+    async def claim_next(self) -> ClaimedJob | None:
+        """Atomically move the oldest queued job to ``running``.
+
+        ``FOR UPDATE SKIP LOCKED`` lets any number of workers poll the same
+        table without blocking on each other or taking the same job twice.
+        """
+        jobs = tables.ingestion_jobs
+        now = utcnow()
+        next_id = (
+            select(jobs.c.id)
+            .where(jobs.c.status == "queued")
+            .order_by(jobs.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        row = (
+            await self._connection.execute(
+                update(jobs)
+                .where(jobs.c.id == next_id)
+                .values(
+                    status="running",
+                    attempts=jobs.c.attempts + 1,
+                    started_at=now,
+                    heartbeat_at=now,
+                )
+                .returning(jobs.c.id, jobs.c.user_id, jobs.c.upload_id, jobs.c.attempts)
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        return ClaimedJob(id=row.id, user_id=row.user_id, upload_id=row.upload_id, attempts=row.attempts)
+
+    async def update_progress(self, job_id: int, *, records_processed: int) -> None:
+        jobs = tables.ingestion_jobs
+        await self._connection.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id)
+            .values(records_processed=records_processed, heartbeat_at=utcnow())
+        )
+
+    async def heartbeat(self, job_id: int) -> None:
+        jobs = tables.ingestion_jobs
+        await self._connection.execute(
+            update(jobs).where(jobs.c.id == job_id, jobs.c.status == "running").values(heartbeat_at=utcnow())
+        )
+
+    async def mark_done(self, job_id: int, *, records_processed: int, result: dict[str, Any]) -> None:
+        jobs = tables.ingestion_jobs
+        now = utcnow()
+        await self._connection.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id)
+            .values(
+                status="done",
+                records_processed=records_processed,
+                result=result,
+                error=None,
+                heartbeat_at=now,
+                finished_at=now,
+            )
+        )
+
+    async def mark_failed(self, job_id: int, *, error: str, retry: bool) -> None:
+        jobs = tables.ingestion_jobs
+        now = utcnow()
+        await self._connection.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id)
+            .values(
+                status="queued" if retry else "failed",
+                error=error,
+                heartbeat_at=now,
+                finished_at=None if retry else now,
+            )
+        )
+
+    async def requeue_stale(self, *, heartbeat_before: datetime) -> int:
+        """Return jobs whose worker stopped sending heartbeats back to the queue."""
+        jobs = tables.ingestion_jobs
+        stale = and_(jobs.c.status == "running", jobs.c.heartbeat_at < heartbeat_before)
+        requeued = await self._connection.execute(
+            update(jobs).where(stale, jobs.c.attempts < MAX_ATTEMPTS).values(status="queued")
+        )
+        await self._connection.execute(
+            update(jobs)
+            .where(stale, jobs.c.attempts >= MAX_ATTEMPTS)
+            .values(status="failed", error="Воркер не завершил задачу", finished_at=utcnow())
+        )
+        return requeued.rowcount
+
+    async def get_job(self, job_id: int, *, user_id: int) -> dict[str, Any] | None:
+        jobs = tables.ingestion_jobs
+        row = (
+            await self._connection.execute(
+                select(jobs).where(and_(jobs.c.id == job_id, jobs.c.user_id == user_id))
+            )
+        ).one_or_none()
+        if row is None:
+            return None
+        return dict(row._mapping)
@@ -0,0 +1,137 @@
+"""Monthly range partitions of the high-volume metric tables.
+
+Each table in ``tables.PARTITIONED_TABLES`` has one partition per month of
+``startDate`` (``<table>_pYYYY_MM``) plus ``<table>_default``, which catches
+rows whose month has no partition yet. A new month is built as a standalone
+table, filled with any rows parked for it in the default partition and then
+attached; while that runs only writers routed to the default partition wait.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: datetime) -> str:
+    return f"{table_name}_p{month:%Y_%m}"
+
+
+def default_partition_name(table_name: str) -> str:
+    return f"{table_name}_default"
+
+
+@dataclass(slots=True, frozen=True)
+class MonthPartition:
+    name: str
+    month: datetime
+
+
+class PartitionsRepository:
+    def __init__(self, connection: AsyncConnection) -> None:
+        self._connection = connection
+        self._quote = connection.dialect.identifier_preparer.quote
+
+    async def list_partitions(self, table_name: str) -> list[MonthPartition]:
+        """Attached monthly partitions, oldest first (the default partition is not listed)."""
+        rows = await self._connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "WHERE parent.relname = :table AND child.relkind IN ('r', 'p')"
+            ).bindparams(table=table_name)
+        )
+        pattern = re.compile(rf"^{re.escape(table_name)}_p(\d{{4}})_(\d{{2}})$")
+        partitions = []
+        for (name,) in rows:
+            match = pattern.match(name)
+            if match:
+                partitions.append(MonthPartition(name, datetime(int(match[1]), int(match[2]), 1)))
+        return sorted(partitions, key=lambda partition: partition.month)
+
+    async def create_month_partition(self, table_name: str, month: datetime) -> bool:
+        """Create and attach the partition for ``month``; ``False`` if it is already attached."""
+        month = month_start(month)
+        if any(partition.month == month for partition in await self.list_partitions(table_name)):
+            return False
+        await self._attach_month(table_name, month)
+        return True
+
+    async def _attach_month(self, table_name: str, month: datetime) -> None:
+        parent = self._quote(table_name)
+        child = self._quote(partition_name(table_name, month))
+        default = self._quote(default_partition_name(table_name))
+        lower, upper = month, add_months(month, 1)
+        in_month = '"startDate" >= :lower AND "startDate" < :upper'
+        bounds = {"lower": lower, "upper": upper}
+
+        await self._connection.execute(
+            text(f"CREATE TABLE {child} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        )
+        # ATTACH fails while the default partition still holds rows of this month. The lock keeps
+        # writers out of the default partition until commit, so no row lands there after the move.
+        await self._connection.execute(text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE"))
+        await self._connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {default} WHERE {in_month} RETURNING *) "
+                f"INSERT INTO {child} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        await self._connection.execute(
+            text(
+                f"ALTER TABLE {parent} ATTACH PARTITION {child} "
+                f"FOR VALUES FROM ('{lower.isoformat(' ')}') TO ('{upper.isoformat(' ')}')"
+            )
+        )
+
+    async def ensure_partitions(self, table_name: str, first_month: datetime, last_month: datetime) -> list[str]:
+        """Create missing partitions for ``first_month..last_month`` inclusive; returns the new names."""
+        existing = {partition.month for partition in await self.list_partitions(table_name)}
+        created = []
+        month = month_start(first_month)
+        while month <= last_month:
+            if month not in existing:
+                await self._attach_month(table_name, month)
+                created.append(partition_name(table_name, month))
+            month = add_months(month, 1)
+        return created
+
+    async def default_partition_months(self, table_name: str) -> list[datetime]:
+        """Months that currently have rows parked in the default partition."""
+        default = self._quote(default_partition_name(table_name))
+        rows = await self._connection.execute(
+            text(f"""SELECT DISTINCT date_trunc('month', "startDate") AS month FROM {default} ORDER BY month""")
+        )
+        return list(rows.scalars())
+
+    async def detach_partitions_before(self, table_name: str, month: datetime, *, drop: bool = False) -> list[str]:
+        """Detach partitions of months before ``month``.
+
+        Detached partitions stay as ordinary tables (for archiving) unless
+        ``drop`` is set.
+        """
+        parent = self._quote(table_name)
+        detached = []
+        for partition in await self.list_partitions(table_name):
+            if partition.month >= month_start(month):
+                break
+            child = self._quote(partition.name)
+            await self._connection.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {child}"))
+            if drop:
+                await self._connection.execute(text(f"DROP TABLE {child}"))
+            detached.append(partition.name)
+        return detached
@@ -0,0 +1,151 @@
+"""Content-addressed, compressed storage for raw upload payloads.
+
+``health_uploads`` keeps only ``payload_ref`` and sizes; the bytes live in a
+``PayloadStore`` keyed by the upload's sha256, so re-sending the same payload
+never keeps it twice. New uploads are hashed while they are compressed, in a
+single pass over the body. Reads return a lazily decompressing binary stream.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import BinaryIO, Protocol
+
+from health_log.settings import settings
+
+_COMPRESSION_SUFFIXES = {"gzip": ".gz"}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def iter_text_chunks(text: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """UTF-8 encode ``text`` slice by slice instead of materializing one full copy."""
+    for start in range(0, len(text), chunk_size):
+        yield text[start : start + chunk_size].encode("utf-8")
+
+
+def iter_json_chunks(value: object, chunk_size: int = UPLOAD_CHUNK_SIZE, **dumps_kwargs) -> Iterator[bytes]:
+    """``json.dumps(value, **dumps_kwargs)`` as UTF-8 chunks, without building the whole string."""
+    parts: list[str] = []
+    size = 0
+    for piece in json.JSONEncoder(**dumps_kwargs).iterencode(value):
+        parts.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode("utf-8")
+
+
+def iter_file_chunks(path: str | os.PathLike[str], chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def upload_hasher(user_id: int, provider: str, data_format: str):
+    """sha256 seeded with the upload's owner and format; feed it the payload bytes."""
+    return sha256(f"{user_id}:{provider}:{data_format}:".encode())
+
+
+def upload_digest(user_id: int, provider: str, data_format: str, chunks: Iterable[bytes]) -> str:
+    """Dedup digest of an upload, fed incrementally.
+
+    Equal to ``sha256(f"{user_id}:{provider}:{data_format}:{payload}")`` for
+    the same UTF-8 payload, so existing ``health_uploads.sha256`` values keep
+    matching.
+    """
+    digest = upload_hasher(user_id, provider, data_format)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True, frozen=True)
+class StoredPayload:
+    ref: str
+    size: int
+    stored_size: int
+    compression: str
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.size / self.stored_size if self.stored_size else 1.0
+
+
+class PayloadStore(Protocol):
+    def put(self, digest: str, chunks: Iterable[bytes]) -> StoredPayload: ...
+
+    def put_hashed(self, chunks: Iterable[bytes], hasher) -> StoredPayload:
+        """Store ``chunks`` under ``hasher``'s digest, feeding it every chunk on the way."""
+        ...
+
+    def open(self, ref: str) -> BinaryIO: ...
+
+    def exists(self, ref: str) -> bool: ...
+
+
+class LocalPayloadStore:
+    """Gzip files under ``root/<d[0:2]>/<d[2:4]>/<digest>.gz``."""
+
+    def __init__(self, root: str | os.PathLike[str], *, compression: str = "gzip", level: int = 6) -> None:
+        if compression not in _COMPRESSION_SUFFIXES:
+            raise ValueError(f"Неподдерживаемое сжатие payload: '{compression}'")
+        self._root = Path(root)
+        self._compression = compression
+        self._level = level
+
+    def _path(self, ref: str) -> Path:
+        return self._root / ref
+
+    def _ref(self, digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{_COMPRESSION_SUFFIXES[self._compression]}"
+
+    def exists(self, ref: str) -> bool:
+        return self._path(ref).is_file()
+
+    def put(self, digest: str, chunks: Iterable[bytes]) -> StoredPayload:
+        return self._write(chunks, lambda: digest)
+
+    def put_hashed(self, chunks: Iterable[bytes], hasher) -> StoredPayload:
+        def hashed() -> Iterator[bytes]:
+            for chunk in chunks:
+                hasher.update(chunk)
+                yield chunk
+
+        return self._write(hashed(), hasher.hexdigest)
+
+    def _write(self, chunks: Iterable[bytes], digest: Callable[[], str]) -> StoredPayload:
+        self._root.mkdir(parents=True, exist_ok=True)
+        size = 0
+        # Write to a temp file and rename so readers never see a partial blob;
+        # concurrent writers of the same digest produce identical content.
+        fd, tmp_name = tempfile.mkstemp(dir=self._root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=self._level, mtime=0) as gz:
+                for chunk in chunks:
+                    size += len(chunk)
+                    gz.write(chunk)
+            ref = self._ref(digest())
+            path = self._path(ref)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        return StoredPayload(ref=ref, size=size, stored_size=path.stat().st_size, compression=self._compression)
+
+    def open(self, ref: str) -> BinaryIO:
+        return gzip.open(self._path(ref), "rb")  # type: ignore[return-value]
+
+
+def get_payload_store() -> PayloadStore:
+    return LocalPayloadStore(settings.payload_store_dir, compression=settings.payload_compression)
@@ -1,18 +1,68 @@
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+import io
+import os
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime
 from hashlib import sha256
-from typing import Any
+from typing import Any, BinaryIO
 
-from sqlalchemy import and_, select, tuple_
+from sqlalchemy import Double, Numeric, and_, case, cast, func, literal, or_, select, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from health_log.analysis.rollups import touched_days
+from health_log.repositories.bulk import LoadMode, copy_upsert
+from health_log.repositories.payload_store import (
+    PayloadStore,
+    get_payload_store,
+    iter_file_chunks,
+    iter_text_chunks,
+    upload_hasher,
+)
 from health_log.repositories.v1 import tables
-from health_log.services.apple_health_parser import ParsedRecord, parse_datetime
+from health_log.services.apple_health_parser import ParsedRecord, TimestampParser
+from health_log.utils import (
+    NUMERIC_ABS_MAX,
+    NUMERIC_ABS_MIN,
+    NUMERIC_TEXT_MAX_LENGTH,
+    NUMERIC_TEXT_PATTERN,
+    parse_value_text,
+)
 
 BATCH_SIZE = 500
 
+_DATE_COLUMNS = frozenset({"creationDate", "startDate", "endDate"})
+
+
+def parse_value_text_sql(column):
+    """SQL counterpart of ``parse_value_text``: NULL unless the text is a plain number."""
+    text = func.btrim(func.replace(column, ",", "."))
+    magnitude = func.abs(cast(text, Numeric))
+    in_range = or_(
+        magnitude == 0,
+        magnitude.between(literal(NUMERIC_ABS_MIN, Numeric), literal(NUMERIC_ABS_MAX, Numeric)),
+    )
+    # Nested so the numeric cast only sees text that passed the pattern.
+    return case(
+        (
+            and_(func.length(text) <= NUMERIC_TEXT_MAX_LENGTH, text.regexp_match(NUMERIC_TEXT_PATTERN)),
+            case((in_range, cast(text, Double)), else_=None),
+        ),
+        else_=None,
+    )
+
+
+def numeric_value(table):
+    """``value_num``, falling back to parsing ``value`` for rows the backfill has not reached."""
+    return func.coalesce(table.c.value_num, parse_value_text_sql(table.c.value))
+
+
+# Metric tables with ``daily_metric_rollups`` rows (health_log/repositories/rollups.py).
+ROLLUP_METRICS = frozenset(table.name for table in tables.NUMERIC_VALUE_TABLES)
+
 _STANDARD_UPSERT_COLS = ["user_id", "sourceName", "startDate", "endDate"]
 
 UPSERT_KEYS: dict[str, list[str]] = {
@@ -51,11 +101,10 @@ UPSERT_KEYS: dict[str, list[str]] = {
 
 
 class BaseRepository:
-    def __init__(self, connection: AsyncConnection) -> None:
+    def __init__(self, connection: AsyncConnection, *, load_mode: LoadMode = LoadMode.INSERT) -> None:
         self._connection = connection
+        self._load_mode = load_mode
 
-
-class RecordsRepository(BaseRepository):
     async def _upsert_in_batches(
         self,
         table,
@@ -65,6 +114,8 @@ class RecordsRepository(BaseRepository):
     ) -> int:
         if not rows:
             return 0
+        if self._load_mode is LoadMode.COPY:
+            return await copy_upsert(self._connection, table, rows, conflict_columns)
 
         inserted_total = 0
         for i in range(0, len(rows), batch_size):
@@ -79,23 +130,111 @@ class RecordsRepository(BaseRepository):
             inserted_total += len(result.fetchall())
         return inserted_total
 
+
+class RecordsRepository(BaseRepository):
+    def __init__(self, connection: AsyncConnection, *, load_mode: LoadMode = LoadMode.INSERT) -> None:
+        super().__init__(connection, load_mode=load_mode)
+        # Rollup days the rows written so far may have changed, by metric; see DailyRollupsRepository.
+        self.touched_days: dict[str, set[date]] = defaultdict(set)
+        # Time span covered by the sleep_analysis rows written so far; see SleepSessionsRepository.
+        self.sleep_span: tuple[datetime, datetime] | None = None
+
+    def _track_touched_days(self, table_name: str, rows: list[dict[str, Any]]) -> None:
+        for metric, days in touched_days(table_name, rows, ROLLUP_METRICS).items():
+            self.touched_days[metric] |= days
+        if table_name == tables.sleep_analysis.name and rows:
+            start = min(row["startDate"] for row in rows)
+            end = max(row["endDate"] for row in rows)
+            if self.sleep_span is not None:
+                start, end = min(start, self.sleep_span[0]), max(end, self.sleep_span[1])
+            self.sleep_span = (start, end)
+
     @staticmethod
-    def _record_to_table_values(record: ParsedRecord, table, *, user_id: int) -> dict[str, Any]:
-        values: dict[str, Any] = {"user_id": user_id} if "user_id" in table.c else {}
-        attrs = record.attrs
+    def _record_to_table_values(
+        record: ParsedRecord,
+        table,
+        *,
+        user_id: int,
+        parse_ts: TimestampParser | None = None,
+    ) -> dict[str, Any]:
+        return RecordsRepository._attrs_to_values(
+            record.attrs,
+            [col.name for col in table.columns],
+            user_id=user_id if "user_id" in table.c else None,
+            parse_ts=parse_ts or TimestampParser(),
+        )
 
-        for col in table.columns:
-            key = col.name
+    @staticmethod
+    def _attrs_to_values(
+        attrs: dict[str, str],
+        column_names: list[str],
+        *,
+        user_id: int | None,
+        parse_ts: TimestampParser,
+    ) -> dict[str, Any]:
+        values: dict[str, Any] = {"user_id": user_id} if user_id is not None else {}
+        for key in column_names:
+            if key == "value_num":
+                if "value" in attrs:
+                    values[key] = parse_value_text(attrs["value"])
+                continue
             if key not in attrs:
                 continue
 
             value: Any = attrs[key]
-            if key in {"creationDate", "startDate", "endDate"}:
-                value = parse_datetime(value)
+            if key in _DATE_COLUMNS:
+                value = parse_ts(value)
             values[key] = value
 
         return values
 
+    @staticmethod
+    def records_to_rows(
+        record_list: list[ParsedRecord],
+        table,
+        *,
+        user_id: int,
+        parse_ts: TimestampParser | None = None,
+    ) -> list[dict[str, Any]]:
+        """Convert records already routed to ``table`` into insertable rows."""
+        column_names = [col.name for col in table.columns]
+        row_user_id = user_id if "user_id" in table.c else None
+        parse_ts = parse_ts or TimestampParser()
+
+        rows: list[dict[str, Any]] = []
+        for record in record_list:
+            values = RecordsRepository._attrs_to_values(
+                record.attrs,
+                column_names,
+                user_id=row_user_id,
+                parse_ts=parse_ts,
+            )
+            if values:
+                rows.append(values)
+        return rows
+
+    async def upsert_rows(self, table, rows: list[dict[str, Any]]) -> int:
+        self._track_touched_days(table.name, rows)
+        return await self._upsert_in_batches(table, rows, UPSERT_KEYS[table.name])
+
+    async def backfill_value_num(self, table, *, after_id: int, batch_size: int) -> int:
+        """Fill ``value_num`` from ``value`` for ids in ``(after_id, after_id + batch_size]``.
+
+        Same rule as ``parse_value_text``: text is trimmed and a decimal comma
+        accepted; non-numeric values stay NULL.
+        """
+        result = await self._connection.execute(
+            update(table)
+            .where(
+                table.c.id > after_id,
+                table.c.id <= after_id + batch_size,
+                table.c.value_num.is_(None),
+                table.c.value.is_not(None),
+            )
+            .values(value_num=parse_value_text_sql(table.c.value))
+        )
+        return result.rowcount
+
     async def insert_records_for_type(
         self,
         *,
@@ -104,17 +243,9 @@ class RecordsRepository(BaseRepository):
         table,
         record_list: list[ParsedRecord],
     ) -> int:
-        rows: list[dict[str, Any]] = []
-        for record in record_list:
-            if record.record_type != record_type:
-                continue
-
-            values = self._record_to_table_values(record, table, user_id=user_id)
-            if values:
-                rows.append(values)
-
-        inserted = await self._upsert_in_batches(table, rows, UPSERT_KEYS[table.name])
-        return inserted
+        matching = [record for record in record_list if record.record_type == record_type]
+        rows = self.records_to_rows(matching, table, user_id=user_id)
+        return await self.upsert_rows(table, rows)
 
     async def insert_hr_variability_records(self, *, user_id: int, records: list[ParsedRecord]) -> tuple[int, int]:
         hrv_table = tables.heart_rate_variability
@@ -122,12 +253,13 @@ class RecordsRepository(BaseRepository):
 
         hrv_rows: list[dict[str, Any]] = []
         hrv_keys: list[tuple[int, str, datetime, datetime]] = []
+        parse_ts = TimestampParser()
 
         for record in records:
             if record.record_type != "HKQuantityTypeIdentifierHeartRateVariabilitySDNN":
                 continue
 
-            values = self._record_to_table_values(record, hrv_table, user_id=user_id)
+            values = self._record_to_table_values(record, hrv_table, user_id=user_id, parse_ts=parse_ts)
             source_name = values.get("sourceName")
             start_date = values.get("startDate")
             end_date = values.get("endDate")
@@ -137,6 +269,7 @@ class RecordsRepository(BaseRepository):
             hrv_rows.append(values)
             hrv_keys.append((user_id, source_name, start_date, end_date))
 
+        self._track_touched_days(hrv_table.name, hrv_rows)
         inserted_hrv = await self._upsert_in_batches(hrv_table, hrv_rows, UPSERT_KEYS[hrv_table.name])
 
         if not hrv_keys:
@@ -169,8 +302,8 @@ class RecordsRepository(BaseRepository):
                 continue
 
             source_name = record.attrs.get("sourceName")
-            start_date = parse_datetime(record.attrs.get("startDate"))
-            end_date = parse_datetime(record.attrs.get("endDate"))
+            start_date = parse_ts(record.attrs.get("startDate"))
+            end_date = parse_ts(record.attrs.get("endDate"))
             hrv_id = hrv_map.get((user_id, source_name, start_date, end_date))
             if not hrv_id:
                 continue
@@ -213,6 +346,16 @@ class RecordsRepository(BaseRepository):
 
 
 class IngestionRepository(BaseRepository):
+    def __init__(
+        self,
+        connection: AsyncConnection,
+        *,
+        load_mode: LoadMode = LoadMode.INSERT,
+        payload_store: PayloadStore | None = None,
+    ) -> None:
+        super().__init__(connection, load_mode=load_mode)
+        self._payload_store = payload_store or get_payload_store()
+
     async def create_upload(
         self,
         *,
@@ -222,8 +365,98 @@ class IngestionRepository(BaseRepository):
         filename: str,
         raw_payload: str,
     ) -> tuple[int, bool]:
-        digest_src = f"{user_id}:{provider}:{data_format}:{raw_payload}"
-        digest = sha256(digest_src.encode("utf-8")).hexdigest()
+        return await self._create_upload(
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            filename=filename,
+            chunks=iter_text_chunks(raw_payload),
+        )
+
+    async def create_upload_from_file(
+        self,
+        *,
+        user_id: int,
+        provider: str,
+        data_format: str,
+        path: str | os.PathLike[str],
+        filename: str | None = None,
+    ) -> tuple[int, bool]:
+        """Like ``create_upload`` but reads ``path`` in chunks; the body is never held in memory."""
+        return await self._create_upload(
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            filename=filename or os.path.basename(path),
+            chunks=iter_file_chunks(path),
+        )
+
+    async def create_upload_from_chunks(
+        self,
+        *,
+        user_id: int,
+        provider: str,
+        data_format: str,
+        filename: str,
+        chunks: Iterable[bytes],
+    ) -> tuple[int, bool]:
+        """Like ``create_upload`` for a body produced piece by piece (see ``iter_json_chunks``)."""
+        return await self._create_upload(
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            filename=filename,
+            chunks=chunks,
+        )
+
+    async def create_upload_from_bytes(
+        self,
+        *,
+        user_id: int,
+        provider: str,
+        data_format: str,
+        filename: str,
+        payload: bytes,
+    ) -> tuple[int, bool]:
+        return await self._create_upload(
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            filename=filename,
+            chunks=[payload],
+        )
+
+    async def find_upload(self, *, user_id: int, digest: str) -> int | None:
+        return (
+            await self._connection.execute(
+                select(tables.health_uploads.c.id).where(
+                    and_(
+                        tables.health_uploads.c.user_id == user_id,
+                        tables.health_uploads.c.sha256 == digest,
+                    )
+                )
+            )
+        ).scalar_one_or_none()
+
+    async def _create_upload(
+        self,
+        *,
+        user_id: int,
+        provider: str,
+        data_format: str,
+        filename: str,
+        chunks: Iterable[bytes],
+    ) -> tuple[int, bool]:
+        # One pass over the body: it is hashed while being compressed into the
+        # store, off the event loop. The blob is content-addressed, so storing a
+        # duplicate only rewrites the identical bytes the existing upload points at.
+        hasher = upload_hasher(user_id, provider, data_format)
+        stored = await asyncio.to_thread(self._payload_store.put_hashed, chunks, hasher)
+        digest = hasher.hexdigest()
+
+        existing_id = await self.find_upload(user_id=user_id, digest=digest)
+        if existing_id is not None:
+            return existing_id, False
 
         stmt = (
             pg_insert(tables.health_uploads)
@@ -233,7 +466,10 @@ class IngestionRepository(BaseRepository):
                 data_format=data_format,
                 filename=filename,
                 sha256=digest,
-                raw_payload=raw_payload,
+                payload_ref=stored.ref,
+                payload_size=stored.size,
+                payload_stored_size=stored.stored_size,
+                payload_compression=stored.compression,
             )
             .on_conflict_do_nothing(index_elements=["sha256"])
             .returning(tables.health_uploads.c.id)
@@ -244,16 +480,7 @@ class IngestionRepository(BaseRepository):
         if upload_id is not None:
             return upload_id, True
 
-        existing_id = (
-            await self._connection.execute(
-                select(tables.health_uploads.c.id).where(
-                    and_(
-                        tables.health_uploads.c.user_id == user_id,
-                        tables.health_uploads.c.sha256 == digest,
-                    )
-                )
-            )
-        ).scalar_one_or_none()
+        existing_id = await self.find_upload(user_id=user_id, digest=digest)
         if existing_id is None:
             raise RuntimeError(
                 f"Конфликт загрузки (sha256={digest[:16]}…): запись не вставлена и не найдена. "
@@ -261,6 +488,88 @@ class IngestionRepository(BaseRepository):
             )
         return existing_id, False
 
+    async def get_upload(self, upload_id: int) -> dict[str, Any] | None:
+        uploads = tables.health_uploads
+        row = (
+            await self._connection.execute(
+                select(
+                    uploads.c.id,
+                    uploads.c.user_id,
+                    uploads.c.provider,
+                    uploads.c.data_format,
+                    uploads.c.filename,
+                    uploads.c.payload_ref,
+                ).where(uploads.c.id == upload_id)
+            )
+        ).one_or_none()
+        return dict(row._mapping) if row is not None else None
+
+    async def open_payload(self, upload: dict[str, Any]) -> BinaryIO:
+        """Binary stream of the upload body; decompressed lazily for stored blobs."""
+        if upload["payload_ref"] is not None:
+            return self._payload_store.open(upload["payload_ref"])
+        # Legacy rows that migrate_payloads has not moved out of the table yet.
+        raw_payload = (
+            await self._connection.execute(
+                select(tables.health_uploads.c.raw_payload).where(tables.health_uploads.c.id == upload["id"])
+            )
+        ).scalar_one()
+        return io.BytesIO(raw_payload.encode("utf-8"))
+
+    async def move_payloads_to_store(self, *, batch_size: int = 100) -> int:
+        """Move up to ``batch_size`` inline ``raw_payload`` values into the payload store."""
+        uploads = tables.health_uploads
+        rows = (
+            await self._connection.execute(
+                select(uploads.c.id, uploads.c.sha256, uploads.c.raw_payload)
+                .where(and_(uploads.c.payload_ref.is_(None), uploads.c.raw_payload.is_not(None)))
+                .order_by(uploads.c.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        for row in rows:
+            stored = await asyncio.to_thread(self._payload_store.put, row.sha256, [row.raw_payload.encode("utf-8")])
+            await self._connection.execute(
+                update(uploads)
+                .where(uploads.c.id == row.id)
+                .values(
+                    raw_payload=None,
+                    payload_ref=stored.ref,
+                    payload_size=stored.size,
+                    payload_stored_size=stored.stored_size,
+                    payload_compression=stored.compression,
+                )
+            )
+        return len(rows)
+
+    async def get_watermarks(self, user_id: int) -> dict[tuple[str, str], datetime]:
+        marks = tables.ingestion_watermarks
+        rows = await self._connection.execute(
+            select(marks.c.record_type, marks.c.sourceName, marks.c.max_start_date).where(marks.c.user_id == user_id)
+        )
+        return {(row.record_type, row.sourceName): row.max_start_date for row in rows}
+
+    async def advance_watermarks(self, user_id: int, watermarks: dict[tuple[str, str], datetime]) -> None:
+        if not watermarks:
+            return
+        marks = tables.ingestion_watermarks
+        stmt = pg_insert(marks).values(
+            [
+                {"user_id": user_id, "record_type": record_type, "sourceName": source_name, "max_start_date": start}
+                for (record_type, source_name), start in watermarks.items()
+            ]
+        )
+        await self._connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[marks.c.user_id, marks.c.record_type, marks.c.sourceName],
+                set_={
+                    "max_start_date": func.greatest(marks.c.max_start_date, stmt.excluded.max_start_date),
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
     async def insert_raw_records(
         self,
         *,
@@ -270,6 +579,33 @@ class IngestionRepository(BaseRepository):
         data_format: str,
         records: list[ParsedRecord],
     ) -> int:
+        rows = self.raw_records_to_rows(
+            records,
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+        )
+        return await self.upsert_raw_rows(rows)
+
+    async def upsert_raw_rows(self, rows: list[dict[str, Any]]) -> int:
+        return await self._upsert_in_batches(
+            tables.raw_health_records,
+            rows,
+            ["user_id", "provider", "record_fingerprint"],
+        )
+
+    @staticmethod
+    def raw_records_to_rows(
+        records: list[ParsedRecord],
+        *,
+        upload_id: int,
+        user_id: int,
+        provider: str,
+        data_format: str,
+        parse_ts: TimestampParser | None = None,
+    ) -> list[dict[str, Any]]:
+        parse_ts = parse_ts or TimestampParser()
         rows: list[dict[str, Any]] = []
         for record in records:
             attrs = record.attrs
@@ -296,23 +632,11 @@ class IngestionRepository(BaseRepository):
                     "data_format": data_format,
                     "record_type": record_type,
                     "sourceName": attrs.get("sourceName"),
-                    "creationDate": parse_datetime(attrs.get("creationDate")),
-                    "startDate": parse_datetime(attrs.get("startDate")),
-                    "endDate": parse_datetime(attrs.get("endDate")),
+                    "creationDate": parse_ts(attrs.get("creationDate")),
+                    "startDate": parse_ts(attrs.get("startDate")),
+                    "endDate": parse_ts(attrs.get("endDate")),
                     "record_fingerprint": record_fingerprint,
                     "payload": payload,
                 }
             )
-
-        inserted = 0
-        for i in range(0, len(rows), BATCH_SIZE):
-            batch = rows[i : i + BATCH_SIZE]
-            stmt = (
-                pg_insert(tables.raw_health_records)
-                .values(batch)
-                .on_conflict_do_nothing(index_elements=["user_id", "provider", "record_fingerprint"])
-                .returning(tables.raw_health_records.c.id)
-            )
-            result = await self._connection.execute(stmt)
-            inserted += len(result.fetchall())
-        return inserted
+        return rows
@@ -0,0 +1,115 @@
+"""Downsampling of aged high-frequency samples into ``metric_sample_aggregates``."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.repositories.repository import numeric_value
+from health_log.repositories.v1 import tables
+
+# Buckets are aligned to whole minutes from this origin (date_bin).
+_BUCKET_ORIGIN = datetime(2000, 1, 1)
+
+
+@dataclass(slots=True)
+class CompactionResult:
+    deleted_rows: int = 0
+    # Sum of the deleted row sizes; reusable once (auto)vacuum has processed the table.
+    reclaimed_bytes: int = 0
+
+    def merge(self, other: CompactionResult) -> None:
+        self.deleted_rows += other.deleted_rows
+        self.reclaimed_bytes += other.reclaimed_bytes
+
+
+class SampleRetentionRepository:
+    def __init__(self, connection: AsyncConnection) -> None:
+        self._connection = connection
+
+    async def oldest_sample(self, table, user_id: int) -> datetime | None:
+        return (
+            await self._connection.execute(select(func.min(table.c.startDate)).where(table.c.user_id == user_id))
+        ).scalar_one()
+
+    async def compacted_through(self, user_id: int, metric: str) -> date | None:
+        """Last day with aggregated (no longer raw) samples of ``metric``."""
+        aggregates = tables.metric_sample_aggregates
+        last_bucket = (
+            await self._connection.execute(
+                select(func.max(aggregates.c.bucket_start)).where(
+                    aggregates.c.user_id == user_id,
+                    aggregates.c.metric == metric,
+                )
+            )
+        ).scalar_one()
+        return last_bucket.date() if last_bucket else None
+
+    async def compact_range(
+        self,
+        table,
+        user_id: int,
+        start: datetime,
+        end: datetime,
+        *,
+        bucket_minutes: int,
+    ) -> CompactionResult:
+        """Move samples with ``start <= startDate < end`` into aggregates in one statement.
+
+        Non-numeric values are dropped; aggregates of a bucket compacted twice
+        (late-arriving samples) are merged.
+        """
+        aggregates = tables.metric_sample_aggregates
+        deleted = (
+            delete(table)
+            .where(
+                table.c.user_id == user_id,
+                table.c.startDate >= start,
+                table.c.startDate < end,
+            )
+            .returning(
+                table.c.id,
+                table.c.startDate,
+                numeric_value(table).label("value"),
+                func.pg_column_size(table.table_valued()).label("size"),
+            )
+            .cte("deleted")
+        )
+        bucket = func.date_bin(timedelta(minutes=bucket_minutes), deleted.c.startDate, _BUCKET_ORIGIN)
+        insert = pg_insert(aggregates).from_select(
+            ["user_id", "metric", "bucket_start", "bucket_minutes", "sample_count", "value_min", "value_max", "value_sum"],
+            select(
+                literal(user_id),
+                literal(table.name),
+                bucket,
+                literal(bucket_minutes),
+                func.count(),
+                func.min(deleted.c.value),
+                func.max(deleted.c.value),
+                func.sum(deleted.c.value),
+            )
+            .where(deleted.c.value.is_not(None))
+            .group_by(bucket),
+        )
+        insert = insert.on_conflict_do_update(
+            index_elements=[aggregates.c.user_id, aggregates.c.metric, aggregates.c.bucket_start, aggregates.c.bucket_minutes],
+            set_={
+                "sample_count": aggregates.c.sample_count + insert.excluded.sample_count,
+                "value_min": func.least(aggregates.c.value_min, insert.excluded.value_min),
+                "value_max": func.greatest(aggregates.c.value_max, insert.excluded.value_max),
+                "value_sum": aggregates.c.value_sum + insert.excluded.value_sum,
+            },
+        )
+        statement = select(func.count(), func.coalesce(func.sum(deleted.c.size), 0)).add_cte(insert.cte("aggregated"))
+        if table is tables.heart_rate_variability:
+            # instantaneous_bpm has no foreign key to the partitioned table; drop its rows explicitly.
+            bpm = tables.instantaneous_bpm
+            statement = statement.add_cte(
+                delete(bpm).where(bpm.c.hr_variability_id.in_(select(deleted.c.id))).cte("deleted_bpm")
+            )
+
+        deleted_rows, reclaimed_bytes = (await self._connection.execute(statement)).one()
+        return CompactionResult(deleted_rows=deleted_rows, reclaimed_bytes=int(reclaimed_bytes))
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.analysis.rollups import (
+    SLEEP_MEDIAN_METRICS,
+    DailyRollup,
+    build_daily_rollups,
+)
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import MAX_SLEEP_SEGMENT, to_points
+from health_log.repositories.repository import BATCH_SIZE, ROLLUP_METRICS, numeric_value
+from health_log.repositories.retention import SampleRetentionRepository
+from health_log.repositories.v1 import tables
+
+logger = logging.getLogger(__name__)
+
+REFRESH_BATCH_DAYS = 31
+
+_DOWNSAMPLED_METRICS = frozenset(table.name for table in tables.DOWNSAMPLED_TABLES)
+
+_ROLLUP_VALUE_COLUMNS = (
+    "sample_count",
+    "value_sum",
+    "value_min",
+    "value_max",
+    "value_median",
+    "bottom20_median",
+    "sleep_median",
+)
+
+
+def day_runs(days: Iterable[date]) -> list[tuple[date, date]]:
+    """Collapse days into ``(first, last)`` runs of consecutive days."""
+    runs: list[tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _batches(runs: list[tuple[date, date]], max_days: int) -> Iterable[list[tuple[date, date]]]:
+    """Split runs into groups covering at most ``max_days`` days each."""
+    batch: list[tuple[date, date]] = []
+    size = 0
+    for first, last in runs:
+        while first <= last:
+            take = min((last - first).days + 1, max_days - size)
+            batch.append((first, first + timedelta(days=take - 1)))
+            size += take
+            first += timedelta(days=take)
+            if size == max_days:
+                yield batch
+                batch, size = [], 0
+    if batch:
+        yield batch
+
+
+def _day_start(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+class DailyRollupsRepository:
+    def __init__(self, connection: AsyncConnection) -> None:
+        self._connection = connection
+
+    async def _fetch_points(self, table, user_id: int, runs: list[tuple[date, date]]):
+        query = (
+            select(table.c.startDate, numeric_value(table))
+            .where(
+                table.c.user_id == user_id,
+                or_(
+                    *(
+                        and_(
+                            table.c.startDate >= _day_start(first),
+                            table.c.startDate < _day_start(last + timedelta(days=1)),
+                        )
+                        for first, last in runs
+                    )
+                ),
+            )
+            .order_by(table.c.startDate)
+        )
+        return to_points((await self._connection.execute(query)).all())
+
+    async def _fetch_sleep(self, user_id: int, runs: list[tuple[date, date]]) -> SleepIntervals:
+        sleep = tables.sleep_analysis
+        query = select(sleep.c.startDate, sleep.c.endDate).where(
+            sleep.c.user_id == user_id,
+            or_(
+                *(
+                    and_(
+                        sleep.c.startDate >= _day_start(first) - MAX_SLEEP_SEGMENT,
+                        sleep.c.startDate < _day_start(last + timedelta(days=1)),
+                        sleep.c.endDate >= _day_start(first),
+                    )
+                    for first, last in runs
+                )
+            ),
+        )
+        return SleepIntervals((row[0], row[1]) for row in (await self._connection.execute(query)).all())
+
+    async def refresh_days(self, user_id: int, days_by_metric: Mapping[str, Iterable[date]]) -> int:
+        """Recompute the rollups of the given days from raw rows; returns the number of rows written.
+
+        Days left without samples lose their rollup row.
+        """
+        written = 0
+        for metric, days in days_by_metric.items():
+            if metric not in ROLLUP_METRICS:
+                continue
+            if metric in _DOWNSAMPLED_METRICS:
+                # Compacted days have no raw samples left; keep the rollups computed before compaction.
+                compacted = await SampleRetentionRepository(self._connection).compacted_through(user_id, metric)
+                if compacted is not None:
+                    days = list(days)
+                    skipped = [day for day in days if day <= compacted]
+                    if skipped:
+                        logger.info(
+                            "Роллапы %s (user=%d) за %d сжатых дней обновит следующее сжатие: %s..%s",
+                            metric,
+                            user_id,
+                            len(skipped),
+                            min(skipped),
+                            max(skipped),
+                        )
+                    days = [day for day in days if day > compacted]
+            # Bounded batches keep a full-history refresh from loading every raw row at once.
+            for runs in _batches(day_runs(days), REFRESH_BATCH_DAYS):
+                written += await self._refresh_runs(user_id, metric, runs)
+        return written
+
+    async def compute_rollups(self, user_id: int, metric: str, runs: list[tuple[date, date]]) -> dict[date, DailyRollup]:
+        """Rollups of the days in ``runs`` built from raw rows, without storing them."""
+        points = await self._fetch_points(tables.metadata.tables[metric], user_id, runs)
+        sleep = await self._fetch_sleep(user_id, runs) if metric in SLEEP_MEDIAN_METRICS else None
+        return build_daily_rollups(points, sleep)
+
+    async def merge_late_samples(self, user_id: int, metric: str, day: date) -> int:
+        """Fold the raw samples of an already compacted ``day`` into its rollup; returns how many were folded.
+
+        Only count, sum, min and max can absorb them: the medians of a compacted
+        day cannot be recomputed and keep their earlier values. A day without a
+        rollup yet is built from its raw rows instead.
+        """
+        source = tables.metadata.tables[metric]
+        value = numeric_value(source)
+        late = (
+            await self._connection.execute(
+                select(func.count(value), func.sum(value), func.min(value), func.max(value)).where(
+                    source.c.user_id == user_id,
+                    source.c.startDate >= _day_start(day),
+                    source.c.startDate < _day_start(day + timedelta(days=1)),
+                )
+            )
+        ).one()
+        count, total, minimum, maximum = late
+        if not count:
+            return 0
+        table = tables.daily_metric_rollups
+        updated = await self._connection.execute(
+            update(table)
+            .where(table.c.user_id == user_id, table.c.metric == metric, table.c.day == day)
+            .values(
+                sample_count=table.c.sample_count + count,
+                value_sum=table.c.value_sum + total,
+                value_min=func.least(table.c.value_min, minimum),
+                value_max=func.greatest(table.c.value_max, maximum),
+                updated_at=func.now(),
+            )
+        )
+        if not updated.rowcount:
+            await self._refresh_runs(user_id, metric, [(day, day)])
+        return count
+
+    async def _refresh_runs(self, user_id: int, metric: str, runs: list[tuple[date, date]]) -> int:
+        rollups = await self.compute_rollups(user_id, metric, runs)
+
+        requested = {first + timedelta(days=n) for first, last in runs for n in range((last - first).days + 1)}
+        stale = requested - rollups.keys()
+        if stale:
+            table = tables.daily_metric_rollups
+            await self._connection.execute(
+                delete(table).where(
+                    table.c.user_id == user_id,
+                    table.c.metric == metric,
+                    table.c.day.in_(stale),
+                )
+            )
+        return await self._upsert(user_id, metric, rollups.values())
+
+    async def _upsert(self, user_id: int, metric: str, rollups: Iterable[DailyRollup]) -> int:
+        rows = [
+            {
+                "user_id": user_id,
+                "metric": metric,
+                "day": rollup.day,
+                "sample_count": rollup.count,
+                "value_sum": rollup.total,
+                "value_min": rollup.minimum,
+                "value_max": rollup.maximum,
+                "value_median": rollup.median,
+                "bottom20_median": rollup.bottom20_median,
+                "sleep_median": rollup.sleep_median,
+            }
+            for rollup in rollups
+        ]
+        if not rows:
+            return 0
+        table = tables.daily_metric_rollups
+        for i in range(0, len(rows), BATCH_SIZE):
+            stmt = pg_insert(table).values(rows[i : i + BATCH_SIZE])
+            await self._connection.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[table.c.user_id, table.c.metric, table.c.day],
+                    set_={
+                        **{name: stmt.excluded[name] for name in _ROLLUP_VALUE_COLUMNS},
+                        "updated_at": func.now(),
+                    },
+                )
+            )
+        return len(rows)
+
+    async def get_rollups(self, user_id: int, metric: str, first_day: date, last_day: date) -> list[DailyRollup]:
+        """Rollups of ``first_day..last_day`` inclusive, oldest first."""
+        table = tables.daily_metric_rollups
+        rows = await self._connection.execute(
+            select(
+                table.c.day,
+                table.c.sample_count,
+                table.c.value_sum,
+                table.c.value_min,
+                table.c.value_max,
+                table.c.value_median,
+                table.c.bottom20_median,
+                table.c.sleep_median,
+            )
+            .where(
+                table.c.user_id == user_id,
+                table.c.metric == metric,
+                table.c.day >= first_day,
+                table.c.day <= last_day,
+            )
+            .order_by(table.c.day)
+        )
+        return [DailyRollup(*row) for row in rows]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import delete, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import MAX_SLEEP_SEGMENT
+from health_log.repositories.repository import BATCH_SIZE
+from health_log.repositories.v1 import tables
+
+
+class SleepSessionsRepository:
+    def __init__(self, connection: AsyncConnection) -> None:
+        self._connection = connection
+
+    async def _fetch_overlapping(
+        self, user_id: int, start: datetime, end: datetime
+    ) -> tuple[list[tuple[datetime, datetime]], list[tuple[datetime, datetime]]]:
+        """Raw segments and stored sessions overlapping ``[start, end]``, in one round trip."""
+        raw = tables.sleep_analysis
+        sessions = tables.sleep_sessions
+        query = union_all(
+            select(literal(True).label("is_raw"), raw.c.startDate, raw.c.endDate).where(
+                raw.c.user_id == user_id,
+                raw.c.startDate >= start - MAX_SLEEP_SEGMENT,
+                raw.c.startDate <= end,
+                raw.c.endDate >= start,
+            ),
+            select(literal(False), sessions.c.startDate, sessions.c.endDate).where(
+                sessions.c.user_id == user_id,
+                sessions.c.endDate >= start,
+                sessions.c.startDate <= end,
+            ),
+        )
+        segments: list[tuple[datetime, datetime]] = []
+        stored: list[tuple[datetime, datetime]] = []
+        for is_raw, seg_start, seg_end in (await self._connection.execute(query)).all():
+            (segments if is_raw else stored).append((seg_start, seg_end))
+        return segments, stored
+
+    async def refresh_span(self, user_id: int, start: datetime, end: datetime) -> int:
+        """Re-merge the sessions around ``[start, end]`` from raw segments; returns the number written.
+
+        The span grows until it covers every raw segment and stored session
+        chained to it, so a segment bridging two nights joins them into one.
+        """
+        while True:
+            segments, stored = await self._fetch_overlapping(user_id, start, end)
+            lo = min((s for s, _ in segments + stored), default=start)
+            hi = max((e for _, e in segments + stored), default=end)
+            if lo >= start and hi <= end:
+                break
+            start, end = min(start, lo), max(end, hi)
+
+        table = tables.sleep_sessions
+        await self._connection.execute(
+            delete(table).where(table.c.user_id == user_id, table.c.endDate >= start, table.c.startDate <= end)
+        )
+        rows = [
+            {
+                "user_id": user_id,
+                "startDate": session_start,
+                "endDate": session_end,
+                "total_hours": (session_end - session_start).total_seconds() / 3600.0,
+                "wake_date": session_end.date(),
+            }
+            for session_start, session_end in SleepIntervals(segments)
+        ]
+        for i in range(0, len(rows), BATCH_SIZE):
+            await self._connection.execute(pg_insert(table).values(rows[i : i + BATCH_SIZE]))
+        return len(rows)
+
+    async def get_sessions(self, user_id: int, start: datetime, end: datetime) -> SleepIntervals:
+        """Whole sessions overlapping ``[start, end]``; they are not clipped to the range."""
+        table = tables.sleep_sessions
+        rows = await self._connection.execute(
+            select(table.c.startDate, table.c.endDate)
+            .where(table.c.user_id == user_id, table.c.endDate >= start, table.c.startDate <= end)
+            .order_by(table.c.endDate)
+        )
+        return SleepIntervals((row[0], row[1]) for row in rows)
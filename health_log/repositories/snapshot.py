@@ -0,0 +1,58 @@
+"""Pooled read-only connections that share one REPEATABLE READ snapshot."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+
+class SnapshotReaders:
+    """``size`` connections checked out of ``engine``'s pool for concurrent reads.
+
+    The first connection exports its snapshot and the others import it, so
+    every query sees the same committed state no matter which connection
+    runs it. At most ``size`` queries run at once; ``connection()`` waits for
+    a free one.
+    """
+
+    def __init__(self, engine: AsyncEngine, size: int) -> None:
+        self._engine = engine
+        self._size = size
+        self._stack = AsyncExitStack()
+        self._idle: asyncio.Queue[AsyncConnection] = asyncio.Queue()
+
+    async def _open(self) -> AsyncConnection:
+        conn = await self._stack.enter_async_context(self._engine.connect())
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        # Ended on exit, so the connection goes back to the pool without an open transaction.
+        await self._stack.enter_async_context(conn.begin())
+        return conn
+
+    async def __aenter__(self) -> SnapshotReaders:
+        try:
+            leader = await self._open()
+            snapshot = (await leader.execute(text("SELECT pg_export_snapshot()"))).scalar_one()
+            self._idle.put_nowait(leader)
+            for _ in range(self._size - 1):
+                follower = await self._open()
+                # Must be the first statement of the follower's transaction.
+                await follower.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot}'"))
+                self._idle.put_nowait(follower)
+        except BaseException:
+            await self._stack.aclose()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._stack.__aexit__(*exc_info)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncConnection]:
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
@@ -3,6 +3,10 @@ from sqlalchemy import func
 
 metadata = sqlalchemy.MetaData()
 
+# High-volume tables are range-partitioned by month; ``startDate`` joins the
+# primary key because every unique constraint must include the partition key.
+_MONTHLY_PARTITIONS = {"postgresql_partition_by": 'RANGE ("startDate")'}
+
 users = sqlalchemy.Table(
     "users",
     metadata,
@@ -49,8 +53,50 @@ health_uploads = sqlalchemy.Table(
     sqlalchemy.Column("data_format", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("filename", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("sha256", sqlalchemy.String(64), nullable=False, unique=True),
-    sqlalchemy.Column("raw_payload", sqlalchemy.Text, nullable=False),
+    # NULL once the payload lives in the payload store (see payload_ref).
+    sqlalchemy.Column("raw_payload", sqlalchemy.Text, nullable=True),
+    sqlalchemy.Column("payload_ref", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("payload_size", sqlalchemy.BigInteger, nullable=True),
+    sqlalchemy.Column("payload_stored_size", sqlalchemy.BigInteger, nullable=True),
+    sqlalchemy.Column("payload_compression", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("created_at", sqlalchemy.DateTime, server_default=func.now(), nullable=False),
+)
+
+ingestion_watermarks = sqlalchemy.Table(
+    "ingestion_watermarks",
+    metadata,
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"), primary_key=True),
+    sqlalchemy.Column("record_type", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("sourceName", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("max_start_date", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("updated_at", sqlalchemy.DateTime, server_default=func.now(), nullable=False),
+)
+
+ingestion_jobs = sqlalchemy.Table(
+    "ingestion_jobs",
+    metadata,
+    sqlalchemy.Column("id", sqlalchemy.Integer, sqlalchemy.Identity(), nullable=False, primary_key=True),
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"), nullable=False),
+    sqlalchemy.Column(
+        "upload_id",
+        sqlalchemy.Integer,
+        sqlalchemy.ForeignKey("health_uploads.id"),
+        nullable=False,
+        unique=True,
+    ),
+    sqlalchemy.Column("status", sqlalchemy.String, nullable=False, server_default="queued"),
+    sqlalchemy.Column("attempts", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("records_processed", sqlalchemy.Integer, nullable=False, server_default="0"),
+    sqlalchemy.Column("result", sqlalchemy.JSON, nullable=True),
+    sqlalchemy.Column("error", sqlalchemy.Text, nullable=True),
     sqlalchemy.Column("created_at", sqlalchemy.DateTime, server_default=func.now(), nullable=False),
+    sqlalchemy.Column("started_at", sqlalchemy.DateTime, nullable=True),
+    sqlalchemy.Column("heartbeat_at", sqlalchemy.DateTime, nullable=True),
+    sqlalchemy.Column("finished_at", sqlalchemy.DateTime, nullable=True),
+    sqlalchemy.CheckConstraint(
+        "status in ('queued', 'running', 'done', 'failed')",
+        name="ck_ingestion_jobs_status",
+    ),
 )
 
 raw_health_records = sqlalchemy.Table(
@@ -112,10 +158,12 @@ heart_rate = sqlalchemy.Table(
     sqlalchemy.Column("sourceName", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("unit", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("value", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("value_num", sqlalchemy.Double, nullable=True),
     sqlalchemy.Column("creationDate", sqlalchemy.DateTime, nullable=False),
-    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False, primary_key=True),
     sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
     sqlalchemy.UniqueConstraint("user_id", "sourceName", "startDate", "endDate", name="uq_heart_rate_record"),
+    **_MONTHLY_PARTITIONS,
 )
 
 heart_rate_variability = sqlalchemy.Table(
@@ -126,22 +174,20 @@ heart_rate_variability = sqlalchemy.Table(
     sqlalchemy.Column("sourceName", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("unit", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("value", sqlalchemy.String, nullable=True),
+    sqlalchemy.Column("value_num", sqlalchemy.Double, nullable=True),
     sqlalchemy.Column("creationDate", sqlalchemy.DateTime, nullable=False),
-    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False, primary_key=True),
     sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
     sqlalchemy.UniqueConstraint("user_id", "sourceName", "startDate", "endDate", name="uq_hrv_record"),
+    **_MONTHLY_PARTITIONS,
 )
 
 instantaneous_bpm = sqlalchemy.Table(
     "heart_rate_variability_bpm",
     metadata,
     sqlalchemy.Column("id", sqlalchemy.Integer, sqlalchemy.Identity(), nullable=False, primary_key=True),
-    sqlalchemy.Column(
-        "hr_variability_id",
-        sqlalchemy.Integer,
-        sqlalchemy.ForeignKey("heart_rate_variability.id"),
-        nullable=False,
-    ),
+    # No foreign key: heart_rate_variability is partitioned, so its id alone is not unique.
+    sqlalchemy.Column("hr_variability_id", sqlalchemy.Integer, nullable=False),
     sqlalchemy.Column("bpm", sqlalchemy.Integer, nullable=False),
     sqlalchemy.Column("time", sqlalchemy.String, nullable=False),
     sqlalchemy.UniqueConstraint("hr_variability_id", "time", name="uq_hrv_bpm_record"),
@@ -155,10 +201,12 @@ respiratory_rate = sqlalchemy.Table(
     sqlalchemy.Column("sourceName", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("unit", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("value", sqlalchemy.Text, nullable=True),
+    sqlalchemy.Column("value_num", sqlalchemy.Double, nullable=True),
     sqlalchemy.Column("creationDate", sqlalchemy.DateTime, nullable=False),
-    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False, primary_key=True),
     sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
     sqlalchemy.UniqueConstraint("user_id", "sourceName", "startDate", "endDate", name="uq_respiratory_rate_record"),
+    **_MONTHLY_PARTITIONS,
 )
 
 vo_2_max = sqlalchemy.Table(
@@ -169,6 +217,7 @@ vo_2_max = sqlalchemy.Table(
     sqlalchemy.Column("sourceName", sqlalchemy.String, nullable=False),
     sqlalchemy.Column("unit", sqlalchemy.String, nullable=True),
     sqlalchemy.Column("value", sqlalchemy.Text, nullable=True),
+    sqlalchemy.Column("value_num", sqlalchemy.Double, nullable=True),
     sqlalchemy.Column("creationDate", sqlalchemy.DateTime, nullable=False),
     sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False),
     sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
@@ -188,7 +237,7 @@ menstrual_flow = sqlalchemy.Table(
     sqlalchemy.UniqueConstraint("user_id", "sourceName", "startDate", "endDate", name="uq_menstrual_flow_record"),
 )
 
-def _quantity_table(name: str, unique_name: str) -> sqlalchemy.Table:
+def _quantity_table(name: str, unique_name: str, *, partitioned: bool = False) -> sqlalchemy.Table:
     return sqlalchemy.Table(
         name,
         metadata,
@@ -197,10 +246,12 @@ def _quantity_table(name: str, unique_name: str) -> sqlalchemy.Table:
         sqlalchemy.Column("sourceName", sqlalchemy.String, nullable=False),
         sqlalchemy.Column("unit", sqlalchemy.String, nullable=True),
         sqlalchemy.Column("value", sqlalchemy.Text, nullable=True),
+        sqlalchemy.Column("value_num", sqlalchemy.Double, nullable=True),
         sqlalchemy.Column("creationDate", sqlalchemy.DateTime, nullable=False),
-        sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False),
+        sqlalchemy.Column("startDate", sqlalchemy.DateTime, nullable=False, primary_key=partitioned),
         sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
         sqlalchemy.UniqueConstraint("user_id", "sourceName", "startDate", "endDate", name=unique_name),
+        **(_MONTHLY_PARTITIONS if partitioned else {}),
     )
 
 
@@ -239,7 +290,7 @@ body_mass_index = _quantity_table("body_mass_index", "uq_body_mass_index_record"
 body_fat_percentage = _quantity_table("body_fat_percentage", "uq_body_fat_percentage_record")
 lean_body_mass = _quantity_table("lean_body_mass", "uq_lean_body_mass_record")
 waist_circumference = _quantity_table("waist_circumference", "uq_waist_circumference_record")
-step_count = _quantity_table("step_count", "uq_step_count_record")
+step_count = _quantity_table("step_count", "uq_step_count_record", partitioned=True)
 apple_exercise_time = _quantity_table("apple_exercise_time", "uq_apple_exercise_time_record")
 apple_afib_burden = _quantity_table("apple_afib_burden", "uq_apple_afib_burden_record")
 
@@ -297,6 +348,51 @@ sync_schedules = sqlalchemy.Table(
     sqlalchemy.UniqueConstraint("user_id", "day_of_week", name="uq_sync_schedule_day"),
 )
 
+# Per-day aggregates of a metric table (``metric`` is its name), see health_log/analysis/rollups.py.
+daily_metric_rollups = sqlalchemy.Table(
+    "daily_metric_rollups",
+    metadata,
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"), primary_key=True),
+    sqlalchemy.Column("metric", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("day", sqlalchemy.Date, primary_key=True),
+    sqlalchemy.Column("sample_count", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column("value_sum", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("value_min", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("value_max", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("value_median", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("bottom20_median", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("sleep_median", sqlalchemy.Double, nullable=True),
+    sqlalchemy.Column("updated_at", sqlalchemy.DateTime, server_default=func.now(), nullable=False),
+)
+
+# Samples past SAMPLE_RETENTION_DAYS, compacted per ``bucket_minutes`` (health_log/services/sample_retention.py).
+metric_sample_aggregates = sqlalchemy.Table(
+    "metric_sample_aggregates",
+    metadata,
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"), primary_key=True),
+    sqlalchemy.Column("metric", sqlalchemy.String, primary_key=True),
+    sqlalchemy.Column("bucket_start", sqlalchemy.DateTime, primary_key=True),
+    sqlalchemy.Column("bucket_minutes", sqlalchemy.SmallInteger, primary_key=True),
+    sqlalchemy.Column("sample_count", sqlalchemy.Integer, nullable=False),
+    sqlalchemy.Column("value_min", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("value_max", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("value_sum", sqlalchemy.Double, nullable=False),
+)
+
+# sleep_analysis segments merged into disjoint sessions, maintained on ingestion
+# (health_log/repositories/sleep_sessions.py); ``wake_date`` is the date of ``endDate``.
+sleep_sessions = sqlalchemy.Table(
+    "sleep_sessions",
+    metadata,
+    sqlalchemy.Column("user_id", sqlalchemy.Integer, sqlalchemy.ForeignKey("users.id"), primary_key=True),
+    sqlalchemy.Column("startDate", sqlalchemy.DateTime, primary_key=True),
+    sqlalchemy.Column("endDate", sqlalchemy.DateTime, nullable=False),
+    sqlalchemy.Column("total_hours", sqlalchemy.Double, nullable=False),
+    sqlalchemy.Column("wake_date", sqlalchemy.Date, nullable=False),
+    # Sessions are disjoint, so an ``endDate >= start`` range scan is also in ``startDate`` order.
+    sqlalchemy.Index("ix_sleep_sessions_user_end", "user_id", "endDate", postgresql_include=["startDate"]),
+)
+
 TYPE_TABLE_MAP = {
     "HKCategoryTypeIdentifierSleepAnalysis": sleep_analysis,
     "HKDataTypeSleepDurationGoal": sleep_duration_goal,
@@ -327,3 +423,39 @@ TYPE_TABLE_MAP = {
     "HKCategoryTypeIdentifierIrregularHeartRhythmEvent": irregular_heart_rhythm_event,
     "HKCategoryTypeIdentifierIntermenstrualBleeding": intermenstrual_bleeding,
 }
+
+PARTITIONED_TABLES = (heart_rate, heart_rate_variability, respiratory_rate, step_count)
+
+for _table in PARTITIONED_TABLES:
+    # Catch-all for months without a partition yet; partition maintenance moves them out.
+    sqlalchemy.event.listen(
+        _table,
+        "after_create",
+        sqlalchemy.DDL("CREATE TABLE %(table)s_default PARTITION OF %(table)s DEFAULT"),
+    )
+
+# High-frequency tables whose old samples are downsampled into metric_sample_aggregates.
+DOWNSAMPLED_TABLES = (heart_rate, heart_rate_variability, respiratory_rate)
+
+# Quantity tables whose ``value`` text is mirrored into ``value_num`` on ingestion.
+NUMERIC_VALUE_TABLES = tuple(table for table in metadata.sorted_tables if "value_num" in table.c)
+
+# Every table analysis reads by user and ``startDate`` range.
+METRIC_TABLES = (*TYPE_TABLE_MAP.values(), heart_rate_variability)
+
+
+def _covering_columns(table: sqlalchemy.Table) -> list[str]:
+    if table is sleep_analysis:
+        return ["endDate"]
+    return [name for name in ("value", "value_num") if name in table.c]
+
+
+# Analysis fetches are served by index(-only) scans in ``startDate`` order, without a sort.
+for _table in METRIC_TABLES:
+    sqlalchemy.Index(
+        f"ix_{_table.name}_user_start",
+        _table.c.user_id,
+        _table.c.startDate,
+        postgresql_include=_covering_columns(_table),
+    )
+del _table
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import io
+import os
 import xml.etree.ElementTree as ET
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
+from typing import IO
 
 DATE_FORMATS = (
     "%Y-%m-%d %H:%M:%S %z",
@@ -11,6 +15,10 @@ DATE_FORMATS = (
     "%Y-%m-%dT%H:%M:%S",
 )
 
+PARSE_BATCH_SIZE = 5_000
+
+XmlSource = str | os.PathLike[str] | IO[bytes] | IO[str]
+
 
 @dataclass(slots=True)
 class ParsedRecord:
@@ -36,35 +44,169 @@ def parse_datetime(dt_str: str | None) -> datetime | None:
     return None
 
 
+# Offset suffixes after "YYYY-MM-DD?HH:MM:SS" that DATE_FORMATS accept, keyed by
+# suffix length, for the " " and "T" date/time separators.
+_SPACE_LAYOUTS = {0: "", 6: " hhmm", 7: " hh:mm", 2: " Z"}
+_T_LAYOUTS = {0: "", 5: "hhmm", 6: "hh:mm", 1: "Z"}
+_CACHE_MISS = object()
+
+
+def _detect_layout(value: str) -> tuple[str, int, str] | None:
+    if len(value) < 19 or value[10] not in " T":
+        return None
+    sep = value[10]
+    tail_len = len(value) - 19
+    kind = (_SPACE_LAYOUTS if sep == " " else _T_LAYOUTS).get(tail_len)
+    if kind is None:
+        return None
+    return sep, tail_len, kind
+
+
+def _offset_is_valid(tail: str, kind: str) -> bool:
+    if kind in ("", "Z", " Z"):
+        return tail == kind
+    if kind[0] == " ":
+        if tail[0] != " ":
+            return False
+        tail = tail[1:]
+        kind = kind[1:]
+    if tail[0] not in "+-":
+        return False
+    hours = tail[1:3]
+    minutes = tail[4:6] if kind == "hh:mm" else tail[3:5]
+    if kind == "hh:mm" and tail[3] != ":":
+        return False
+    return hours.isdigit() and minutes.isdigit() and hours <= "23" and minutes[0] <= "5"
+
+
+class TimestampParser:
+    """Drop-in replacement for ``parse_datetime`` tuned for one upload.
+
+    The layout is detected from the first timestamp; matching strings are then
+    sliced at fixed offsets instead of going through ``strptime``. Anything the
+    fast path does not accept falls back to ``parse_datetime``, so results are
+    identical. Parsed values are memoized because ``creationDate`` repeats a lot.
+    """
+
+    __slots__ = ("_layout", "_cache", "_cache_size")
+
+    def __init__(self, cache_size: int = 65_536) -> None:
+        self._layout: tuple[str, int, str] | None = None
+        self._cache: dict[str, datetime | None] = {}
+        self._cache_size = cache_size
+
+    def __call__(self, dt_str: str | None) -> datetime | None:
+        if not dt_str:
+            return None
+        cached = self._cache.get(dt_str, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            return cached  # type: ignore[return-value]
+
+        result = self._parse_fixed(dt_str)
+        if result is None:
+            result = parse_datetime(dt_str)
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[dt_str] = result
+        return result
+
+    def _parse_fixed(self, value: str) -> datetime | None:
+        layout = self._layout
+        if layout is None:
+            layout = self._layout = _detect_layout(value)
+            if layout is None:
+                return None
+
+        sep, tail_len, kind = layout
+        if (
+            len(value) != 19 + tail_len
+            or not value.isascii()
+            or value[4] != "-"
+            or value[7] != "-"
+            or value[10] != sep
+            or value[13] != ":"
+            or value[16] != ":"
+        ):
+            return None
+        if tail_len and not _offset_is_valid(value[19:], kind):
+            return None
+
+        year, month, day = value[0:4], value[5:7], value[8:10]
+        hour, minute, second = value[11:13], value[14:16], value[17:19]
+        if not (year + month + day + hour + minute + second).isdigit():
+            return None
+        try:
+            return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+        except ValueError:
+            return None
+
+
+def _element_to_record(rec: ET.Element) -> ParsedRecord:
+    attrs = dict(rec.attrib)
+    metadata: dict[str, str] = {}
+    bpm_entries: list[dict[str, str]] = []
+
+    for child in rec:
+        if child.tag == "MetadataEntry":
+            key = child.attrib.get("key")
+            value = child.attrib.get("value")
+            if key and value is not None:
+                metadata[key] = value
+        elif child.tag == "HeartRateVariabilityMetadataList":
+            for bpm_node in child.findall("InstantaneousBeatsPerMinute"):
+                bpm = bpm_node.attrib.get("bpm")
+                bpm_time = bpm_node.attrib.get("time")
+                if bpm and bpm_time:
+                    bpm_entries.append({"bpm": bpm, "time": bpm_time})
+
+    return ParsedRecord(attrs=attrs, metadata=metadata, hrv_bpm=bpm_entries)
+
+
 class AppleHealthXmlParser:
+    @staticmethod
+    def iter_records(source: XmlSource) -> Iterator[ParsedRecord]:
+        """Stream top-level ``<Record>`` elements from a path or file object.
+
+        Every finished child of the root is cleared right away, so memory use
+        does not depend on the size of the export. Records nested inside
+        ``<Correlation>`` are skipped, as with ``root.findall("Record")``.
+        """
+        context = ET.iterparse(source, events=("start", "end"))
+        root: ET.Element | None = None
+        depth = 0
+        for event, elem in context:
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+            if elem.tag == "Record":
+                yield _element_to_record(elem)
+            if root is not None:
+                root.clear()
+
+    @staticmethod
+    def iter_record_batches(
+        source: XmlSource,
+        batch_size: int = PARSE_BATCH_SIZE,
+    ) -> Iterator[list[ParsedRecord]]:
+        batch: list[ParsedRecord] = []
+        for record in AppleHealthXmlParser.iter_records(source):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     @staticmethod
     def parse_xml_content(xml_content: str) -> list[ParsedRecord]:
-        root = ET.fromstring(xml_content)
-        records: list[ParsedRecord] = []
-
-        for rec in root.findall("Record"):
-            attrs = dict(rec.attrib)
-            metadata: dict[str, str] = {}
-            bpm_entries: list[dict[str, str]] = []
-
-            for child in rec:
-                if child.tag == "MetadataEntry":
-                    key = child.attrib.get("key")
-                    value = child.attrib.get("value")
-                    if key and value is not None:
-                        metadata[key] = value
-                elif child.tag == "HeartRateVariabilityMetadataList":
-                    for bpm_node in child.findall("InstantaneousBeatsPerMinute"):
-                        bpm = bpm_node.attrib.get("bpm")
-                        bpm_time = bpm_node.attrib.get("time")
-                        if bpm and bpm_time:
-                            bpm_entries.append({"bpm": bpm, "time": bpm_time})
-
-            records.append(ParsedRecord(attrs=attrs, metadata=metadata, hrv_bpm=bpm_entries))
-
-        return records
+        return list(AppleHealthXmlParser.iter_records(io.StringIO(xml_content)))
 
     @staticmethod
     def parse_xml_file(file_path: str) -> list[ParsedRecord]:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return AppleHealthXmlParser.parse_xml_content(f.read())
+        return list(AppleHealthXmlParser.iter_records(file_path))
@@ -0,0 +1,44 @@
+"""Build ``daily_metric_rollups`` for data stored before the table existed.
+
+Recomputes every day that has samples, one user and metric per transaction;
+safe to re-run, since refreshing a day overwrites its rollup:
+    python -m health_log.services.backfill_rollups [user_id]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import Date, cast, select
+
+from health_log.db import engine
+from health_log.repositories.repository import ROLLUP_METRICS
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.v1 import tables
+
+
+async def backfill_user(user_id: int) -> int:
+    written = 0
+    for metric in sorted(ROLLUP_METRICS):
+        table = tables.metadata.tables[metric]
+        async with engine.begin() as conn:
+            days = (
+                await conn.execute(
+                    select(cast(table.c.startDate, Date)).where(table.c.user_id == user_id).distinct()
+                )
+            ).scalars()
+            written += await DailyRollupsRepository(conn).refresh_days(user_id, {metric: list(days)})
+    return written
+
+
+async def async_main(user_id: int | None = None) -> None:
+    if user_id is None:
+        async with engine.connect() as conn:
+            user_ids = list((await conn.execute(select(tables.users.c.id).order_by(tables.users.c.id))).scalars())
+    else:
+        user_ids = [user_id]
+    for uid in user_ids:
+        written = await backfill_user(uid)
+        print(f"user {uid}: {written} daily rollups written")
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
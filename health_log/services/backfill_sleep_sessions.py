@@ -0,0 +1,42 @@
+"""Rebuild ``sleep_sessions`` from raw ``sleep_analysis`` segments.
+
+The migration that adds the table fills it; this re-merges each user's whole
+sleep history in one transaction, e.g. after manual data fixes. Safe to re-run:
+    python -m health_log.services.backfill_sleep_sessions [user_id]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import func, select
+
+from health_log.db import engine
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
+from health_log.repositories.v1 import tables
+
+
+async def backfill_user(user_id: int) -> int:
+    sleep = tables.sleep_analysis
+    async with engine.begin() as conn:
+        first, last = (
+            await conn.execute(
+                select(func.min(sleep.c.startDate), func.max(sleep.c.endDate)).where(sleep.c.user_id == user_id)
+            )
+        ).one()
+        if first is None:
+            return 0
+        return await SleepSessionsRepository(conn).refresh_span(user_id, first, last)
+
+
+async def async_main(user_id: int | None = None) -> None:
+    if user_id is None:
+        async with engine.connect() as conn:
+            user_ids = list((await conn.execute(select(tables.users.c.id).order_by(tables.users.c.id))).scalars())
+    else:
+        user_ids = [user_id]
+    for uid in user_ids:
+        written = await backfill_user(uid)
+        print(f"user {uid}: {written} sleep sessions written")
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
@@ -0,0 +1,39 @@
+"""Online backfill of ``value_num`` for rows stored before the column existed.
+
+Walks every quantity table in id ranges and commits each range separately, so
+it can run against a live database and be restarted at any time:
+    python -m health_log.services.backfill_value_num [batch_size]
+"""
+import asyncio
+import sys
+
+from sqlalchemy import func, select
+
+from health_log.db import engine
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.v1.tables import NUMERIC_VALUE_TABLES
+
+
+async def backfill_table(table, batch_size: int) -> int:
+    async with engine.connect() as conn:
+        max_id = (await conn.execute(select(func.max(table.c.id)))).scalar_one_or_none() or 0
+
+    updated = 0
+    after_id = 0
+    while after_id < max_id:
+        async with engine.begin() as conn:
+            updated += await RecordsRepository(conn).backfill_value_num(
+                table, after_id=after_id, batch_size=batch_size
+            )
+        after_id += batch_size
+    return updated
+
+
+async def async_main(batch_size: int = 10_000) -> None:
+    for table in NUMERIC_VALUE_TABLES:
+        updated = await backfill_table(table, batch_size)
+        print(f"{table.name}: value_num backfill touched {updated} rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -14,7 +14,7 @@ async def async_main(file_path: str | None = None):
         result = await ingest_xml_file(conn, str(target_path), user_id=1)
 
     print(f"upload_id={result.upload_id} is_new_upload={result.is_new_upload}")
-    print(f"raw_records={result.raw_records_count}")
+    print(f"raw_records={result.raw_records_count} skipped_by_watermark={result.skipped_records_count}")
 
     if result.normalized_counts:
         for record_type, count in result.normalized_counts.items():
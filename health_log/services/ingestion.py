@@ -1,25 +1,55 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import json
+import logging
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
 
 from sqlalchemy.ext.asyncio import AsyncConnection
 
+from health_log.repositories.bulk import LoadMode
 from health_log.repositories.repository import IngestionRepository, RecordsRepository
 from health_log.repositories.v1.tables import TYPE_TABLE_MAP
-from health_log.services.apple_health_parser import AppleHealthXmlParser
+from health_log.services.apple_health_parser import (
+    AppleHealthXmlParser,
+    ParsedRecord,
+    TimestampParser,
+    XmlSource,
+)
+from health_log.services.parallel_ingestion import iter_normalized_chunks
+from health_log.services.record_routing import (
+    NormalizedChunk,
+    TypeIngestionStats,
+    log_type_stats,
+    merge_stats,
+    normalize_records,
+    refresh_derived_tables,
+    write_routed_records,
+)
+from health_log.services.sync_records import iter_sync_record_batches
+from health_log.services.watermarks import WATERMARKED_FORMATS, Watermarks
+from health_log.settings import settings
 
 SUPPORTED_PARSERS: dict[tuple[str, str], str] = {
     ("apple_health", "xml"): "apple_health_xml",
+    ("apple_health", "json"): "apple_health_sync_json",
+    ("apple_health", "ndjson"): "apple_health_sync_ndjson",
 }
 
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
 
 def _ensure_supported(provider: str, data_format: str) -> str:
     parser_name = SUPPORTED_PARSERS.get((provider, data_format))
     if parser_name is None:
         raise ValueError(
             f"Формат '{data_format}' для провайдера '{provider}' пока не поддерживается. "
-            "Сейчас доступно: provider='apple_health', data_format='xml'."
+            "Сейчас доступно: provider='apple_health', data_format='xml', 'json' или 'ndjson'."
         )
     return parser_name
 
@@ -32,15 +62,142 @@ class IngestionResult:
     normalized_counts: dict[str, int]
     hrv_records_count: int
     hrv_bpm_count: int
+    type_stats: dict[str, TypeIngestionStats] = field(default_factory=dict)
+    skipped_records_count: int = 0
+    # Parsed records handled, including those deduplicated or skipped by watermarks.
+    records_processed: int = 0
 
 
-def _parse_records(provider: str, data_format: str, content: str):
+def _iter_record_batches(provider: str, data_format: str, source: XmlSource) -> Iterable[list[ParsedRecord]]:
     parser_name = _ensure_supported(provider, data_format)
     if parser_name == "apple_health_xml":
-        return AppleHealthXmlParser.parse_xml_content(content)
+        return AppleHealthXmlParser.iter_record_batches(source)
+    if parser_name == "apple_health_sync_json":
+        # Sync payloads are capped in size and already validated by the API.
+        with open(source, encoding="utf-8") if isinstance(source, (str, os.PathLike)) else nullcontext(source) as f:
+            payload = json.load(f)
+        return iter_sync_record_batches(payload["records"])
+    if parser_name == "apple_health_sync_ndjson":
+        return iter_sync_record_batches(json.loads(line) for line in source if line.strip())
     return []
 
 
+def _normalizes(provider: str, data_format: str) -> bool:
+    return _ensure_supported(provider, data_format) in (
+        "apple_health_xml",
+        "apple_health_sync_json",
+        "apple_health_sync_ndjson",
+    )
+
+
+async def _serial_chunks(
+    batches: Iterable[list[ParsedRecord]],
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    watermarks: Watermarks | None = None,
+) -> AsyncIterator[NormalizedChunk]:
+    parse_ts = TimestampParser()
+    for batch in batches:
+        yield normalize_records(
+            batch,
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            route=_normalizes(provider, data_format),
+            parse_ts=parse_ts,
+            watermarks=watermarks,
+        )
+
+
+async def _load_watermarks(
+    connection: AsyncConnection,
+    *,
+    user_id: int,
+    data_format: str,
+    full_reingest: bool,
+) -> Watermarks | None:
+    if full_reingest or data_format not in WATERMARKED_FORMATS:
+        return None
+    return await IngestionRepository(connection).get_watermarks(user_id)
+
+
+async def _write_chunks(
+    connection: AsyncConnection,
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    chunks: AsyncIterator[NormalizedChunk],
+    load_mode: LoadMode,
+    on_progress: ProgressCallback | None = None,
+) -> IngestionResult:
+    ingestion_repo = IngestionRepository(connection, load_mode=load_mode)
+    records_repo = RecordsRepository(connection, load_mode=load_mode)
+
+    raw_records_count = 0
+    normalized_counts: dict[str, int] = (
+        dict.fromkeys(TYPE_TABLE_MAP, 0) if _normalizes(provider, data_format) else {}
+    )
+    hrv_records_count = 0
+    hrv_bpm_count = 0
+    type_stats: dict[str, TypeIngestionStats] = {}
+
+    records_processed = 0
+    skipped_records_count = 0
+    async for chunk in chunks:
+        raw_records_count += await ingestion_repo.upsert_raw_rows(chunk.raw_rows)
+        if data_format in WATERMARKED_FORMATS:
+            await ingestion_repo.advance_watermarks(user_id, chunk.watermarks)
+        skipped_records_count += chunk.skipped_count
+
+        hrv_inserted, bpm_inserted = await write_routed_records(records_repo, chunk.routed, user_id=user_id)
+        hrv_records_count += hrv_inserted
+        hrv_bpm_count += bpm_inserted
+        merge_stats(type_stats, chunk.routed.stats)
+
+        records_processed += chunk.record_count
+        if on_progress is not None:
+            await on_progress(records_processed)
+
+    await refresh_derived_tables(connection, records_repo, user_id=user_id)
+
+    for record_type in normalized_counts:
+        stats = type_stats.get(record_type)
+        if stats is not None:
+            normalized_counts[record_type] = stats.inserted
+    log_type_stats(upload_id, type_stats)
+    if skipped_records_count:
+        logger.info("upload_id=%d skipped=%d records at or below watermarks", upload_id, skipped_records_count)
+
+    return IngestionResult(
+        upload_id=upload_id,
+        is_new_upload=True,
+        raw_records_count=raw_records_count,
+        normalized_counts=normalized_counts,
+        hrv_records_count=hrv_records_count,
+        hrv_bpm_count=hrv_bpm_count,
+        type_stats=type_stats,
+        skipped_records_count=skipped_records_count,
+        records_processed=records_processed,
+    )
+
+
+def _duplicate_result(upload_id: int) -> IngestionResult:
+    return IngestionResult(
+        upload_id=upload_id,
+        is_new_upload=False,
+        raw_records_count=0,
+        normalized_counts={},
+        hrv_records_count=0,
+        hrv_bpm_count=0,
+    )
+
+
 async def ingest_content(
     connection: AsyncConnection,
     *,
@@ -49,12 +206,17 @@ async def ingest_content(
     data_format: str,
     filename: str,
     content: str,
+    load_mode: LoadMode = LoadMode.INSERT,
+    full_reingest: bool = False,
 ) -> IngestionResult:
+    """Ingest a body the caller already holds as text.
+
+    Large exports should go through ``ingest_xml_file``, which never loads the
+    body into memory; ``content`` here is only chunked into the payload store.
+    """
     _ensure_supported(provider, data_format)
 
     ingestion_repo = IngestionRepository(connection)
-    records_repo = RecordsRepository(connection)
-
     upload_id, is_new_upload = await ingestion_repo.create_upload(
         user_id=user_id,
         provider=provider,
@@ -62,44 +224,60 @@ async def ingest_content(
         filename=filename,
         raw_payload=content,
     )
+    if not is_new_upload:
+        return _duplicate_result(upload_id)
 
-    raw_records_count = 0
-    normalized_counts: dict[str, int] = {}
-    hrv_records_count = 0
-    hrv_bpm_count = 0
-
-    if is_new_upload:
-        parser_records = _parse_records(provider=provider, data_format=data_format, content=content)
-        raw_records_count = await ingestion_repo.insert_raw_records(
+    # Parse the stored blob as a stream rather than wrapping ``content`` in a second in-memory copy.
+    upload = await ingestion_repo.get_upload(upload_id)
+    with await ingestion_repo.open_payload(upload) as source:
+        return await ingest_upload(
+            connection,
             upload_id=upload_id,
             user_id=user_id,
             provider=provider,
             data_format=data_format,
-            records=parser_records,
+            source=source,
+            load_mode=load_mode,
+            full_reingest=full_reingest,
         )
 
-        if provider == "apple_health" and data_format == "xml":
-            for record_type, table in TYPE_TABLE_MAP.items():
-                inserted_count = await records_repo.insert_records_for_type(
-                    user_id=user_id,
-                    record_type=record_type,
-                    table=table,
-                    record_list=parser_records,
-                )
-                normalized_counts[record_type] = inserted_count
-
-            hrv_records_count, hrv_bpm_count = await records_repo.insert_hr_variability_records(
-                user_id=user_id,
-                records=parser_records,
-            )
 
-    return IngestionResult(
+async def ingest_upload(
+    connection: AsyncConnection,
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    source: XmlSource,
+    load_mode: LoadMode = LoadMode.INSERT,
+    on_progress: ProgressCallback | None = None,
+    full_reingest: bool = False,
+) -> IngestionResult:
+    """Parse and store the records of an upload row that already exists.
+
+    XML exports skip records already covered by the user's watermarks unless
+    ``full_reingest`` is set.
+    """
+    watermarks = await _load_watermarks(
+        connection, user_id=user_id, data_format=data_format, full_reingest=full_reingest
+    )
+    return await _write_chunks(
+        connection,
         upload_id=upload_id,
-        is_new_upload=is_new_upload,
-        raw_records_count=raw_records_count,
-        normalized_counts=normalized_counts,
-        hrv_records_count=hrv_records_count,
-        hrv_bpm_count=hrv_bpm_count,
+        user_id=user_id,
+        provider=provider,
+        data_format=data_format,
+        chunks=_serial_chunks(
+            _iter_record_batches(provider, data_format, source),
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            watermarks=watermarks,
+        ),
+        load_mode=load_mode,
+        on_progress=on_progress,
     )
 
 
@@ -110,16 +288,62 @@ async def ingest_xml_file(
     user_id: int = 1,
     provider: str = "apple_health",
     data_format: str = "xml",
+    load_mode: LoadMode = LoadMode.INSERT,
+    workers: int | None = None,
+    full_reingest: bool = False,
 ) -> IngestionResult:
+    _ensure_supported(provider, data_format)
     path = Path(file_path)
-    with path.open("r", encoding="utf-8") as f:
-        content = f.read()
 
-    return await ingest_content(
-        connection,
+    upload_id, is_new_upload = await IngestionRepository(connection).create_upload_from_file(
         user_id=user_id,
         provider=provider,
         data_format=data_format,
-        filename=path.name,
-        content=content,
+        path=path,
     )
+    if not is_new_upload:
+        return _duplicate_result(upload_id)
+
+    watermarks = await _load_watermarks(
+        connection, user_id=user_id, data_format=data_format, full_reingest=full_reingest
+    )
+    workers = workers or settings.ingest_workers
+    if workers > 1:
+        return await _write_chunks(
+            connection,
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            chunks=iter_normalized_chunks(
+                str(path),
+                upload_id=upload_id,
+                user_id=user_id,
+                provider=provider,
+                data_format=data_format,
+                workers=workers,
+                chunk_bytes=settings.ingest_chunk_bytes,
+                watermarks=watermarks,
+            ),
+            load_mode=load_mode,
+        )
+
+    # Parse straight from disk: iterparse never holds more than one batch of
+    # records at a time.
+    with path.open("rb") as f:
+        return await _write_chunks(
+            connection,
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            chunks=_serial_chunks(
+                _iter_record_batches(provider, data_format, f),
+                upload_id=upload_id,
+                user_id=user_id,
+                provider=provider,
+                data_format=data_format,
+                watermarks=watermarks,
+            ),
+            load_mode=load_mode,
+        )
@@ -0,0 +1,161 @@
+"""Background workers for queued ingestion jobs.
+
+Uploads are persisted and enqueued by the API in one short transaction; the
+workers started from ``create_app`` claim jobs with ``FOR UPDATE SKIP LOCKED``
+and run the parse/normalize/upsert pipeline off the request path. While a job
+runs, its heartbeat is refreshed on a timer, so a slow chunk does not look
+like a dead worker; the follow-up analysis runs as a separate task once the
+job is done.
+
+Integration pattern:
+    from health_log.services.ingestion_jobs import run_ingestion_workers
+    asyncio.create_task(run_ingestion_workers())
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.db import engine
+from health_log.repositories.auth import UsersRepository
+from health_log.repositories.ingestion_jobs import MAX_ATTEMPTS, ClaimedJob, IngestionJobsRepository
+from health_log.repositories.repository import IngestionRepository
+from health_log.services.analysis_service import analyze_for_user
+from health_log.services.ingestion import IngestionResult, ProgressCallback, ingest_upload
+from health_log.settings import settings
+from health_log.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+# Heartbeats per ``ingest_job_stale_seconds``: a live job misses a few before it looks stale.
+HEARTBEATS_PER_STALE_PERIOD = 3
+
+_analysis_tasks: set[asyncio.Task] = set()
+
+
+def _result_to_json(result: IngestionResult, duration_seconds: float) -> dict[str, Any]:
+    return {
+        "records_processed": result.records_processed,
+        "raw_records": result.raw_records_count,
+        "skipped_records": result.skipped_records_count,
+        "normalized_counts": result.normalized_counts,
+        "hrv_records": result.hrv_records_count,
+        "hrv_bpm": result.hrv_bpm_count,
+        "type_stats": {record_type: asdict(stats) for record_type, stats in result.type_stats.items()},
+        "duration_seconds": round(duration_seconds, 3),
+    }
+
+
+async def run_job(conn: AsyncConnection, job: ClaimedJob, *, on_progress: ProgressCallback | None = None) -> dict[str, Any]:
+    """Ingest the upload behind ``job`` on ``conn``; returns the JSON stored in ``result``."""
+    ingestion_repo = IngestionRepository(conn)
+    upload = await ingestion_repo.get_upload(job.upload_id)
+    if upload is None:
+        raise ValueError(f"Загрузка id={job.upload_id} не найдена")
+
+    started = time.perf_counter()
+    with await ingestion_repo.open_payload(upload) as source:
+        result = await ingest_upload(
+            conn,
+            upload_id=upload["id"],
+            user_id=upload["user_id"],
+            provider=upload["provider"],
+            data_format=upload["data_format"],
+            source=source,
+            on_progress=on_progress,
+        )
+    if upload["data_format"] != "xml":
+        await UsersRepository(conn).update_sync_status(
+            job.user_id,
+            last_sync_at=utcnow(),
+            records_count=result.raw_records_count,
+        )
+    return _result_to_json(result, time.perf_counter() - started)
+
+
+async def _send_heartbeat(job_id: int) -> None:
+    async with engine.begin() as conn:
+        await IngestionJobsRepository(conn).heartbeat(job_id)
+
+
+async def _keep_alive(job_id: int, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await _send_heartbeat(job_id)
+        except Exception:
+            logger.exception("Не удалось обновить heartbeat ingestion job_id=%d", job_id)
+
+
+def _schedule_analysis(user_id: int) -> None:
+    # Keep a reference until the task finishes, otherwise it may be garbage-collected mid-run.
+    task = asyncio.create_task(analyze_for_user(user_id))
+    _analysis_tasks.add(task)
+    task.add_done_callback(_analysis_tasks.discard)
+
+
+async def process_job(job: ClaimedJob) -> None:
+    async def report_progress(records_processed: int) -> None:
+        # Separate short transaction so the status endpoint sees progress
+        # while the ingestion transaction is still open.
+        async with engine.begin() as progress_conn:
+            await IngestionJobsRepository(progress_conn).update_progress(job.id, records_processed=records_processed)
+
+    heartbeat = asyncio.create_task(
+        _keep_alive(job.id, settings.ingest_job_stale_seconds / HEARTBEATS_PER_STALE_PERIOD)
+    )
+    try:
+        async with engine.begin() as conn:
+            result = await run_job(conn, job, on_progress=report_progress)
+    except Exception as exc:
+        retry = job.attempts < MAX_ATTEMPTS
+        logger.exception("Ошибка ingestion job_id=%d (попытка %d, повтор=%s)", job.id, job.attempts, retry)
+        async with engine.begin() as conn:
+            await IngestionJobsRepository(conn).mark_failed(job.id, error=str(exc) or type(exc).__name__, retry=retry)
+        return
+    finally:
+        heartbeat.cancel()
+
+    async with engine.begin() as conn:
+        await IngestionJobsRepository(conn).mark_done(
+            job.id,
+            records_processed=result["records_processed"],
+            result=result,
+        )
+    logger.info("Ingestion job_id=%d завершена за %.3fs", job.id, result["duration_seconds"])
+    _schedule_analysis(job.user_id)
+
+
+async def _worker_loop(worker_id: int) -> None:
+    poll_seconds = settings.ingest_job_poll_seconds
+    stale_after = timedelta(seconds=settings.ingest_job_stale_seconds)
+    while True:
+        try:
+            async with engine.begin() as conn:
+                job = await IngestionJobsRepository(conn).claim_next()
+            if job is not None:
+                logger.info("Воркер %d взял ingestion job_id=%d", worker_id, job.id)
+                await process_job(job)
+                continue
+
+            async with engine.begin() as conn:
+                requeued = await IngestionJobsRepository(conn).requeue_stale(heartbeat_before=utcnow() - stale_after)
+            if requeued:
+                logger.warning("Возвращено в очередь зависших ingestion jobs: %d", requeued)
+        except Exception:
+            logger.exception("Ошибка в воркере ingestion %d", worker_id)
+        await asyncio.sleep(poll_seconds)
+
+
+async def run_ingestion_workers() -> None:
+    """Run ``settings.ingest_job_workers`` polling loops until cancelled."""
+    if settings.ingest_job_workers == 0:
+        return
+    logger.info("Запущено воркеров ingestion: %d", settings.ingest_job_workers)
+    await asyncio.gather(*(_worker_loop(i) for i in range(settings.ingest_job_workers)))
@@ -0,0 +1,27 @@
+"""Move inline ``health_uploads.raw_payload`` values into the payload store.
+
+Each batch is committed separately, so the tool can be interrupted and rerun:
+    python -m health_log.services.migrate_payloads [batch_size]
+"""
+import asyncio
+import sys
+
+from health_log.db import engine
+from health_log.repositories.repository import IngestionRepository
+
+
+async def async_main(batch_size: int = 100) -> None:
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            moved = await IngestionRepository(conn).move_payloads_to_store(batch_size=batch_size)
+        if not moved:
+            break
+        total += moved
+        print(f"moved={total}")
+
+    print(f"done, moved {total} payloads")
+
+
+if __name__ == "__main__":
+    asyncio.run(async_main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
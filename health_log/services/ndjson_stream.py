@@ -0,0 +1,56 @@
+"""Incremental reading of NDJSON request bodies, optionally gzip-compressed.
+
+Memory stays bounded by one network chunk plus one line, however large the
+body is.
+"""
+from __future__ import annotations
+
+import zlib
+from collections.abc import AsyncIterable, AsyncIterator
+
+MAX_NDJSON_LINE_BYTES = 256 * 1024
+# Upper bound on bytes inflated from one network chunk (guards against gzip bombs).
+_INFLATE_STEP = 1024 * 1024
+
+
+class NdjsonError(ValueError):
+    def __init__(self, line_no: int, message: str) -> None:
+        super().__init__(f"Строка {line_no}: {message}")
+        self.line_no = line_no
+
+
+async def _inflate(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    async for chunk in chunks:
+        data = chunk
+        while data:
+            out = decompressor.decompress(data, _INFLATE_STEP)
+            if out:
+                yield out
+            data = decompressor.unconsumed_tail
+    if not decompressor.eof:
+        raise NdjsonError(0, "gzip-поток обрывается до конца")
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterable[bytes],
+    *,
+    gzipped: bool = False,
+) -> AsyncIterator[tuple[int, bytes]]:
+    """Yield ``(line_no, line)`` for non-empty lines of an NDJSON stream, newline stripped."""
+    source = _inflate(chunks) if gzipped else chunks
+    pending = b""
+    line_no = 0
+    async for chunk in source:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if len(line) > MAX_NDJSON_LINE_BYTES:
+                raise NdjsonError(line_no, f"строка длиннее {MAX_NDJSON_LINE_BYTES} байт")
+            if line.strip():
+                yield line_no, line
+        if len(pending) > MAX_NDJSON_LINE_BYTES:
+            raise NdjsonError(line_no + 1, f"строка длиннее {MAX_NDJSON_LINE_BYTES} байт")
+    if pending.strip():
+        yield line_no + 1, pending
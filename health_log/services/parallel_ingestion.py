@@ -0,0 +1,142 @@
+"""Multi-process parsing and normalization of large Apple Health exports.
+
+The export is split into byte ranges that start on a top-level ``<Record``
+element. Each range is parsed, fingerprinted and routed in a worker process,
+and the ready-to-insert rows are streamed back to the async writer in file
+order, so the database sees exactly what the serial path would write.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import mmap
+from collections import deque
+from collections.abc import AsyncIterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import pairwise
+
+from health_log.services.apple_health_parser import AppleHealthXmlParser
+from health_log.services.record_routing import NormalizedChunk, normalize_records
+from health_log.services.watermarks import Watermarks
+
+_ROOT_TAG = b"<HealthData"
+_ROOT_CLOSE = b"</HealthData>"
+_RECORD_OPEN = b"<Record "
+# Correlation is the only export element that nests <Record> children.
+_CORRELATION_OPEN = b"<Correlation "
+_CORRELATION_CLOSE = b"</Correlation>"
+
+
+def _next_top_level_record(mm: mmap.mmap, origin: int, pos: int, end: int) -> int | None:
+    while True:
+        candidate = mm.find(_RECORD_OPEN, pos, end)
+        if candidate == -1:
+            return None
+        region = mm[origin:candidate]
+        if region.count(_CORRELATION_OPEN) == region.count(_CORRELATION_CLOSE):
+            return candidate
+        close = mm.find(_CORRELATION_CLOSE, candidate, end)
+        if close == -1:
+            return None
+        pos = close
+
+
+def split_export(file_path: str, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Return ``(start, end)`` byte ranges covering the root element body.
+
+    Every range is a sequence of complete top-level elements, so it parses on
+    its own once wrapped in a root tag.
+    """
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        root_open = mm.find(_ROOT_TAG)
+        root_close = mm.rfind(_ROOT_CLOSE)
+        if root_open == -1 or root_close == -1:
+            raise ValueError("Не найден корневой элемент <HealthData> в файле экспорта")
+        body_start = mm.find(b">", root_open) + 1
+        body_end = root_close
+
+        boundaries = [body_start]
+        while boundaries[-1] + chunk_bytes < body_end:
+            boundary = _next_top_level_record(mm, boundaries[-1], boundaries[-1] + chunk_bytes, body_end)
+            if boundary is None:
+                break
+            boundaries.append(boundary)
+        boundaries.append(body_end)
+
+    return list(pairwise(boundaries))
+
+
+def normalize_chunk(
+    file_path: str,
+    start: int,
+    end: int,
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    watermarks: Watermarks | None = None,
+) -> NormalizedChunk:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+
+    records = list(AppleHealthXmlParser.iter_records(io.BytesIO(b"<HealthData>" + body + b"</HealthData>")))
+    return normalize_records(
+        records,
+        upload_id=upload_id,
+        user_id=user_id,
+        provider=provider,
+        data_format=data_format,
+        watermarks=watermarks,
+    )
+
+
+async def iter_normalized_chunks(
+    file_path: str,
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    workers: int,
+    chunk_bytes: int,
+    watermarks: Watermarks | None = None,
+) -> AsyncIterator[NormalizedChunk]:
+    """Yield normalized chunks in file order, keeping at most ``2 * workers`` in flight."""
+    loop = asyncio.get_running_loop()
+    spans = await asyncio.to_thread(split_export, file_path, chunk_bytes)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending: deque[Future[NormalizedChunk]] = deque()
+        span_iter = iter(spans)
+
+        def submit_next() -> None:
+            span = next(span_iter, None)
+            if span is not None:
+                pending.append(
+                    pool.submit(
+                        normalize_chunk,
+                        file_path,
+                        span[0],
+                        span[1],
+                        upload_id=upload_id,
+                        user_id=user_id,
+                        provider=provider,
+                        data_format=data_format,
+                        watermarks=watermarks,
+                    )
+                )
+
+        for _ in range(workers * 2):
+            submit_next()
+
+        while pending:
+            chunk = await asyncio.wrap_future(pending.popleft(), loop=loop)
+            submit_next()
+            yield chunk
+    finally:
+        # Runs on the event loop when the consumer stops early: drop queued chunks and
+        # let running workers finish in the background instead of waiting for them here.
+        pool.shutdown(wait=False, cancel_futures=True)
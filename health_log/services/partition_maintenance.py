@@ -0,0 +1,86 @@
+"""Daily upkeep of the monthly partitions (health_log/repositories/partitions.py).
+
+For every partitioned table: moves rows parked in the default partition
+into their own month, creates ``partition_months_ahead`` future months and,
+when ``partition_retention_months`` is set, detaches older months. Each table
+is handled in its own short transaction. Also runnable once by hand:
+    python -m health_log.services.partition_maintenance
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.db import engine
+from health_log.repositories.partitions import (
+    PartitionsRepository,
+    add_months,
+    month_start,
+    partition_name,
+)
+from health_log.repositories.v1.tables import PARTITIONED_TABLES
+from health_log.settings import settings
+from health_log.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+async def maintain_table_partitions(
+    conn: AsyncConnection,
+    table_name: str,
+    *,
+    now: datetime,
+    months_ahead: int,
+    retention_months: int = 0,
+) -> dict[str, list[str]]:
+    repo = PartitionsRepository(conn)
+    created: list[str] = []
+    for month in await repo.default_partition_months(table_name):
+        if await repo.create_month_partition(table_name, month):
+            created.append(partition_name(table_name, month))
+
+    current = month_start(now)
+    created += await repo.ensure_partitions(table_name, current, add_months(current, months_ahead))
+
+    detached: list[str] = []
+    if retention_months:
+        detached = await repo.detach_partitions_before(table_name, add_months(current, -retention_months))
+    return {"created": created, "detached": detached}
+
+
+async def maintain_partitions(now: datetime | None = None) -> None:
+    now = now or utcnow()
+    for table in PARTITIONED_TABLES:
+        async with engine.begin() as conn:
+            changes = await maintain_table_partitions(
+                conn,
+                table.name,
+                now=now,
+                months_ahead=settings.partition_months_ahead,
+                retention_months=settings.partition_retention_months,
+            )
+        if changes["created"] or changes["detached"]:
+            logger.info(
+                "Партиции %s: создано %s, отсоединено %s",
+                table.name,
+                changes["created"],
+                changes["detached"],
+            )
+
+
+async def run_partition_maintenance() -> None:
+    while True:
+        try:
+            await maintain_partitions()
+        except Exception:
+            logger.exception("Ошибка обслуживания партиций")
+        await asyncio.sleep(MAINTENANCE_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(maintain_partitions())
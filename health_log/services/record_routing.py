@@ -0,0 +1,182 @@
+"""Single-pass routing of parsed records into per-table row buckets.
+
+Records are bucketed by ``record_type`` in one pass and every bucket is
+normalized exactly once, so an import no longer rescans the whole record list
+for each entry of ``TYPE_TABLE_MAP``.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.repositories.repository import IngestionRepository, RecordsRepository
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
+from health_log.repositories.v1.tables import TYPE_TABLE_MAP
+from health_log.services.apple_health_parser import ParsedRecord, TimestampParser
+from health_log.services.watermarks import Watermarks, collect_watermarks, filter_new_records
+
+logger = logging.getLogger(__name__)
+
+HRV_RECORD_TYPE = "HKQuantityTypeIdentifierHeartRateVariabilitySDNN"
+
+
+@dataclass(slots=True)
+class TypeIngestionStats:
+    records: int = 0
+    inserted: int = 0
+    normalize_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+
+    def merge(self, other: TypeIngestionStats) -> None:
+        self.records += other.records
+        self.inserted += other.inserted
+        self.normalize_seconds += other.normalize_seconds
+        self.upsert_seconds += other.upsert_seconds
+
+
+@dataclass(slots=True)
+class RoutedRecords:
+    rows_by_type: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    hrv_records: list[ParsedRecord] = field(default_factory=list)
+    stats: dict[str, TypeIngestionStats] = field(default_factory=dict)
+
+
+def route_records(
+    records: Iterable[ParsedRecord],
+    *,
+    user_id: int,
+    parse_ts: TimestampParser | None = None,
+) -> RoutedRecords:
+    parse_ts = parse_ts or TimestampParser()
+    buckets: dict[str, list[ParsedRecord]] = {}
+    for record in records:
+        bucket = buckets.get(record.record_type)
+        if bucket is None:
+            bucket = buckets[record.record_type] = []
+        bucket.append(record)
+
+    routed = RoutedRecords(hrv_records=buckets.get(HRV_RECORD_TYPE, []))
+    for record_type, table in TYPE_TABLE_MAP.items():
+        bucket = buckets.get(record_type)
+        if not bucket:
+            continue
+
+        started = time.perf_counter()
+        routed.rows_by_type[record_type] = RecordsRepository.records_to_rows(
+            bucket,
+            table,
+            user_id=user_id,
+            parse_ts=parse_ts,
+        )
+        routed.stats[record_type] = TypeIngestionStats(
+            records=len(bucket),
+            normalize_seconds=time.perf_counter() - started,
+        )
+
+    if routed.hrv_records:
+        routed.stats[HRV_RECORD_TYPE] = TypeIngestionStats(records=len(routed.hrv_records))
+    return routed
+
+
+@dataclass(slots=True)
+class NormalizedChunk:
+    record_count: int
+    raw_rows: list[dict[str, Any]]
+    routed: RoutedRecords
+    skipped_count: int = 0
+    watermarks: Watermarks = field(default_factory=dict)
+
+
+def normalize_records(
+    records: list[ParsedRecord],
+    *,
+    upload_id: int,
+    user_id: int,
+    provider: str,
+    data_format: str,
+    route: bool = True,
+    parse_ts: TimestampParser | None = None,
+    watermarks: Watermarks | None = None,
+) -> NormalizedChunk:
+    """Build raw_health_records rows and, if ``route``, the per-table rows for one batch.
+
+    Records at or below ``watermarks`` are dropped first; the chunk carries the
+    watermarks of the records it kept.
+    """
+    parse_ts = parse_ts or TimestampParser()
+    record_count = len(records)
+    if watermarks:
+        records = filter_new_records(records, watermarks, parse_ts)
+    return NormalizedChunk(
+        record_count=record_count,
+        skipped_count=record_count - len(records),
+        watermarks=collect_watermarks(records, parse_ts),
+        raw_rows=IngestionRepository.raw_records_to_rows(
+            records,
+            upload_id=upload_id,
+            user_id=user_id,
+            provider=provider,
+            data_format=data_format,
+            parse_ts=parse_ts,
+        ),
+        routed=route_records(records, user_id=user_id, parse_ts=parse_ts) if route else RoutedRecords(),
+    )
+
+
+async def write_routed_records(
+    records_repo: RecordsRepository,
+    routed: RoutedRecords,
+    *,
+    user_id: int,
+) -> tuple[int, int]:
+    """Upsert every routed bucket; returns ``(hrv_inserted, hrv_bpm_inserted)``."""
+    for record_type, rows in routed.rows_by_type.items():
+        started = time.perf_counter()
+        inserted = await records_repo.upsert_rows(TYPE_TABLE_MAP[record_type], rows)
+        stats = routed.stats[record_type]
+        stats.inserted = inserted
+        stats.upsert_seconds = time.perf_counter() - started
+
+    if not routed.hrv_records:
+        return (0, 0)
+
+    started = time.perf_counter()
+    hrv_inserted, bpm_inserted = await records_repo.insert_hr_variability_records(
+        user_id=user_id,
+        records=routed.hrv_records,
+    )
+    stats = routed.stats[HRV_RECORD_TYPE]
+    stats.inserted = hrv_inserted
+    stats.upsert_seconds = time.perf_counter() - started
+    return (hrv_inserted, bpm_inserted)
+
+
+async def refresh_derived_tables(connection: AsyncConnection, records_repo: RecordsRepository, *, user_id: int) -> None:
+    """Bring daily rollups and sleep sessions up to date with the rows ``records_repo`` wrote."""
+    await DailyRollupsRepository(connection).refresh_days(user_id, records_repo.touched_days)
+    if records_repo.sleep_span is not None:
+        await SleepSessionsRepository(connection).refresh_span(user_id, *records_repo.sleep_span)
+
+
+def merge_stats(target: dict[str, TypeIngestionStats], source: dict[str, TypeIngestionStats]) -> None:
+    for record_type, stats in source.items():
+        target.setdefault(record_type, TypeIngestionStats()).merge(stats)
+
+
+def log_type_stats(upload_id: int, stats: dict[str, TypeIngestionStats]) -> None:
+    for record_type, item in sorted(stats.items(), key=lambda kv: -(kv[1].normalize_seconds + kv[1].upsert_seconds)):
+        logger.info(
+            "upload_id=%d type=%s records=%d inserted=%d normalize=%.3fs upsert=%.3fs",
+            upload_id,
+            record_type,
+            item.records,
+            item.inserted,
+            item.normalize_seconds,
+            item.upsert_seconds,
+        )
@@ -0,0 +1,117 @@
+"""Daily downsampling of aged heart rate, HRV and respiratory samples.
+
+Samples older than ``sample_retention_days`` are replaced by per
+``sample_bucket_minutes`` aggregates (count, min, max, sum) in
+``metric_sample_aggregates``. Work goes one user and one day per
+transaction, and each day's daily rollup is refreshed right before its raw
+samples go; late samples for an already compacted day are folded into its
+rollup's count, sum, min and max. Disabled while ``sample_retention_days`` is 0. Also runnable
+once by hand:
+    python -m health_log.services.sample_retention
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from health_log.db import engine
+from health_log.repositories.retention import CompactionResult, SampleRetentionRepository
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.v1 import tables
+from health_log.settings import settings
+from health_log.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+RETENTION_INTERVAL_SECONDS = 24 * 60 * 60
+
+
+def retention_cutoff(now: datetime, retention_days: int) -> datetime:
+    """Start of the first day whose samples are kept raw."""
+    cutoff = now - timedelta(days=retention_days)
+    return datetime(cutoff.year, cutoff.month, cutoff.day)
+
+
+async def compact_user_day(
+    conn: AsyncConnection,
+    table,
+    user_id: int,
+    day_start: datetime,
+    *,
+    cutoff: datetime,
+    bucket_minutes: int,
+) -> CompactionResult:
+    retention = SampleRetentionRepository(conn)
+    rollups = DailyRollupsRepository(conn)
+    compacted = await retention.compacted_through(user_id, table.name)
+    if compacted is not None and day_start.date() <= compacted:
+        # Late samples (e.g. an older export) for a day whose raw rows are already gone.
+        await rollups.merge_late_samples(user_id, table.name, day_start.date())
+    else:
+        await rollups.refresh_days(user_id, {table.name: [day_start.date()]})
+    return await retention.compact_range(
+        table,
+        user_id,
+        day_start,
+        min(day_start + timedelta(days=1), cutoff),
+        bucket_minutes=bucket_minutes,
+    )
+
+
+async def compact_user_table(table, user_id: int, *, cutoff: datetime, bucket_minutes: int) -> CompactionResult:
+    async with engine.connect() as conn:
+        oldest = await SampleRetentionRepository(conn).oldest_sample(table, user_id)
+
+    result = CompactionResult()
+    if oldest is None:
+        return result
+    day_start = datetime(oldest.year, oldest.month, oldest.day)
+    while day_start < cutoff:
+        async with engine.begin() as conn:
+            result.merge(
+                await compact_user_day(conn, table, user_id, day_start, cutoff=cutoff, bucket_minutes=bucket_minutes)
+            )
+        day_start += timedelta(days=1)
+    return result
+
+
+async def apply_sample_retention(now: datetime | None = None) -> dict[str, CompactionResult]:
+    if not settings.sample_retention_days:
+        return {}
+    cutoff = retention_cutoff(now or utcnow(), settings.sample_retention_days)
+    async with engine.connect() as conn:
+        user_ids = list((await conn.execute(select(tables.users.c.id))).scalars())
+
+    results: dict[str, CompactionResult] = {}
+    for table in tables.DOWNSAMPLED_TABLES:
+        total = results[table.name] = CompactionResult()
+        for user_id in user_ids:
+            total.merge(
+                await compact_user_table(table, user_id, cutoff=cutoff, bucket_minutes=settings.sample_bucket_minutes)
+            )
+        if total.deleted_rows:
+            logger.info(
+                "Сжатие %s до %s: удалено %d сэмплов, освобождено ~%d КБ",
+                table.name,
+                cutoff.date(),
+                total.deleted_rows,
+                total.reclaimed_bytes // 1024,
+            )
+    return results
+
+
+async def run_sample_retention() -> None:
+    while True:
+        try:
+            await apply_sample_retention()
+        except Exception:
+            logger.exception("Ошибка сжатия старых сэмплов")
+        await asyncio.sleep(RETENTION_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    asyncio.run(apply_sample_retention())
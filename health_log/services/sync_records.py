@@ -0,0 +1,32 @@
+"""Conversion of sync API records (``SyncRecord`` dumps) into ``ParsedRecord``."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any
+
+from health_log.services.apple_health_parser import PARSE_BATCH_SIZE, ParsedRecord
+
+_ATTR_FIELDS = ("type", "sourceName", "sourceVersion", "creationDate", "startDate", "endDate", "value", "unit")
+
+
+def sync_record_to_parsed(record: Mapping[str, Any]) -> ParsedRecord:
+    attrs = {name: record.get(name, "") for name in _ATTR_FIELDS}
+    metadata = {str(k): str(v) for k, v in (record.get("metadata") or {}).items()}
+    hrv_bpm: list[dict[str, str]] = []
+    if record.get("instantaneous_bpm"):
+        hrv_bpm = [{"bpm": str(entry["bpm"]), "time": entry["time"]} for entry in record["instantaneous_bpm"]]
+    return ParsedRecord(attrs=attrs, metadata=metadata, hrv_bpm=hrv_bpm)
+
+
+def iter_sync_record_batches(
+    records: Iterable[Mapping[str, Any]],
+    batch_size: int = PARSE_BATCH_SIZE,
+) -> Iterator[list[ParsedRecord]]:
+    batch: list[ParsedRecord] = []
+    for record in records:
+        batch.append(sync_record_to_parsed(record))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,58 @@
+"""Per-(record type, source) ``startDate`` watermarks for repeat exports.
+
+An Apple Health export always contains the user's whole history. Records
+whose ``startDate`` is at or below the stored watermark for their type and
+source were written by an earlier import, so they are dropped before
+fingerprinting and never reach Postgres.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from health_log.services.apple_health_parser import ParsedRecord, TimestampParser
+
+WatermarkKey = tuple[str, str]
+Watermarks = dict[WatermarkKey, datetime]
+
+# Sync payloads are deltas that may carry late-arriving older samples. They must
+# neither be filtered nor advance the watermarks: a sync-only mark would make the
+# next full export drop history that was never stored.
+WATERMARKED_FORMATS = frozenset({"xml"})
+
+
+def _key(record: ParsedRecord) -> WatermarkKey:
+    attrs = record.attrs
+    return (attrs.get("type") or "unknown", attrs.get("sourceName") or "")
+
+
+def filter_new_records(
+    records: list[ParsedRecord],
+    watermarks: Watermarks,
+    parse_ts: TimestampParser,
+) -> list[ParsedRecord]:
+    if not watermarks:
+        return records
+    kept: list[ParsedRecord] = []
+    for record in records:
+        mark = watermarks.get(_key(record))
+        if mark is not None:
+            start = parse_ts(record.attrs.get("startDate"))
+            if start is not None and start <= mark:
+                continue
+        kept.append(record)
+    return kept
+
+
+def collect_watermarks(records: Iterable[ParsedRecord], parse_ts: TimestampParser) -> Watermarks:
+    """Latest ``startDate`` per key among ``records``."""
+    result: Watermarks = {}
+    for record in records:
+        start = parse_ts(record.attrs.get("startDate"))
+        if start is None:
+            continue
+        key = _key(record)
+        current = result.get(key)
+        if current is None or start > current:
+            result[key] = start
+    return result
@@ -1,7 +1,14 @@
-from pydantic import PositiveInt, field_validator
+from typing import Literal
+
+from pydantic import NonNegativeInt, PositiveFloat, PositiveInt, field_validator
 from pydantic.networks import PostgresDsn
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Detectors read up to 180 days of raw samples (HealthRiskAnalyzer.analyze_window).
+MIN_SAMPLE_RETENTION_DAYS = 180
+# Whole months kept before the current one; covers those 180 days from any day of the month.
+MIN_PARTITION_RETENTION_MONTHS = MIN_SAMPLE_RETENTION_DAYS // 30 + 1
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file="local.env")
@@ -10,9 +17,32 @@ class Settings(BaseSettings):
     pg_pool_size: PositiveInt = 10
     pg_log_queries: bool = False
     pg_connection_timeout: PositiveInt = 60
+    # Analysis: >1 fetches metric tables concurrently over that many pooled read-only connections
+    analysis_fetch_connections: PositiveInt = 1
     auth_access_ttl_minutes: PositiveInt = 30
     auth_refresh_ttl_days: PositiveInt = 14
 
+    # XML import: >1 parses record-aligned chunks in a process pool
+    ingest_workers: PositiveInt = 1
+    ingest_chunk_bytes: PositiveInt = 32 * 1024 * 1024
+
+    # Queued ingestion jobs (POST /api/v1/sync/jobs); 0 workers disables processing
+    ingest_job_workers: NonNegativeInt = 2
+    ingest_job_poll_seconds: PositiveFloat = 1.0
+    ingest_job_stale_seconds: PositiveInt = 600
+
+    # Raw upload bodies: gzip blobs keyed by sha256 (health_uploads.payload_ref)
+    payload_store_dir: str = "data/payloads"
+    payload_compression: Literal["gzip"] = "gzip"
+
+    # Monthly partitions of heart_rate & co.: created ahead, optionally detached after N >= 7 months (0 keeps all)
+    partition_months_ahead: PositiveInt = 3
+    partition_retention_months: NonNegativeInt = 0
+
+    # Heart rate/HRV/respiratory samples older than N days are compacted into per-bucket aggregates (0 keeps them)
+    sample_retention_days: NonNegativeInt = 0
+    sample_bucket_minutes: Literal[1, 5] = 5
+
     # APNs configuration (optional — pushes are skipped if not set)
     apns_key_id: str = ""
     apns_team_id: str = ""
@@ -27,5 +57,19 @@ class Settings(BaseSettings):
             raise ValueError("POSTGRES_DSN is required")
         return value
 
+    @field_validator("sample_retention_days")
+    @classmethod
+    def validate_sample_retention_days(cls, value: int) -> int:
+        if 0 < value < MIN_SAMPLE_RETENTION_DAYS:
+            raise ValueError(f"SAMPLE_RETENTION_DAYS must be 0 or at least {MIN_SAMPLE_RETENTION_DAYS}")
+        return value
+
+    @field_validator("partition_retention_months")
+    @classmethod
+    def validate_partition_retention_months(cls, value: int) -> int:
+        if 0 < value < MIN_PARTITION_RETENTION_MONTHS:
+            raise ValueError(f"PARTITION_RETENTION_MONTHS must be 0 or at least {MIN_PARTITION_RETENTION_MONTHS}")
+        return value
+
 
 settings = Settings()
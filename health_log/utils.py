@@ -1,6 +1,19 @@
 from __future__ import annotations
 
+import math
+import re
 from datetime import datetime, timezone
+from decimal import Decimal
+
+# A plain decimal number, as accepted for ``value_num`` both here and in SQL
+# (``repositories.repository.numeric_value``); no nan/inf, no digit separators.
+NUMERIC_TEXT_PATTERN = r"^[+-]?([0-9]+([.][0-9]*)?|[.][0-9]+)([eE][+-]?[0-9]{1,3})?$"
+NUMERIC_TEXT_MAX_LENGTH = 64
+# Non-zero magnitudes outside this range are NULL rather than overflowing or
+# underflowing double precision (Postgres raises on both).
+NUMERIC_ABS_MIN = Decimal("1e-300")
+NUMERIC_ABS_MAX = Decimal("1e300")
+_NUMERIC_TEXT = re.compile(NUMERIC_TEXT_PATTERN)
 
 
 def utcnow() -> datetime:
@@ -12,3 +25,26 @@ def utcnow() -> datetime:
     ``datetime.now(timezone.utc)`` directly.
     """
     return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_value_text(raw: object) -> float | None:
+    """``value`` as stored in ``value_num``: None unless it is a finite plain number.
+
+    Text is trimmed of spaces and a decimal comma is accepted, exactly like the
+    SQL fallback that parses rows without ``value_num``; magnitudes that do not
+    fit a double are rejected on both sides.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, (float, int)):
+        if isinstance(raw, float) and not math.isfinite(raw):
+            return None
+        number = Decimal(raw)
+    else:
+        text = str(raw).replace(",", ".").strip(" ")
+        if len(text) > NUMERIC_TEXT_MAX_LENGTH or not _NUMERIC_TEXT.fullmatch(text):
+            return None
+        number = Decimal(text)
+    if number and not NUMERIC_ABS_MIN <= abs(number) <= NUMERIC_ABS_MAX:
+        return None
+    return float(raw if isinstance(raw, float) else number)
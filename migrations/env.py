@@ -39,7 +39,9 @@ def _do_run_migrations(connection: AsyncConnection) -> None:
 
 async def _run_async_migrations() -> None:
     engine = create_async_engine(URL)
-    async with engine.begin() as conn:
+    # Alembic owns the transaction so migrations can use autocommit_block()
+    # (CREATE INDEX CONCURRENTLY).
+    async with engine.connect() as conn:
         await conn.run_sync(_do_run_migrations)
     await engine.dispose()
 
@@ -0,0 +1,74 @@
+"""add sleep_sessions
+
+Revision ID: a3d8f1b6c2e9
+Revises: e7c2a9f4b1d6
+Create Date: 2026-10-17 00:00:00.000000
+
+Existing sleep_analysis segments are merged into sessions here, the same way
+SleepIntervals merges them (touching segments join); the analysis engine reads
+sleep only from this table.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a3d8f1b6c2e9"
+down_revision = "e7c2a9f4b1d6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sleep_sessions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("startDate", sa.DateTime(), nullable=False),
+        sa.Column("endDate", sa.DateTime(), nullable=False),
+        sa.Column("total_hours", sa.Double(), nullable=False),
+        sa.Column("wake_date", sa.Date(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "startDate"),
+    )
+    op.create_index(
+        "ix_sleep_sessions_user_end",
+        "sleep_sessions",
+        ["user_id", "endDate"],
+        postgresql_include=["startDate"],
+    )
+    # Gaps and islands: a segment starts a new session when it begins after
+    # every earlier segment of the user has ended.
+    op.execute(
+        """
+        INSERT INTO sleep_sessions (user_id, "startDate", "endDate", total_hours, wake_date)
+        SELECT user_id,
+               min(seg_start),
+               max(seg_end),
+               extract(epoch FROM max(seg_end) - min(seg_start))::double precision / 3600.0,
+               max(seg_end)::date
+        FROM (
+            SELECT user_id, seg_start, seg_end,
+                   sum(CASE WHEN is_new THEN 1 ELSE 0 END) OVER (
+                       PARTITION BY user_id ORDER BY seg_start, seg_end ROWS UNBOUNDED PRECEDING
+                   ) AS session_no
+            FROM (
+                SELECT user_id, "startDate" AS seg_start, "endDate" AS seg_end,
+                       "startDate" > coalesce(
+                           max("endDate") OVER (
+                               PARTITION BY user_id ORDER BY "startDate", "endDate"
+                               ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                           ),
+                           '-infinity'::timestamp
+                       ) AS is_new
+                FROM sleep_analysis
+                WHERE "endDate" > "startDate"
+            ) AS flagged
+        ) AS numbered
+        GROUP BY user_id, session_no
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sleep_sessions_user_end", table_name="sleep_sessions")
+    op.drop_table("sleep_sessions")
@@ -0,0 +1,55 @@
+"""add value_num double precision to quantity tables
+
+Revision ID: a6d2e8f4c1b7
+Revises: f1c7d9e2a5b6
+Create Date: 2026-10-17 00:00:00.000000
+
+Adding a nullable column without a default is a metadata-only change.
+Existing rows are filled online by
+``python -m health_log.services.backfill_value_num``.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a6d2e8f4c1b7"
+down_revision = "f1c7d9e2a5b6"
+branch_labels = None
+depends_on = None
+
+QUANTITY_TABLES = (
+    "apple_afib_burden",
+    "apple_exercise_time",
+    "apple_sleeping_wrist_temperature",
+    "blood_pressure_diastolic",
+    "blood_pressure_systolic",
+    "body_fat_percentage",
+    "body_mass",
+    "body_mass_index",
+    "environmental_audio_exposure",
+    "headphone_audio_exposure",
+    "heart_rate",
+    "heart_rate_variability",
+    "lean_body_mass",
+    "oxygen_saturation",
+    "respiratory_rate",
+    "step_count",
+    "vo_2_max",
+    "waist_circumference",
+    "walking_double_support_percentage",
+    "walking_heart_rate_average",
+    "walking_speed",
+    "walking_steadiness",
+    "walking_step_length",
+)
+
+
+def upgrade() -> None:
+    for table in QUANTITY_TABLES:
+        op.add_column(table, sa.Column("value_num", sa.Double(), nullable=True))
+
+
+def downgrade() -> None:
+    for table in QUANTITY_TABLES:
+        op.drop_column(table, "value_num")
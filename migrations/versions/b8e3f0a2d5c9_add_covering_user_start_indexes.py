@@ -0,0 +1,82 @@
+"""add covering (user_id, startDate) indexes to metric tables
+
+Revision ID: b8e3f0a2d5c9
+Revises: a6d2e8f4c1b7
+Create Date: 2026-10-17 00:00:00.000000
+
+Indexes are built with CREATE INDEX CONCURRENTLY outside the migration
+transaction, so ingestion keeps writing while they build. A failed build
+leaves an INVALID index behind; drop it and re-run the migration.
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b8e3f0a2d5c9"
+down_revision = "a6d2e8f4c1b7"
+branch_labels = None
+depends_on = None
+
+QUANTITY_TABLES = (
+    "apple_afib_burden",
+    "apple_exercise_time",
+    "apple_sleeping_wrist_temperature",
+    "blood_pressure_diastolic",
+    "blood_pressure_systolic",
+    "body_fat_percentage",
+    "body_mass",
+    "body_mass_index",
+    "environmental_audio_exposure",
+    "headphone_audio_exposure",
+    "heart_rate",
+    "heart_rate_variability",
+    "lean_body_mass",
+    "oxygen_saturation",
+    "respiratory_rate",
+    "step_count",
+    "vo_2_max",
+    "waist_circumference",
+    "walking_double_support_percentage",
+    "walking_heart_rate_average",
+    "walking_speed",
+    "walking_steadiness",
+    "walking_step_length",
+)
+
+CATEGORY_TABLES = (
+    "intermenstrual_bleeding",
+    "irregular_heart_rhythm_event",
+    "low_heart_rate_event",
+    "menstrual_flow",
+    "sleep_duration_goal",
+)
+
+COVERING_COLUMNS = {
+    **{table: ["value", "value_num"] for table in QUANTITY_TABLES},
+    **{table: ["value"] for table in CATEGORY_TABLES},
+    "sleep_analysis": ["endDate"],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, include in COVERING_COLUMNS.items():
+            op.create_index(
+                f"ix_{table}_user_start",
+                table,
+                ["user_id", "startDate"],
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in COVERING_COLUMNS:
+            op.drop_index(
+                f"ix_{table}_user_start",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,117 @@
+"""partition heart_rate, heart_rate_variability, respiratory_rate and step_count by month
+
+Revision ID: c2f6a9d4e8b1
+Revises: b8e3f0a2d5c9
+Create Date: 2026-10-17 00:00:00.000000
+
+Each table is rebuilt as ``PARTITION BY RANGE ("startDate")`` with one
+partition per month that has data (plus PARTITION_MONTHS_AHEAD future
+months) and a DEFAULT partition. Rows are copied inside the migration
+transaction, so plan downtime proportional to table size. The primary key
+becomes (id, "startDate") because unique constraints on a partitioned table
+must include the partition key. For the same reason the
+heart_rate_variability_bpm -> heart_rate_variability foreign key is dropped.
+"""
+
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2f6a9d4e8b1"
+down_revision = "b8e3f0a2d5c9"
+branch_labels = None
+depends_on = None
+
+PARTITION_MONTHS_AHEAD = 3
+
+TABLES = {
+    "heart_rate": "uq_heart_rate_record",
+    "heart_rate_variability": "uq_hrv_record",
+    "respiratory_rate": "uq_respiratory_rate_record",
+    "step_count": "uq_step_count_record",
+}
+CREATION_DATE_INDEXES = {
+    "heart_rate": "ix_heart_rate_creationDate",
+    "heart_rate_variability": "ix_heart_rate_variability_creationDate",
+    "respiratory_rate": "ix_respiratory_rate_creationDate",
+}
+HRV_BPM_FK = "heart_rate_variability_bpm_hr_variability_id_fkey"
+
+
+def _add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _user_fk_name(conn, table: str) -> str:
+    return conn.execute(
+        sa.text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+        ),
+        {"table": table},
+    ).scalar_one()
+
+
+def _rebuild(table: str, *, partitioned: bool) -> None:
+    conn = op.get_bind()
+    legacy = f"{table}_legacy"
+    fk_name = _user_fk_name(conn, table)
+
+    op.execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    partition_clause = ' PARTITION BY RANGE ("startDate")' if partitioned else ""
+    op.execute(f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING IDENTITY){partition_clause}')
+
+    if partitioned:
+        op.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+        first = conn.execute(sa.text(f'SELECT min("startDate") FROM "{legacy}"')).scalar_one()
+        now = datetime.now(timezone.utc)
+        current = datetime(now.year, now.month, 1)
+        month = datetime(first.year, first.month, 1) if first else current
+        while month <= _add_months(current, PARTITION_MONTHS_AHEAD):
+            upper = _add_months(month, 1)
+            op.execute(
+                f'CREATE TABLE "{table}_p{month:%Y_%m}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{month.isoformat(' ')}') TO ('{upper.isoformat(' ')}')"
+            )
+            month = upper
+
+    op.execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    op.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+        f'COALESCE((SELECT max(id) FROM "{table}"), 0) + 1, false)'
+    )
+    op.execute(f'DROP TABLE "{legacy}" CASCADE')
+
+    primary_key = ["id", "startDate"] if partitioned else ["id"]
+    op.create_primary_key(f"{table}_pkey", table, primary_key)
+    op.create_unique_constraint(TABLES[table], table, ["user_id", "sourceName", "startDate", "endDate"])
+    op.create_foreign_key(fk_name, table, "users", ["user_id"], ["id"])
+    op.create_index(
+        f"ix_{table}_user_start",
+        table,
+        ["user_id", "startDate"],
+        postgresql_include=["value", "value_num"],
+    )
+    if table in CREATION_DATE_INDEXES:
+        op.create_index(CREATION_DATE_INDEXES[table], table, ["creationDate"])
+
+
+def upgrade() -> None:
+    op.drop_constraint(HRV_BPM_FK, "heart_rate_variability_bpm", type_="foreignkey")
+    for table in TABLES:
+        _rebuild(table, partitioned=True)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        _rebuild(table, partitioned=False)
+    op.create_foreign_key(
+        HRV_BPM_FK,
+        "heart_rate_variability_bpm",
+        "heart_rate_variability",
+        ["hr_variability_id"],
+        ["id"],
+    )
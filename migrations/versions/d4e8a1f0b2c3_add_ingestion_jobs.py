@@ -0,0 +1,56 @@
+"""add ingestion_jobs queue
+
+Revision ID: d4e8a1f0b2c3
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4e8a1f0b2c3"
+down_revision = "c3d4e5f6a7b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingestion_jobs",
+        sa.Column("id", sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("upload_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False, server_default="queued"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("records_processed", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["upload_id"], ["health_uploads.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("upload_id"),
+        sa.CheckConstraint(
+            "status in ('queued', 'running', 'done', 'failed')",
+            name="ck_ingestion_jobs_status",
+        ),
+    )
+    # Workers only ever scan unfinished jobs; keep that index tiny.
+    op.create_index(
+        "ix_ingestion_jobs_pending",
+        "ingestion_jobs",
+        ["status", "id"],
+        postgresql_where=sa.text("status in ('queued', 'running')"),
+    )
+    op.create_index("ix_ingestion_jobs_user_id", "ingestion_jobs", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ingestion_jobs_user_id")
+    op.drop_index("ix_ingestion_jobs_pending")
+    op.drop_table("ingestion_jobs")
@@ -0,0 +1,42 @@
+"""add daily_metric_rollups
+
+Revision ID: d5b1e7c3f9a2
+Revises: c2f6a9d4e8b1
+Create Date: 2026-10-17 00:00:00.000000
+
+The table starts empty. Until it is filled for existing data with
+    python -m health_log.services.backfill_rollups
+the analyzer builds the days missing before the first stored rollup from raw rows.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d5b1e7c3f9a2"
+down_revision = "c2f6a9d4e8b1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_metric_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("metric", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Double(), nullable=False),
+        sa.Column("value_min", sa.Double(), nullable=False),
+        sa.Column("value_max", sa.Double(), nullable=False),
+        sa.Column("value_median", sa.Double(), nullable=False),
+        sa.Column("bottom20_median", sa.Double(), nullable=False),
+        sa.Column("sleep_median", sa.Double(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "metric", "day"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_metric_rollups")
@@ -0,0 +1,35 @@
+"""health_uploads: payload store reference instead of inline raw_payload
+
+Revision ID: e5f9b2c1d3a4
+Revises: d4e8a1f0b2c3
+Create Date: 2026-10-17 00:00:00.000000
+
+Existing rows keep their inline raw_payload until
+``python -m health_log.services.migrate_payloads`` moves them to the store.
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e5f9b2c1d3a4"
+down_revision = "d4e8a1f0b2c3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("health_uploads", sa.Column("payload_ref", sa.String(), nullable=True))
+    op.add_column("health_uploads", sa.Column("payload_size", sa.BigInteger(), nullable=True))
+    op.add_column("health_uploads", sa.Column("payload_stored_size", sa.BigInteger(), nullable=True))
+    op.add_column("health_uploads", sa.Column("payload_compression", sa.String(), nullable=True))
+    op.alter_column("health_uploads", "raw_payload", existing_type=sa.Text(), nullable=True)
+
+
+def downgrade() -> None:
+    # Payloads already moved to the store have to be restored before downgrading.
+    op.alter_column("health_uploads", "raw_payload", existing_type=sa.Text(), nullable=False)
+    op.drop_column("health_uploads", "payload_compression")
+    op.drop_column("health_uploads", "payload_stored_size")
+    op.drop_column("health_uploads", "payload_size")
+    op.drop_column("health_uploads", "payload_ref")
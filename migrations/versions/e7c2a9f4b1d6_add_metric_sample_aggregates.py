@@ -0,0 +1,36 @@
+"""add metric_sample_aggregates
+
+Revision ID: e7c2a9f4b1d6
+Revises: d5b1e7c3f9a2
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e7c2a9f4b1d6"
+down_revision = "d5b1e7c3f9a2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metric_sample_aggregates",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("metric", sa.String(), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(), nullable=False),
+        sa.Column("bucket_minutes", sa.SmallInteger(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("value_min", sa.Double(), nullable=False),
+        sa.Column("value_max", sa.Double(), nullable=False),
+        sa.Column("value_sum", sa.Double(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "metric", "bucket_start", "bucket_minutes"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("metric_sample_aggregates")
@@ -0,0 +1,33 @@
+"""add ingestion_watermarks
+
+Revision ID: f1c7d9e2a5b6
+Revises: e5f9b2c1d3a4
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f1c7d9e2a5b6"
+down_revision = "e5f9b2c1d3a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingestion_watermarks",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("record_type", sa.String(), nullable=False),
+        sa.Column("sourceName", sa.String(), nullable=False),
+        sa.Column("max_start_date", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "record_type", "sourceName"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingestion_watermarks")
@@ -0,0 +1,96 @@
+"""Concurrent table fetches over pooled snapshot connections (analysis_fetch_connections > 1).
+
+The extra connections only see committed rows, so these tests commit their
+seed data under a dedicated user and delete it afterwards.
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from health_log.analysis.engine import HealthRiskAnalyzer
+from health_log.analysis.models import TimeWindow
+from health_log.repositories.snapshot import SnapshotReaders
+from health_log.repositories.v1 import tables
+from tests.integration.conftest import TEST_DB_URL, requires_db
+
+pytestmark = [pytest.mark.asyncio, requires_db]
+
+_NOW = datetime(2031, 9, 1, 12)
+_EMAIL = "concurrent_fetch@test.local"
+
+
+@pytest.fixture
+async def committed_user():
+    engine = create_async_engine(TEST_DB_URL)
+    async with engine.begin() as conn:
+        user_id = (
+            await conn.execute(
+                text(
+                    "INSERT INTO users (first_name, last_name, sex, email, phone, password_hash, updated_at) "
+                    "VALUES ('Fetch', 'User', 'male', :email, '+70000000077', 'hash', now()) "
+                    "ON CONFLICT (email) DO UPDATE SET first_name='Fetch' RETURNING id"
+                ).bindparams(email=_EMAIL)
+            )
+        ).scalar_one()
+        for table, value in (
+            (tables.heart_rate, 64.0),
+            (tables.heart_rate_variability, 52.0),
+            (tables.respiratory_rate, 14.0),
+            (tables.step_count, 900.0),
+        ):
+            await conn.execute(
+                insert(table),
+                [
+                    {
+                        "user_id": user_id,
+                        "sourceName": "Fetch Watch",
+                        "creationDate": ts,
+                        "startDate": ts,
+                        "endDate": ts + timedelta(minutes=1),
+                        "value": str(value + i % 7),
+                        "value_num": value + i % 7,
+                    }
+                    for i, ts in enumerate(_NOW - timedelta(hours=3 * n) for n in range(400))
+                ],
+            )
+    try:
+        yield engine, user_id
+    finally:
+        async with engine.begin() as conn:
+            for table in (*tables.METRIC_TABLES, tables.analysis_reports, tables.sleep_apnea_events):
+                await conn.execute(delete(table).where(table.c.user_id == user_id))
+            await conn.execute(delete(tables.users).where(tables.users.c.id == user_id))
+        await engine.dispose()
+
+
+async def test_concurrent_fetch_matches_sequential(committed_user):
+    engine, user_id = committed_user
+    results = []
+    for fetch_connections in (1, 4):
+        async with engine.connect() as conn:
+            analyzer = HealthRiskAnalyzer(conn, user_id, fetch_connections=fetch_connections)
+            result = await analyzer.analyze_window(TimeWindow.MONTH, now=_NOW)
+            await conn.rollback()
+        results.append([replace(a, created_at=_NOW) for a in result["assessments"]])
+
+    sequential, concurrent = results
+    assert any(a.severity != "unknown" for a in sequential)
+    assert concurrent == sequential
+
+
+async def test_snapshot_readers_share_one_snapshot(committed_user):
+    engine, user_id = committed_user
+    count = text("SELECT count(*) FROM step_count WHERE user_id = :uid").bindparams(uid=user_id)
+    async with SnapshotReaders(engine, 2) as readers:
+        async with engine.begin() as writer:
+            await writer.execute(delete(tables.step_count).where(tables.step_count.c.user_id == user_id))
+
+        async with readers.connection() as first, readers.connection() as second:
+            assert first is not second
+            assert (await first.execute(count)).scalar_one() == 400
+            assert (await second.execute(count)).scalar_one() == 400
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import datetime, timedelta
 
 import pytest
 
 from health_log.analysis.engine import HealthRiskAnalyzer, serialize_assessment
 from health_log.analysis.models import TimeWindow
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
 from tests.integration.conftest import requires_db
 
 pytestmark = [pytest.mark.asyncio, requires_db]
@@ -27,6 +29,8 @@ async def _insert(conn, table_name: str, row: dict) -> None:
     await conn.execute(
         text(f'INSERT INTO {table_name} ({cols}) VALUES ({params}) ON CONFLICT DO NOTHING').bindparams(**row)
     )
+    if table_name == "sleep_analysis":
+        await SleepSessionsRepository(conn).refresh_span(row["user_id"], row["startDate"], row["endDate"])
 
 
 def _make_rows(
@@ -648,3 +652,19 @@ async def test_analyze_all_windows_preserves_full_detector_contract(db_conn, tes
             f"Window {window.value} is missing detector(s): {missing}. "
             "Detectors must be present for all windows even if severity is 'unknown'."
         )
+
+
+async def test_analyze_all_windows_matches_separate_window_runs(db_conn, test_user_id):
+    uid = test_user_id
+    await _populate_hr_sleep(db_conn, uid, n_hr=40, bpm=65.0, n_sleep=14)
+    await _insert_range(db_conn, uid, "walking_steadiness", 0.85, _MOBILITY_START, 30)
+    await _insert_range(db_conn, uid, "apple_sleeping_wrist_temperature", 36.5, _TEMPERATURE_START, 14, unit="degC")
+
+    analyzer = HealthRiskAnalyzer(db_conn, uid)
+    all_results = await analyzer.analyze_all_windows(now=_NOW)
+
+    for window, result in all_results.items():
+        separate = await analyzer.analyze_window(window, now=_NOW)
+        assert [replace(a, created_at=_NOW) for a in result["assessments"]] == [
+            replace(a, created_at=_NOW) for a in separate["assessments"]
+        ]
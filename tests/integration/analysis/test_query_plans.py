@@ -0,0 +1,142 @@
+"""Query-plan regression tests for analysis fetches.
+
+Every metric and sleep-session query issued by
+``HealthRiskAnalyzer.analyze_window`` is captured and EXPLAINed; each must be
+served by the covering ``ix_<table>_user_start`` index (``sleep_sessions``:
+``ix_sleep_sessions_user_end``) without an extra sort. The seeded tables are
+tiny (and the shared test database bloats across runs), so sequential scans,
+bitmap scans and sorts are disabled: a plan that still needs one of them has
+no ordered index path, which is the regression being guarded against.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import pytest
+from sqlalchemy import Select, text
+
+from health_log.analysis.engine import HealthRiskAnalyzer
+from health_log.analysis.models import TimeWindow
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
+from health_log.repositories.v1.tables import METRIC_TABLES
+from tests.integration.conftest import requires_db
+
+pytestmark = [pytest.mark.asyncio, requires_db]
+
+_NOW = datetime(2026, 3, 15, 12, 0, 0)
+_SEED_HOURS = 24 * 200
+_INDEX_SCANS = {"Index Scan", "Index Only Scan"}
+_QUERIED_TABLE_NAMES = {table.name for table in METRIC_TABLES} | {"sleep_sessions"}
+_EXPECTED_INDEXES = {"sleep_sessions": "ix_sleep_sessions_user_end"}
+
+
+class _RecordingConnection:
+    def __init__(self, connection) -> None:
+        self._connection = connection
+        self.statements: list[Select] = []
+
+    async def execute(self, statement, *args, **kwargs):
+        if isinstance(statement, Select):
+            self.statements.append(statement)
+        return await self._connection.execute(statement, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._connection, name)
+
+
+async def _seed(db_conn, user_id: int) -> None:
+    for table in METRIC_TABLES:
+        value = ", value" if "value" in table.c else ""
+        await db_conn.execute(
+            text(
+                f'INSERT INTO {table.name} (user_id, "sourceName", "creationDate", "startDate", "endDate"{value}) '
+                f"SELECT :uid, 'PlanSeed', ts, ts, ts + interval '5 minutes'{', (60 + i % 40)::text' if value else ''} "
+                "FROM generate_series(1, :n) AS i, LATERAL (SELECT :now - i * interval '1 hour' AS ts) AS t "
+                "ON CONFLICT DO NOTHING"
+            ).bindparams(uid=user_id, n=_SEED_HOURS, now=_NOW)
+        )
+        await db_conn.execute(text(f"ANALYZE {table.name}"))
+    await SleepSessionsRepository(db_conn).refresh_span(user_id, datetime(2000, 1, 1), _NOW)
+    await db_conn.execute(text("ANALYZE sleep_sessions"))
+
+
+def _plan_nodes(plan: dict) -> list[dict]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+
+async def _partition_parents(db_conn) -> dict[str, str]:
+    """Partition (and partition index) name -> partitioned table (index) name."""
+    rows = await db_conn.execute(
+        text(
+            "SELECT child.relname, parent.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent"
+        )
+    )
+    return dict(rows.all())
+
+
+async def _explain(db_conn, statement: Select) -> dict:
+    sql = str(statement.compile(dialect=db_conn.dialect, compile_kwargs={"literal_binds": True}))
+    result = await db_conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    return result.scalar_one()[0]["Plan"]
+
+
+async def _captured_metric_queries(db_conn, user_id: int) -> list[Select]:
+    recorder = _RecordingConnection(db_conn)
+    analyzer = HealthRiskAnalyzer(recorder, user_id)
+    for window in TimeWindow:
+        await analyzer.analyze_window(window, now=_NOW)
+    return [
+        statement
+        for statement in recorder.statements
+        if {from_.name for from_ in statement.get_final_froms()} & _QUERIED_TABLE_NAMES
+    ]
+
+
+async def test_every_analysis_query_uses_covering_index(db_conn, test_female_user_id):
+    await _seed(db_conn, test_female_user_id)
+    statements = await _captured_metric_queries(db_conn, test_female_user_id)
+    await db_conn.execute(text("SET LOCAL enable_seqscan = off"))
+    await db_conn.execute(text("SET LOCAL enable_bitmapscan = off"))
+    await db_conn.execute(text("SET LOCAL enable_sort = off"))
+
+    parents = await _partition_parents(db_conn)
+
+    queried_tables: set[str] = set()
+    failures: list[str] = []
+    for statement in statements:
+        plan = await _explain(db_conn, statement)
+        nodes = _plan_nodes(plan)
+        scans = [node for node in nodes if "Relation Name" in node]
+        assert scans, plan
+        # Partitioned tables scan one node per surviving partition.
+        for scan in scans:
+            table = parents.get(scan["Relation Name"], scan["Relation Name"])
+            index = parents.get(scan.get("Index Name", ""), scan.get("Index Name", ""))
+            queried_tables.add(table)
+            if scan["Node Type"] not in _INDEX_SCANS or index != _EXPECTED_INDEXES.get(table, f"ix_{table}_user_start"):
+                failures.append(f"{scan['Relation Name']}: {scan['Node Type']} {index}".strip())
+        if any(node["Node Type"] == "Sort" for node in nodes):
+            failures.append(f"{scans[0]['Relation Name']}: лишняя сортировка")
+
+    assert not failures, failures
+    # Guard against the capture silently missing queries.
+    assert {"heart_rate", "heart_rate_variability", "sleep_sessions", "menstrual_flow"} <= queried_tables
+
+
+async def test_metric_tables_have_covering_index(db_conn):
+    rows = (
+        await db_conn.execute(
+            text("SELECT tablename, indexdef FROM pg_indexes WHERE indexname = 'ix_' || tablename || '_user_start'")
+        )
+    ).all()
+    indexdefs = dict(rows)
+
+    for table in METRIC_TABLES:
+        assert table.name in indexdefs, table.name
+        assert '(user_id, "startDate") INCLUDE' in indexdefs[table.name]
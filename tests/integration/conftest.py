@@ -87,3 +87,11 @@ async def test_female_user_id(db_conn):
     )
     uid = result.scalar_one()
     return uid
+
+
+@pytest.fixture(autouse=True)
+def payload_store_dir(tmp_path, monkeypatch):
+    from health_log.settings import settings
+
+    monkeypatch.setattr(settings, "payload_store_dir", str(tmp_path / "payloads"))
+    return tmp_path / "payloads"
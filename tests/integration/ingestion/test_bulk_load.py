@@ -0,0 +1,48 @@
+"""Integration tests for the COPY bulk-load path (health_log/repositories/bulk.py)."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from health_log.repositories.bulk import LoadMode
+from health_log.services.ingestion import ingest_content
+from tests.integration.conftest import requires_db
+
+FIXTURE_PATH = Path("tests/fixtures/apple_health_extended_types.xml")
+
+
+async def _ingest(db_conn, user_id: int, load_mode: LoadMode, suffix: str = ""):
+    return await ingest_content(
+        db_conn,
+        user_id=user_id,
+        provider="apple_health",
+        data_format="xml",
+        filename="export.xml",
+        content=FIXTURE_PATH.read_text(encoding="utf-8") + suffix,
+        load_mode=load_mode,
+    )
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_copy_load_matches_insert_load(db_conn, test_user_id, test_female_user_id):
+    copy_result = await _ingest(db_conn, test_user_id, LoadMode.COPY)
+    insert_result = await _ingest(db_conn, test_female_user_id, LoadMode.INSERT)
+
+    assert copy_result.raw_records_count > 0
+    assert copy_result.raw_records_count == insert_result.raw_records_count
+    assert copy_result.normalized_counts == insert_result.normalized_counts
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_copy_load_skips_rows_already_stored(db_conn, test_user_id):
+    first = await _ingest(db_conn, test_user_id, LoadMode.COPY)
+    # A different payload digest forces a new upload with the same records.
+    second = await _ingest(db_conn, test_user_id, LoadMode.COPY, suffix="\n")
+
+    assert first.raw_records_count > 0
+    assert second.is_new_upload is True
+    assert second.raw_records_count == 0
+    assert sum(second.normalized_counts.values()) == 0
@@ -0,0 +1,24 @@
+"""Integration tests: parallel XML ingestion writes the same rows as the serial path."""
+from __future__ import annotations
+
+import pytest
+
+from health_log.services import ingestion
+from health_log.services.ingestion import ingest_xml_file
+from tests.integration.conftest import requires_db
+from tests.test_parallel_ingestion import _write_export
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_parallel_ingestion_matches_serial(db_conn, test_user_id, test_female_user_id, tmp_path, monkeypatch):
+    export = tmp_path / "export.xml"
+    _write_export(export)
+    monkeypatch.setattr(ingestion.settings, "ingest_chunk_bytes", 700)
+
+    serial = await ingest_xml_file(db_conn, str(export), user_id=test_user_id, workers=1)
+    parallel = await ingest_xml_file(db_conn, str(export), user_id=test_female_user_id, workers=2)
+
+    assert parallel.raw_records_count == serial.raw_records_count > 0
+    assert parallel.normalized_counts == serial.normalized_counts
+    assert parallel.hrv_records_count == serial.hrv_records_count
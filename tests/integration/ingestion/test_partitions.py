@@ -0,0 +1,100 @@
+"""Integration tests for monthly partitions (health_log/repositories/partitions.py)."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from health_log.analysis.engine import HealthRiskAnalyzer
+from health_log.repositories.partitions import PartitionsRepository
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.v1 import tables
+from health_log.services.partition_maintenance import maintain_table_partitions
+from tests.integration.conftest import requires_db
+
+# Far from any other test data so the default partition holds only these rows.
+_MONTH = datetime(2031, 5, 1)
+
+
+def _rows(user_id: int, start: datetime, n: int) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "sourceName": "Partition Watch",
+            "unit": "count/min",
+            "value": "60",
+            "value_num": 60.0,
+            "creationDate": start + timedelta(hours=i),
+            "startDate": start + timedelta(hours=i),
+            "endDate": start + timedelta(hours=i, minutes=1),
+        }
+        for i in range(n)
+    ]
+
+
+async def _row_partitions(db_conn, user_id: int) -> dict[str, int]:
+    rows = await db_conn.execute(
+        text(
+            "SELECT tableoid::regclass::text, count(*) FROM heart_rate "
+            "WHERE user_id = :uid AND \"sourceName\" = 'Partition Watch' GROUP BY 1"
+        ).bindparams(uid=user_id)
+    )
+    return dict(rows.all())
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_rows_move_from_default_into_new_month_partition(db_conn, test_user_id):
+    records = RecordsRepository(db_conn)
+    assert await records.upsert_rows(tables.heart_rate, _rows(test_user_id, _MONTH, 5)) == 5
+    assert await _row_partitions(db_conn, test_user_id) == {"heart_rate_default": 5}
+
+    assert await PartitionsRepository(db_conn).create_month_partition("heart_rate", _MONTH)
+    assert await _row_partitions(db_conn, test_user_id) == {"heart_rate_p2031_05": 5}
+    assert not await PartitionsRepository(db_conn).create_month_partition("heart_rate", _MONTH)
+
+    # ON CONFLICT still deduplicates through the partitioned parent.
+    assert await records.upsert_rows(tables.heart_rate, _rows(test_user_id, _MONTH, 6)) == 1
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_maintenance_creates_ahead_and_detaches_old(db_conn, test_user_id):
+    old_rows = [{**row, "unit": "count"} for row in _rows(test_user_id, _MONTH - timedelta(days=60), 2)]
+    await RecordsRepository(db_conn).upsert_rows(tables.step_count, old_rows)
+
+    changes = await maintain_table_partitions(
+        db_conn, "step_count", now=_MONTH, months_ahead=2, retention_months=1
+    )
+
+    assert changes["created"][0] == "step_count_p2031_03"
+    assert {"step_count_p2031_05", "step_count_p2031_06", "step_count_p2031_07"} <= set(changes["created"])
+    assert "step_count_p2031_03" in changes["detached"]
+    names = [partition.name for partition in await PartitionsRepository(db_conn).list_partitions("step_count")]
+    assert "step_count_p2031_03" not in names
+    assert "step_count_p2031_07" in names
+    detached_rows = (await db_conn.execute(text("SELECT count(*) FROM step_count_p2031_03"))).scalar_one()
+    assert detached_rows == 2
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_analysis_query_prunes_to_window_partitions(db_conn, test_user_id):
+    repo = PartitionsRepository(db_conn)
+    await repo.ensure_partitions("heart_rate", _MONTH - timedelta(days=90), _MONTH + timedelta(days=31))
+
+    analyzer = HealthRiskAnalyzer(db_conn, test_user_id)
+    query = analyzer._rows_query(tables.heart_rate, _MONTH + timedelta(days=3), _MONTH + timedelta(days=10))
+    sql = str(query.compile(dialect=db_conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan = (await db_conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar_one()[0]["Plan"]
+
+    def relations(node: dict) -> set[str]:
+        found = {node["Relation Name"]} if "Relation Name" in node else set()
+        for child in node.get("Plans", []):
+            found |= relations(child)
+        return found
+
+    # The default partition can hold any month, so it is never pruned.
+    assert relations(plan) <= {"heart_rate_p2031_05", "heart_rate_default"}
+    assert "heart_rate_p2031_05" in relations(plan)
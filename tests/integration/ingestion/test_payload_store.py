@@ -0,0 +1,94 @@
+"""Integration tests for health_uploads payloads kept in the payload store."""
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select, text
+
+from health_log.repositories.repository import IngestionRepository
+from health_log.repositories.v1 import tables
+from tests.integration.conftest import requires_db
+
+
+async def _create(repo: IngestionRepository, user_id: int, payload: str) -> int:
+    upload_id, _ = await repo.create_upload(
+        user_id=user_id,
+        provider="apple_health",
+        data_format="xml",
+        filename="export.xml",
+        raw_payload=payload,
+    )
+    return upload_id
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_create_upload_keeps_only_reference(db_conn, test_user_id, payload_store_dir):
+    repo = IngestionRepository(db_conn)
+    payload = "<HealthData>" + "<Record type='x'/>" * 1000 + "</HealthData>"
+    upload_id = await _create(repo, test_user_id, payload)
+
+    row = (
+        await db_conn.execute(select(tables.health_uploads).where(tables.health_uploads.c.id == upload_id))
+    ).one()
+    assert row.raw_payload is None
+    assert row.payload_size == len(payload)
+    assert row.payload_stored_size < row.payload_size
+    assert (payload_store_dir / row.payload_ref).is_file()
+
+    upload = await repo.get_upload(upload_id)
+    with await repo.open_payload(upload) as f:
+        assert f.read().decode("utf-8") == payload
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_move_payloads_to_store(db_conn, test_user_id):
+    repo = IngestionRepository(db_conn)
+    upload_id = await _create(repo, test_user_id, "legacy payload")
+    # Simulate a row written before the payload store existed.
+    await db_conn.execute(
+        text(
+            "UPDATE health_uploads SET raw_payload = 'legacy payload', payload_ref = NULL WHERE id = :id"
+        ).bindparams(id=upload_id)
+    )
+    upload = await repo.get_upload(upload_id)
+    with await repo.open_payload(upload) as f:
+        assert f.read() == b"legacy payload"
+
+    while await repo.move_payloads_to_store(batch_size=10):
+        pass
+
+    upload = await repo.get_upload(upload_id)
+    assert upload["payload_ref"] is not None
+    with await repo.open_payload(upload) as f:
+        assert f.read() == b"legacy payload"
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_duplicate_file_is_recognized_by_digest(db_conn, test_user_id, payload_store_dir, tmp_path):
+    export = tmp_path / "export.xml"
+    export.write_text("<HealthData>" + "<Record type='y'/>" * 1000 + "</HealthData>", encoding="utf-8")
+    repo = IngestionRepository(db_conn)
+
+    upload_id, is_new = await repo.create_upload_from_file(
+        user_id=test_user_id, provider="apple_health", data_format="xml", path=export
+    )
+    assert is_new
+    blobs = [p for p in payload_store_dir.rglob("*") if p.is_file()]
+
+    again_id, is_new = await repo.create_upload_from_file(
+        user_id=test_user_id, provider="apple_health", data_format="xml", path=export
+    )
+    assert (again_id, is_new) == (upload_id, False)
+    assert [p for p in payload_store_dir.rglob("*") if p.is_file()] == blobs
+
+    # The same body sent as text hashes to the same digest.
+    text_id, is_new = await repo.create_upload(
+        user_id=test_user_id,
+        provider="apple_health",
+        data_format="xml",
+        filename="export.xml",
+        raw_payload=export.read_text(encoding="utf-8"),
+    )
+    assert (text_id, is_new) == (upload_id, False)
@@ -0,0 +1,111 @@
+"""Integration tests for daily_metric_rollups maintenance and the illness rollup path."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from health_log.analysis.detectors import assess_illness_onset_risk
+from health_log.analysis.engine import HealthRiskAnalyzer
+from health_log.analysis.models import TimeWindow
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.v1 import tables
+from health_log.services.record_routing import refresh_derived_tables
+from tests.integration.conftest import requires_db
+
+pytestmark = [pytest.mark.asyncio, requires_db]
+
+_DAY = datetime(2031, 5, 10)
+
+
+def _rows(user_id: int, timestamps: list[datetime], values: list[float]) -> list[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "sourceName": "Rollup Watch",
+            "creationDate": ts,
+            "startDate": ts,
+            "endDate": ts + timedelta(minutes=1),
+            "value": str(value),
+            "value_num": value,
+        }
+        for ts, value in zip(timestamps, values, strict=True)
+    ]
+
+
+def _sleep(user_id: int, start: datetime, end: datetime) -> dict:
+    return {"user_id": user_id, "sourceName": "Rollup Watch", "creationDate": end, "startDate": start, "endDate": end}
+
+
+async def _write(db_conn, user_id: int, table, rows: list[dict]) -> None:
+    repo = RecordsRepository(db_conn)
+    await repo.upsert_rows(table, rows)
+    await refresh_derived_tables(db_conn, repo, user_id=user_id)
+
+
+async def test_ingested_days_are_rolled_up_and_refreshed(db_conn, test_user_id):
+    rollups = DailyRollupsRepository(db_conn)
+    hours = [_DAY + timedelta(hours=h) for h in range(10)]
+    await _write(db_conn, test_user_id, tables.heart_rate, _rows(test_user_id, hours, [60.0 + h for h in range(10)]))
+    await _write(db_conn, test_user_id, tables.heart_rate, _rows(test_user_id, [_DAY + timedelta(days=1)], [90.0]))
+
+    first, second = await rollups.get_rollups(test_user_id, "heart_rate", _DAY.date(), _DAY.date() + timedelta(days=1))
+    assert (first.day, first.count, first.minimum, first.maximum, first.median) == (_DAY.date(), 10, 60.0, 69.0, 64.5)
+    assert first.sleep_median is None
+    assert (second.count, second.total) == (1, 90.0)
+
+    # Sleep arriving later refreshes the heart-rate days it covers.
+    await _write(db_conn, test_user_id, tables.sleep_analysis, [_sleep(test_user_id, _DAY, _DAY + timedelta(hours=3))])
+    (first,) = await rollups.get_rollups(test_user_id, "heart_rate", _DAY.date(), _DAY.date())
+    assert first.sleep_median == 61.5
+
+    # A refreshed day without samples loses its rollup.
+    await db_conn.execute(delete(tables.heart_rate).where(tables.heart_rate.c.value_num == 90.0))
+    await rollups.refresh_days(test_user_id, {"heart_rate": [_DAY.date() + timedelta(days=1)]})
+    assert len(await rollups.get_rollups(test_user_id, "heart_rate", _DAY.date(), date(2031, 12, 31))) == 1
+
+
+@pytest.mark.parametrize("backfilled", [True, False], ids=["rollups", "no-rollups-yet"])
+async def test_analyzer_illness_from_rollups_matches_raw_samples(db_conn, test_user_id, backfilled):
+    now = datetime(2031, 7, 1)
+    timestamps, heart, hrv, resp, sleep = [], [], [], [], []
+    for day_idx in range(70):
+        day = now - timedelta(days=70 - day_idx)
+        sleep.append((day + timedelta(hours=1), day + timedelta(hours=6)))
+        elevated = day_idx >= 67
+        for m in range(24):
+            timestamps.append(day + timedelta(minutes=30 * m))
+            heart.append((72 if elevated else 62) + m % 5)
+            hrv.append((40 if elevated else 58) - m % 3)
+            resp.append((15 if elevated else 13) + (m % 2) * 0.2)
+
+    await _write(db_conn, test_user_id, tables.sleep_analysis, [_sleep(test_user_id, s, e) for s, e in sleep])
+    for table, values in (
+        (tables.heart_rate, heart),
+        (tables.heart_rate_variability, hrv),
+        (tables.respiratory_rate, resp),
+    ):
+        await _write(db_conn, test_user_id, table, _rows(test_user_id, timestamps, values))
+    if not backfilled:
+        # Data stored before daily_metric_rollups existed: the analyzer builds the missing days from raw rows.
+        rollups = tables.daily_metric_rollups
+        await db_conn.execute(delete(rollups).where(rollups.c.user_id == test_user_id))
+
+    result = await HealthRiskAnalyzer(db_conn, test_user_id).analyze_window(TimeWindow.WEEK, now=now)
+    from_rollups = next(a for a in result["assessments"] if a.condition == "illness_onset_risk")
+    from_raw = assess_illness_onset_risk(
+        list(zip(timestamps, heart, strict=True)),
+        list(zip(timestamps, hrv, strict=True)),
+        respiratory_rows=list(zip(timestamps, resp, strict=True)),
+        sleep_rows=sleep,
+        window=TimeWindow.WEEK,
+    )
+
+    assert from_rollups.severity in {"medium", "high"}
+    assert (from_rollups.score, from_rollups.confidence, from_rollups.summary) == (
+        from_raw.score,
+        from_raw.confidence,
+        from_raw.summary,
+    )
@@ -0,0 +1,127 @@
+"""Integration tests for downsampling aged samples into metric_sample_aggregates."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.rollups import DailyRollupsRepository
+from health_log.repositories.v1 import tables
+from health_log.services.sample_retention import compact_user_day
+from tests.integration.conftest import requires_db
+
+pytestmark = [pytest.mark.asyncio, requires_db]
+
+_DAY = datetime(2019, 3, 4)
+_CUTOFF = datetime(2019, 6, 1)
+
+
+def _samples(user_id: int, minutes: range, value=lambda minute: 60.0 + minute % 10) -> list[dict]:
+    rows = []
+    for minute in minutes:
+        ts = _DAY + timedelta(minutes=minute)
+        rows.append(
+            {
+                "user_id": user_id,
+                "sourceName": "Retention Watch",
+                "creationDate": ts,
+                "startDate": ts,
+                "endDate": ts,
+                "value": str(value(minute)),
+                "value_num": value(minute),
+            }
+        )
+    return rows
+
+
+async def _aggregates(db_conn, user_id: int, metric: str) -> list[tuple]:
+    aggregates = tables.metric_sample_aggregates
+    rows = await db_conn.execute(
+        select(
+            aggregates.c.bucket_start,
+            aggregates.c.sample_count,
+            aggregates.c.value_min,
+            aggregates.c.value_max,
+            aggregates.c.value_sum,
+        )
+        .where(aggregates.c.user_id == user_id, aggregates.c.metric == metric)
+        .order_by(aggregates.c.bucket_start)
+    )
+    return rows.all()
+
+
+async def _raw_count(db_conn, table, user_id: int) -> int:
+    return (await db_conn.execute(select(func.count()).where(table.c.user_id == user_id))).scalar_one()
+
+
+async def test_compaction_replaces_day_with_buckets_and_keeps_rollup(db_conn, test_user_id):
+    rows = _samples(test_user_id, range(10))
+    rows.append({**_samples(test_user_id, range(12, 13))[0], "value": "n/a", "value_num": None})
+    await RecordsRepository(db_conn).upsert_rows(tables.heart_rate, rows)
+
+    result = await compact_user_day(db_conn, tables.heart_rate, test_user_id, _DAY, cutoff=_CUTOFF, bucket_minutes=5)
+
+    assert result.deleted_rows == 11
+    assert result.reclaimed_bytes > 0
+    assert await _raw_count(db_conn, tables.heart_rate, test_user_id) == 0
+    assert await _aggregates(db_conn, test_user_id, "heart_rate") == [
+        (_DAY, 5, 60.0, 64.0, 310.0),
+        (_DAY + timedelta(minutes=5), 5, 65.0, 69.0, 335.0),
+    ]
+
+    # The rollup built before compaction survives later refreshes of the day.
+    rollups = DailyRollupsRepository(db_conn)
+    await rollups.refresh_days(test_user_id, {"heart_rate": [_DAY.date()]})
+    (rollup,) = await rollups.get_rollups(test_user_id, "heart_rate", _DAY.date(), _DAY.date())
+    assert (rollup.count, rollup.total) == (10, 645.0)
+
+
+async def test_late_samples_merge_into_existing_buckets(db_conn, test_user_id):
+    await RecordsRepository(db_conn).upsert_rows(tables.respiratory_rate, _samples(test_user_id, range(3)))
+    await compact_user_day(db_conn, tables.respiratory_rate, test_user_id, _DAY, cutoff=_CUTOFF, bucket_minutes=5)
+    await RecordsRepository(db_conn).upsert_rows(
+        tables.respiratory_rate, _samples(test_user_id, range(3, 4), value=lambda minute: 80.0)
+    )
+    await compact_user_day(db_conn, tables.respiratory_rate, test_user_id, _DAY, cutoff=_CUTOFF, bucket_minutes=5)
+
+    assert await _aggregates(db_conn, test_user_id, "respiratory_rate") == [(_DAY, 4, 60.0, 80.0, 263.0)]
+    # The day's rollup absorbs the late sample too; its median stays from the first compaction.
+    (rollup,) = await DailyRollupsRepository(db_conn).get_rollups(test_user_id, "respiratory_rate", _DAY.date(), _DAY.date())
+    assert (rollup.count, rollup.total, rollup.minimum, rollup.maximum, rollup.median) == (4, 263.0, 60.0, 80.0, 61.0)
+
+
+async def test_compacting_hrv_drops_its_instantaneous_bpm(db_conn, test_user_id):
+    await RecordsRepository(db_conn).upsert_rows(tables.heart_rate_variability, _samples(test_user_id, range(2)))
+    hrv_ids = (
+        await db_conn.execute(
+            select(tables.heart_rate_variability.c.id).where(tables.heart_rate_variability.c.user_id == test_user_id)
+        )
+    ).scalars().all()
+    await db_conn.execute(
+        insert(tables.instantaneous_bpm),
+        [{"hr_variability_id": hrv_id, "bpm": 70, "time": "10:00:00.00 AM"} for hrv_id in hrv_ids],
+    )
+
+    await compact_user_day(db_conn, tables.heart_rate_variability, test_user_id, _DAY, cutoff=_CUTOFF, bucket_minutes=1)
+
+    remaining_bpm = await db_conn.execute(
+        select(func.count()).where(tables.instantaneous_bpm.c.hr_variability_id.in_(hrv_ids))
+    )
+    assert remaining_bpm.scalar_one() == 0
+    assert len(await _aggregates(db_conn, test_user_id, "heart_rate_variability")) == 2
+
+
+async def test_late_samples_for_an_uncompacted_older_day_build_its_rollup(db_conn, test_user_id):
+    later_day = [{**row, "startDate": row["startDate"] + timedelta(days=1)} for row in _samples(test_user_id, range(2))]
+    await RecordsRepository(db_conn).upsert_rows(tables.heart_rate, later_day)
+    await compact_user_day(
+        db_conn, tables.heart_rate, test_user_id, _DAY + timedelta(days=1), cutoff=_CUTOFF, bucket_minutes=5
+    )
+    await RecordsRepository(db_conn).upsert_rows(tables.heart_rate, _samples(test_user_id, range(3)))
+
+    await compact_user_day(db_conn, tables.heart_rate, test_user_id, _DAY, cutoff=_CUTOFF, bucket_minutes=5)
+
+    (rollup,) = await DailyRollupsRepository(db_conn).get_rollups(test_user_id, "heart_rate", _DAY.date(), _DAY.date())
+    assert (rollup.count, rollup.total, rollup.median) == (3, 183.0, 61.0)
@@ -0,0 +1,66 @@
+"""Integration tests for sleep_sessions maintenance on ingestion."""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.sleep_sessions import SleepSessionsRepository
+from health_log.repositories.v1 import tables
+from health_log.services.record_routing import refresh_derived_tables
+from tests.integration.conftest import requires_db
+
+pytestmark = [pytest.mark.asyncio, requires_db]
+
+_NIGHT = datetime(2031, 6, 1, 23)
+
+
+def _sleep(user_id: int, start: datetime, end: datetime) -> dict:
+    return {"user_id": user_id, "sourceName": "Session Watch", "creationDate": end, "startDate": start, "endDate": end}
+
+
+async def _write(db_conn, user_id: int, segments: list[tuple[datetime, datetime]]) -> None:
+    repo = RecordsRepository(db_conn)
+    await repo.upsert_rows(tables.sleep_analysis, [_sleep(user_id, start, end) for start, end in segments])
+    await refresh_derived_tables(db_conn, repo, user_id=user_id)
+
+
+async def _stored(db_conn, user_id: int) -> list[tuple]:
+    table = tables.sleep_sessions
+    rows = await db_conn.execute(
+        select(table.c.startDate, table.c.endDate, table.c.total_hours, table.c.wake_date)
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.startDate)
+    )
+    return [tuple(row) for row in rows]
+
+
+async def test_segments_are_merged_into_sessions(db_conn, test_user_id):
+    second_night = _NIGHT + timedelta(days=1)
+    await _write(
+        db_conn,
+        test_user_id,
+        [
+            (_NIGHT, _NIGHT + timedelta(hours=3)),
+            (_NIGHT + timedelta(hours=2), _NIGHT + timedelta(hours=8)),
+            (second_night, second_night + timedelta(hours=7)),
+        ],
+    )
+
+    assert await _stored(db_conn, test_user_id) == [
+        (_NIGHT, _NIGHT + timedelta(hours=8), 8.0, date(2031, 6, 2)),
+        (second_night, second_night + timedelta(hours=7), 7.0, date(2031, 6, 3)),
+    ]
+
+    # A late segment bridging both nights joins them into one session.
+    await _write(db_conn, test_user_id, [(_NIGHT + timedelta(hours=8), second_night)])
+    assert await _stored(db_conn, test_user_id) == [
+        (_NIGHT, second_night + timedelta(hours=7), 31.0, date(2031, 6, 3)),
+    ]
+
+    sessions = await SleepSessionsRepository(db_conn).get_sessions(
+        test_user_id, second_night, second_night + timedelta(hours=1)
+    )
+    assert list(sessions) == [(_NIGHT, second_night + timedelta(hours=7))]
@@ -0,0 +1,120 @@
+"""Integration tests for value_num on quantity tables."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from health_log.analysis.engine import HealthRiskAnalyzer
+from health_log.analysis.models import TimeWindow
+from health_log.repositories.repository import RecordsRepository, numeric_value
+from health_log.repositories.v1 import tables
+from health_log.services.ingestion import ingest_content
+from health_log.utils import parse_value_text
+from tests.integration.conftest import requires_db
+
+_VALUES = ["61", " 72,5 ", "1e2", "-.5", "n/a", "", "nan", "inf", "1_000", "\t5", "1e999", "1e-400", "0e999"]
+_EXPECTED = [61.0, 72.5, 100.0, -0.5, None, None, None, None, None, None, None, None, 0.0]
+
+
+async def _insert_legacy_rows(db_conn, user_id: int) -> list[int]:
+    base = datetime(2020, 1, 1)
+    ids = []
+    for i, value in enumerate(_VALUES):
+        row_id = (
+            await db_conn.execute(
+                insert(tables.body_mass)
+                .values(
+                    user_id=user_id,
+                    sourceName="Legacy Scale",
+                    value=value,
+                    creationDate=base,
+                    startDate=base + timedelta(minutes=i),
+                    endDate=base + timedelta(minutes=i),
+                )
+                .returning(tables.body_mass.c.id)
+            )
+        ).scalar_one()
+        ids.append(row_id)
+    return ids
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_backfill_value_num_matches_parse_value_text(db_conn, test_user_id):
+    ids = await _insert_legacy_rows(db_conn, test_user_id)
+    repo = RecordsRepository(db_conn)
+
+    after_id = ids[0] - 1
+    while after_id < ids[-1]:
+        await repo.backfill_value_num(tables.body_mass, after_id=after_id, batch_size=2)
+        after_id += 2
+
+    rows = (
+        await db_conn.execute(
+            select(tables.body_mass.c.value_num).where(tables.body_mass.c.id.in_(ids)).order_by(tables.body_mass.c.id)
+        )
+    ).scalars().all()
+    assert rows == _EXPECTED == [parse_value_text(v) for v in _VALUES]
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_numeric_value_falls_back_before_backfill(db_conn, test_user_id):
+    ids = await _insert_legacy_rows(db_conn, test_user_id)
+
+    values = (
+        await db_conn.execute(
+            select(numeric_value(tables.body_mass))
+            .where(tables.body_mass.c.id.in_(ids))
+            .order_by(tables.body_mass.c.id)
+        )
+    ).scalars().all()
+    assert values == _EXPECTED
+
+
+_HEART_RATE_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<HealthData locale="ru_RU">
+{records}
+</HealthData>"""
+
+_HEART_RATE_RECORD = """  <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Apple Watch" unit="count/min"
+          creationDate="{ts}" startDate="{ts}" endDate="{ts}" value="{value}"/>"""
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_out_of_range_values_are_ingested_and_analyzed(db_conn, test_user_id):
+    now = datetime(2032, 2, 10)
+    values = ["1e999", "1e-400", "-1e999", "62", "64"]
+    records = [
+        _HEART_RATE_RECORD.format(ts=(now - timedelta(days=1, minutes=i)).strftime("%Y-%m-%d %H:%M:%S"), value=value)
+        for i, value in enumerate(values)
+    ]
+    await ingest_content(
+        db_conn,
+        user_id=test_user_id,
+        provider="apple_health",
+        data_format="xml",
+        filename="export.xml",
+        content=_HEART_RATE_XML.format(records="\n".join(records)),
+    )
+
+    stored = (
+        await db_conn.execute(
+            select(tables.heart_rate.c.value, tables.heart_rate.c.value_num, numeric_value(tables.heart_rate))
+            .where(tables.heart_rate.c.user_id == test_user_id)
+            .order_by(tables.heart_rate.c.startDate.desc())
+        )
+    ).all()
+    assert [tuple(row) for row in stored] == [
+        ("1e999", None, None),
+        ("1e-400", None, None),
+        ("-1e999", None, None),
+        ("62", 62.0, 62.0),
+        ("64", 64.0, 64.0),
+    ]
+
+    result = await HealthRiskAnalyzer(db_conn, test_user_id).analyze_window(TimeWindow.WEEK, now=now)
+    assert "assessments" in result
@@ -0,0 +1,95 @@
+"""Integration tests for ingestion watermarks on repeat exports."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from health_log.repositories.repository import IngestionRepository
+from health_log.services.ingestion import ingest_content
+from tests.integration.conftest import requires_db
+
+FIXTURE_PATH = Path("tests/fixtures/apple_health_extended_types.xml")
+
+_NEW_RECORD = """
+  <Record type="HKQuantityTypeIdentifierOxygenSaturation"
+          sourceName="Apple Watch"
+          unit="%"
+          creationDate="2026-03-05 22:00:00"
+          startDate="2026-03-05 22:00:00"
+          endDate="2026-03-05 22:00:30"
+          value="96"/>
+</HealthData>"""
+
+
+_SYNC_RECORD = {
+    "type": "HKQuantityTypeIdentifierOxygenSaturation",
+    "sourceName": "Apple Watch",
+    "sourceVersion": "",
+    "unit": "%",
+    "creationDate": "2026-03-05 22:00:00",
+    "startDate": "2026-03-05 22:00:00",
+    "endDate": "2026-03-05 22:00:30",
+    "value": "96",
+    "metadata": {},
+    "instantaneous_bpm": None,
+}
+
+
+async def _ingest(db_conn, user_id: int, content: str, *, data_format: str = "xml", **kwargs):
+    return await ingest_content(
+        db_conn,
+        user_id=user_id,
+        provider="apple_health",
+        data_format=data_format,
+        filename=f"export.{data_format}",
+        content=content,
+        **kwargs,
+    )
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_repeat_export_only_writes_new_records(db_conn, test_user_id):
+    content = FIXTURE_PATH.read_text(encoding="utf-8")
+    first = await _ingest(db_conn, test_user_id, content)
+    assert first.raw_records_count > 0
+    assert first.skipped_records_count == 0
+
+    watermarks = await IngestionRepository(db_conn).get_watermarks(test_user_id)
+    assert watermarks
+
+    repeat = await _ingest(db_conn, test_user_id, content.replace("</HealthData>", _NEW_RECORD))
+    assert repeat.is_new_upload is True
+    assert repeat.raw_records_count == 1
+    assert repeat.normalized_counts["HKQuantityTypeIdentifierOxygenSaturation"] == 1
+    assert repeat.skipped_records_count == first.raw_records_count
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_full_reingest_ignores_watermarks(db_conn, test_user_id):
+    content = FIXTURE_PATH.read_text(encoding="utf-8")
+    await _ingest(db_conn, test_user_id, content)
+
+    result = await _ingest(db_conn, test_user_id, content + "\n", full_reingest=True)
+
+    assert result.skipped_records_count == 0
+    # ON CONFLICT still deduplicates what the watermark would have skipped.
+    assert result.raw_records_count == 0
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_sync_deltas_do_not_hide_older_history_from_a_full_export(db_conn, test_user_id):
+    # The app synced a newer sample first; the export's older samples were never stored.
+    payload = json.dumps({"sync_from": "a", "sync_to": "b", "records": [_SYNC_RECORD]})
+    synced = await _ingest(db_conn, test_user_id, payload, data_format="json")
+    assert synced.raw_records_count == 1
+    assert await IngestionRepository(db_conn).get_watermarks(test_user_id) == {}
+
+    export = await _ingest(db_conn, test_user_id, FIXTURE_PATH.read_text(encoding="utf-8"))
+
+    assert export.skipped_records_count == 0
+    assert export.normalized_counts["HKQuantityTypeIdentifierOxygenSaturation"] == 1
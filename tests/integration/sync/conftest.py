@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from health_log.app import create_app
+from health_log.dependencies import (
+    db_connect,
+    db_transaction_factory,
+    get_current_user,
+    get_current_user_detached,
+)
+from health_log.repositories.auth import AuthUser
+
+
+@pytest.fixture
+def app(db_conn, test_user_id):
+    app = create_app()
+
+    async def _db():
+        yield db_conn
+
+    @asynccontextmanager
+    async def _begin():
+        yield db_conn
+
+    app.dependency_overrides[db_connect] = _db
+    app.dependency_overrides[db_transaction_factory] = lambda: _begin
+    app.dependency_overrides[get_current_user] = app.dependency_overrides[get_current_user_detached] = lambda: AuthUser(
+        id=test_user_id,
+        first_name="Test",
+        last_name="User",
+        sex="male",
+        email="test_integration@test.local",
+        phone="+70000000001",
+        password_hash="hash",
+        is_active=True,
+    )
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
@@ -0,0 +1,159 @@
+"""Integration tests for the ingestion job queue (health_log/repositories/ingestion_jobs.py)."""
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+
+from health_log.repositories.ingestion_jobs import MAX_ATTEMPTS, IngestionJobsRepository
+from health_log.repositories.repository import IngestionRepository
+from health_log.services.ingestion_jobs import run_job
+from health_log.utils import utcnow
+from tests.integration.conftest import requires_db
+
+
+def _payload(value: str = "60", sync_from: str = "a") -> str:
+    record = {
+        "type": "HKQuantityTypeIdentifierHeartRate",
+        "sourceName": "Apple Watch",
+        "sourceVersion": "",
+        "creationDate": "2024-01-01T12:00:00+03:00",
+        "startDate": "2024-01-01T12:00:00+03:00",
+        "endDate": "2024-01-01T12:00:01+03:00",
+        "value": value,
+        "unit": "count/min",
+        "metadata": {},
+        "instantaneous_bpm": None,
+    }
+    return json.dumps({"sync_from": sync_from, "sync_to": "b", "records": [record]})
+
+
+async def _drain_queue(db_conn) -> None:
+    # Isolate from jobs left in the shared test database; rolled back after the test.
+    await db_conn.execute(text("UPDATE ingestion_jobs SET status = 'done' WHERE status IN ('queued', 'running')"))
+
+
+async def _enqueue(db_conn, user_id: int, payload: str) -> int:
+    upload_id, _ = await IngestionRepository(db_conn).create_upload(
+        user_id=user_id,
+        provider="apple_health",
+        data_format="json",
+        filename="sync.json",
+        raw_payload=payload,
+    )
+    return await IngestionJobsRepository(db_conn).enqueue(user_id=user_id, upload_id=upload_id)
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_per_upload(db_conn, test_user_id):
+    first = await _enqueue(db_conn, test_user_id, _payload())
+    second = await _enqueue(db_conn, test_user_id, _payload())
+    assert first == second
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_claim_takes_each_job_once(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    job_a = await _enqueue(db_conn, test_user_id, _payload("60"))
+    job_b = await _enqueue(db_conn, test_user_id, _payload("61"))
+
+    claimed = [await repo.claim_next(), await repo.claim_next(), await repo.claim_next()]
+
+    assert [job.id for job in claimed[:2]] == [job_a, job_b]
+    assert claimed[2] is None
+    assert all(job.attempts == 1 for job in claimed[:2])
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_run_job_ingests_upload_and_reports_progress(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    job_id = await _enqueue(db_conn, test_user_id, _payload("62"))
+    job = await repo.claim_next()
+    assert job is not None and job.id == job_id
+
+    progress: list[int] = []
+
+    async def on_progress(records_processed: int) -> None:
+        progress.append(records_processed)
+
+    result = await run_job(db_conn, job, on_progress=on_progress)
+    await repo.mark_done(job.id, records_processed=result["records_processed"], result=result)
+
+    stored = await repo.get_job(job.id, user_id=test_user_id)
+    assert progress == [1]
+    assert stored["status"] == "done"
+    assert stored["records_processed"] == 1
+    assert stored["result"]["normalized_counts"]["HKQuantityTypeIdentifierHeartRate"] == 1
+    assert await repo.get_job(job.id, user_id=test_user_id + 1) is None
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_fully_deduplicated_job_still_reports_processed_records(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    for sync_from in ("a", "repeat"):
+        await _enqueue(db_conn, test_user_id, _payload("65", sync_from=sync_from))
+        job = await repo.claim_next()
+        result = await run_job(db_conn, job)
+        await repo.mark_done(job.id, records_processed=result["records_processed"], result=result)
+
+    stored = await repo.get_job(job.id, user_id=test_user_id)
+    assert stored["records_processed"] == 1
+    assert stored["result"]["raw_records"] == 0
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_marked_failed(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    job_id = await _enqueue(db_conn, test_user_id, _payload("63"))
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        job = await repo.claim_next()
+        assert job is not None and job.id == job_id and job.attempts == attempt
+        await repo.mark_failed(job.id, error="boom", retry=job.attempts < MAX_ATTEMPTS)
+
+    stored = await repo.get_job(job_id, user_id=test_user_id)
+    assert stored["status"] == "failed"
+    assert stored["error"] == "boom"
+    assert await repo.claim_next() is None
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_requeue_stale_running_job(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    job_id = await _enqueue(db_conn, test_user_id, _payload("64"))
+    await repo.claim_next()
+
+    assert await repo.requeue_stale(heartbeat_before=utcnow() - timedelta(minutes=5)) == 0
+    assert await repo.requeue_stale(heartbeat_before=utcnow() + timedelta(minutes=5)) == 1
+    stored = await repo.get_job(job_id, user_id=test_user_id)
+    assert stored["status"] == "queued"
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_running_job_from_going_stale(db_conn, test_user_id):
+    repo = IngestionJobsRepository(db_conn)
+    await _drain_queue(db_conn)
+    job_id = await _enqueue(db_conn, test_user_id, _payload("65"))
+    await repo.claim_next()
+    await db_conn.execute(
+        text("UPDATE ingestion_jobs SET heartbeat_at = now() - interval '1 hour' WHERE id = :id").bindparams(id=job_id)
+    )
+
+    await repo.heartbeat(job_id)
+
+    assert await repo.requeue_stale(heartbeat_before=utcnow() - timedelta(minutes=5)) == 0
+    assert (await repo.get_job(job_id, user_id=test_user_id))["status"] == "running"
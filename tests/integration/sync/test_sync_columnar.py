@@ -0,0 +1,117 @@
+"""Integration tests for the HLC1 columnar sync endpoint."""
+from __future__ import annotations
+
+from array import array
+
+import pytest
+from sqlalchemy import select
+
+from health_log.repositories import repository
+from health_log.repositories.v1 import tables
+from health_log.services.columnar_sync import ColumnarBlock, encode_columnar
+from tests.integration.conftest import requires_db
+
+_START_MS = 1_706_770_800_000
+
+
+def _payload(count: int, *, start_ms: int = _START_MS) -> bytes:
+    starts = array("q", (start_ms + 1000 * i for i in range(count)))
+    return encode_columnar(
+        [
+            ColumnarBlock(
+                record_type="HKQuantityTypeIdentifierHeartRate",
+                unit="count/min",
+                source_names=["Columnar Watch"] * count,
+                creation_ms=starts,
+                start_ms=starts,
+                end_ms=starts,
+                offset_minutes=array("h", [180]) * count,
+                values=array("d", (60 + i % 30 for i in range(count))),
+            )
+        ]
+    )
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_columnar_sync_writes_heart_rate(client, db_conn, test_user_id, monkeypatch):
+    monkeypatch.setattr("health_log.api.v1.sync.analyze_for_user", lambda user_id: None)
+    copy_tables = []
+    copy_upsert = repository.copy_upsert
+
+    async def spy_copy_upsert(connection, table, rows, conflict_columns):
+        copy_tables.append(table.name)
+        return await copy_upsert(connection, table, rows, conflict_columns)
+
+    monkeypatch.setattr(repository, "copy_upsert", spy_copy_upsert)
+    body = _payload(20_000)
+
+    response = await client.post(
+        "/api/v1/sync/columnar",
+        params={"sync_from": "a", "sync_to": "b"},
+        content=body,
+        headers={"Content-Type": "application/vnd.healthlog.columnar"},
+    )
+
+    assert response.status_code == 201, response.text
+    assert response.json()["synced_records"] == 20_000
+    assert copy_tables == ["heart_rate"]
+    first = (
+        await db_conn.execute(
+            select(tables.heart_rate.c.value, tables.heart_rate.c.startDate)
+            .where(tables.heart_rate.c.sourceName == "Columnar Watch")
+            .order_by(tables.heart_rate.c.startDate)
+            .limit(1)
+        )
+    ).one()
+    assert first.value == "60"
+    assert first.startDate.isoformat() == "2024-02-01T10:00:00"
+
+    again = await client.post("/api/v1/sync/columnar", params={"sync_from": "a", "sync_to": "b"}, content=body)
+    assert again.json()["synced_records"] == 0
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_columnar_sync_rejects_garbage(client):
+    response = await client.post("/api/v1/sync/columnar", params={"sync_from": "a", "sync_to": "b"}, content=b"{}")
+    assert response.status_code == 400
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_columnar_sync_rejects_out_of_range_timestamps(client, db_conn, test_user_id):
+    response = await client.post(
+        "/api/v1/sync/columnar",
+        params={"sync_from": "a", "sync_to": "b"},
+        content=_payload(3, start_ms=2**62),
+    )
+
+    assert response.status_code == 400
+    uploads = tables.health_uploads
+    assert (await db_conn.execute(select(uploads.c.id).where(uploads.c.user_id == test_user_id))).first() is None
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_columnar_sync_caps_chunked_bodies(client, monkeypatch):
+    monkeypatch.setattr("health_log.api.v1.sync._MAX_COLUMNAR_BYTES", 1024)
+
+    async def chunks():
+        for _ in range(8):
+            yield b"\0" * 256
+
+    response = await client.post("/api/v1/sync/columnar", params={"sync_from": "a", "sync_to": "b"}, content=chunks())
+    assert response.status_code == 413
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_columnar_sync_rejects_bad_content_length(client):
+    response = await client.post(
+        "/api/v1/sync/columnar",
+        params={"sync_from": "a", "sync_to": "b"},
+        content=b"{}",
+        headers={"Content-Length": "lots"},
+    )
+    assert response.status_code == 400
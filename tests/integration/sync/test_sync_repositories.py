@@ -73,6 +73,34 @@ async def test_get_latest_returns_most_recent(db_conn, test_user_id):
     assert latest["risks"] == new_risks
 
 
+
+@requires_db
+@pytest.mark.asyncio
+async def test_save_reports_batch_keeps_order_for_shared_analyzed_at(db_conn, test_user_id):
+    repo = AnalysisReportsRepository(db_conn)
+    analyzed_at = datetime(2024, 1, 2, 5, 0, 0)
+
+    ids = await repo.save_reports(
+        user_id=test_user_id,
+        reports=[
+            {
+                "analyzed_at": analyzed_at,
+                "period_from": datetime(2024, 1, 1, 22, 0, 0),
+                "period_to": analyzed_at,
+                "window": window,
+                "risks": [],
+            }
+            for window in ("night", "week", "month")
+        ],
+    )
+    assert ids == sorted(ids)
+    assert len(ids) == 3
+
+    latest = await repo.get_latest_report(test_user_id)
+    assert latest["window"] == "month"
+    items, _ = await repo.get_history(test_user_id)
+    assert [item["window"] for item in items] == ["month", "week", "night"]
+
 @requires_db
 @pytest.mark.asyncio
 async def test_get_latest_returns_none_when_no_reports(db_conn, test_user_id):
@@ -0,0 +1,101 @@
+"""Integration tests for the NDJSON streaming sync endpoint."""
+from __future__ import annotations
+
+import gzip
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from sqlalchemy import func, select
+
+from health_log.dependencies import db_transaction_factory
+from health_log.repositories.v1 import tables
+from tests.integration.conftest import requires_db
+
+
+def _line(i: int) -> bytes:
+    return json.dumps(
+        {
+            "type": "HKQuantityTypeIdentifierHeartRate",
+            "sourceName": "Apple Watch",
+            "creationDate": f"2024-02-01 10:{i // 60:02d}:{i % 60:02d} +0300",
+            "startDate": f"2024-02-01 10:{i // 60:02d}:{i % 60:02d} +0300",
+            "endDate": f"2024-02-01 10:{i // 60:02d}:{i % 60:02d} +0300",
+            "value": str(60 + i % 40),
+            "unit": "count/min",
+        }
+    ).encode() + b"\n"
+
+
+async def _heart_rate_count(db_conn, user_id: int) -> int:
+    return (
+        await db_conn.execute(
+            select(func.count()).select_from(tables.heart_rate).where(tables.heart_rate.c.user_id == user_id)
+        )
+    ).scalar_one()
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_stream_sync_gzip_ndjson(client, db_conn, test_user_id, monkeypatch):
+    monkeypatch.setattr("health_log.api.v1.sync.analyze_for_user", lambda user_id: None)
+    before = await _heart_rate_count(db_conn, test_user_id)
+    body = gzip.compress(b"".join(_line(i) for i in range(3600)))
+
+    response = await client.post(
+        "/api/v1/sync/stream",
+        params={"sync_from": "2024-02-01T10:00:00", "sync_to": "2024-02-01T11:00:00"},
+        content=body,
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 201, response.text
+    assert response.json()["synced_records"] == 3600
+    assert await _heart_rate_count(db_conn, test_user_id) == before + 3600
+
+    again = await client.post(
+        "/api/v1/sync/stream",
+        params={"sync_from": "2024-02-01T10:00:00", "sync_to": "2024-02-01T11:00:00"},
+        content=body,
+        headers={"Content-Encoding": "gzip"},
+    )
+    assert again.json()["synced_records"] == 0
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_stream_sync_rejects_invalid_line(client):
+    body = _line(0) + b'{"type": "HKQuantityTypeIdentifierHeartRate"}\n'
+
+    response = await client.post(
+        "/api/v1/sync/stream",
+        params={"sync_from": "a", "sync_to": "b"},
+        content=body,
+    )
+
+    assert response.status_code == 400
+    assert "Строка 2" in response.text
+
+
+@requires_db
+@pytest.mark.asyncio
+async def test_stream_sync_opens_transaction_after_the_body(app, client, db_conn, monkeypatch):
+    monkeypatch.setattr("health_log.api.v1.sync.analyze_for_user", lambda user_id: None)
+    events = []
+
+    @asynccontextmanager
+    async def begin():
+        events.append("begin")
+        yield db_conn
+
+    async def body():
+        for i in range(3):
+            events.append(f"line {i}")
+            yield _line(i)
+
+    app.dependency_overrides[db_transaction_factory] = lambda: begin
+
+    response = await client.post("/api/v1/sync/stream", params={"sync_from": "c", "sync_to": "d"}, content=body())
+
+    assert response.status_code == 201, response.text
+    assert events == ["line 0", "line 1", "line 2", "begin"]
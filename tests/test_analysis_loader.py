@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from health_log.analysis.loader import RowsView, TableRows, load_tables
+
+_T0 = datetime(2026, 3, 1)
+
+
+def _rows(n: int) -> list[tuple[datetime, float]]:
+    return [(_T0 + timedelta(hours=i), float(i)) for i in range(n)]
+
+
+def test_table_rows_between_matches_inclusive_range_query():
+    rows = _rows(10)
+    table_rows = TableRows(rows)
+
+    view = table_rows.between(_T0 + timedelta(hours=2), _T0 + timedelta(hours=5))
+    assert list(view) == rows[2:6]
+    assert len(view) == 4 and view[0] == rows[2] and view[-1] == rows[5]
+    assert list(view[1:3]) == rows[3:5] and isinstance(view[1:3], RowsView)
+    assert view[::2] == [rows[2], rows[4]]
+
+    assert list(table_rows.between(_T0 + timedelta(minutes=30), _T0 + timedelta(minutes=90))) == rows[1:2]
+    assert not table_rows.between(_T0 + timedelta(days=1), _T0 + timedelta(days=2))
+
+
+def test_load_tables_fetches_each_table_once():
+    calls: list[tuple[str, datetime, datetime]] = []
+
+    async def fetch(table: str, start: datetime, end: datetime):
+        calls.append((table, start, end))
+        return [row for row in _rows(48) if start <= row[0] <= end]
+
+    end = _T0 + timedelta(hours=47)
+    data = asyncio.run(load_tables(fetch, {"heart_rate": _T0, "step_count": _T0 + timedelta(hours=24)}, end))
+
+    assert calls == [("heart_rate", _T0, end), ("step_count", _T0 + timedelta(hours=24), end)]
+    assert len(data["heart_rate"].between(_T0 + timedelta(hours=40), end)) == 8
@@ -0,0 +1,128 @@
+from array import array
+from datetime import datetime
+
+import pytest
+
+from health_log.repositories.v1.tables import TYPE_TABLE_MAP, heart_rate, sleep_analysis
+from health_log.services.apple_health_parser import ParsedRecord
+from health_log.services.columnar_sync import (
+    ColumnarBlock,
+    ColumnarFormatError,
+    decode_columnar,
+    encode_columnar,
+    ensure_known_types,
+    format_value,
+)
+from health_log.services.record_routing import route_records
+
+HEART_RATE = "HKQuantityTypeIdentifierHeartRate"
+SLEEP = "HKCategoryTypeIdentifierSleepAnalysis"
+# 2024-02-01 07:00:00 UTC
+_START_MS = 1_706_770_800_000
+
+
+def _heart_rate_block() -> ColumnarBlock:
+    starts = array("q", [_START_MS, _START_MS + 1000, _START_MS + 2500])
+    return ColumnarBlock(
+        record_type=HEART_RATE,
+        unit="count/min",
+        source_names=["Apple Watch", "Apple Watch", "Polar"],
+        creation_ms=starts,
+        start_ms=starts,
+        end_ms=starts,
+        offset_minutes=array("h", [180, 180, 0]),
+        values=array("d", [61.0, 62.5, 70.0]),
+    )
+
+
+def _sleep_block() -> ColumnarBlock:
+    return ColumnarBlock(
+        record_type=SLEEP,
+        unit=None,
+        source_names=["Apple Watch"],
+        creation_ms=array("q", [_START_MS]),
+        start_ms=array("q", [_START_MS]),
+        end_ms=array("q", [_START_MS + 3_600_000]),
+        offset_minutes=array("h", [180]),
+        values=["HKCategoryValueSleepAnalysisAsleepCore"],
+    )
+
+
+def test_roundtrip():
+    blocks = decode_columnar(encode_columnar([_heart_rate_block(), _sleep_block()]))
+
+    assert [b.record_type for b in blocks] == [HEART_RATE, SLEEP]
+    assert blocks[0].source_names == ["Apple Watch", "Apple Watch", "Polar"]
+    assert list(blocks[0].values) == [61.0, 62.5, 70.0]
+    assert blocks[1].unit is None
+    assert blocks[1].values == ["HKCategoryValueSleepAnalysisAsleepCore"]
+
+
+def _hr_record(stamp: str, value: str) -> ParsedRecord:
+    return ParsedRecord(
+        attrs={
+            "type": HEART_RATE,
+            "sourceName": "Apple Watch",
+            "unit": "count/min",
+            "value": value,
+            "creationDate": stamp,
+            "startDate": stamp,
+            "endDate": stamp,
+        }
+    )
+
+
+def test_rows_match_text_path():
+    records = [_hr_record("2024-02-01 10:00:00 +0300", "61"), _hr_record("2024-02-01 10:00:01 +0300", "62.5")]
+    expected = route_records(records, user_id=3).rows_by_type[HEART_RATE]
+    (block,) = decode_columnar(encode_columnar([_heart_rate_block()]))
+
+    assert block.to_rows([c.name for c in heart_rate.columns], user_id=3)[:2] == expected
+
+
+def test_offsets_give_local_wall_time():
+    (block,) = decode_columnar(encode_columnar([_sleep_block()]))
+    (row,) = block.to_rows([c.name for c in sleep_analysis.columns], user_id=1)
+
+    assert row["startDate"] == datetime(2024, 2, 1, 10, 0)
+    assert row["endDate"] == datetime(2024, 2, 1, 11, 0)
+    assert "unit" not in row
+
+
+@pytest.mark.parametrize(("value", "text"), [(61.0, "61"), (62.5, "62.5"), (0.1, "0.1"), (-3.0, "-3")])
+def test_format_value(value, text):
+    assert format_value(value) == text
+
+
+def test_rejects_bad_magic_and_truncation():
+    payload = encode_columnar([_heart_rate_block()])
+    with pytest.raises(ColumnarFormatError, match="HLC1"):
+        decode_columnar(b"JSON" + payload[4:])
+    with pytest.raises(ColumnarFormatError):
+        decode_columnar(payload[:-3])
+    with pytest.raises(ColumnarFormatError, match="Лишние"):
+        decode_columnar(payload + b"\0")
+
+
+def test_rejects_unknown_types():
+    block = _heart_rate_block()
+    block.record_type = "HKQuantityTypeIdentifierUnknown"
+    assert block.record_type not in TYPE_TABLE_MAP
+    with pytest.raises(ColumnarFormatError, match="Unknown"):
+        ensure_known_types([block])
+
+
+@pytest.mark.parametrize(
+    ("column", "value"),
+    [
+        ("start_ms", 2**62),
+        ("end_ms", -(2**62)),
+        ("creation_ms", 300_000_000_000_000),
+        ("offset_minutes", 32_000),
+    ],
+)
+def test_rejects_timestamps_out_of_range(column, value):
+    block = _heart_rate_block()
+    setattr(block, column, array(getattr(block, column).typecode, [value] * len(block)))
+    with pytest.raises(ColumnarFormatError, match="диапазон"):
+        decode_columnar(encode_columnar([block]))
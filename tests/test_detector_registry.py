@@ -0,0 +1,96 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from health_log.analysis.context import CYCLE_LOOKBACK, EXTENDED_LOOKBACK, TEMPERATURE_LOOKBACK
+from health_log.analysis.detectors import assess_vo2max_decline_risk
+from health_log.analysis.detectors.registry import DETECTORS
+from health_log.analysis.models import TimeWindow
+from health_log.analysis.registry import Detector, Rollups, Rows, Sleep, plan_data
+from health_log.analysis.rollups import build_daily_rollups
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import to_points
+from health_log.analysis.windows import resolve_window_range
+from health_log.repositories.v1 import tables
+
+_NOW = datetime(2026, 3, 15, 12, 0, 0)
+
+
+def test_detector_conditions_are_unique() -> None:
+    conditions = [detector.condition for detector in DETECTORS]
+    assert len(conditions) == len(set(conditions))
+
+
+def test_plan_reads_each_table_from_its_widest_start() -> None:
+    windows = (TimeWindow.NIGHT, TimeWindow.WEEK, TimeWindow.MONTH)
+    plan = plan_data(DETECTORS, windows, now=_NOW, sex="male")
+
+    month_start = resolve_window_range(TimeWindow.MONTH, _NOW)[0]
+    assert plan.end == _NOW
+    assert plan.tables[tables.blood_pressure_systolic] == month_start
+    assert plan.tables[tables.heart_rate] == _NOW - EXTENDED_LOOKBACK
+    assert plan.tables[tables.apple_sleeping_wrist_temperature] == _NOW - TEMPERATURE_LOOKBACK
+    assert tables.menstrual_flow not in plan.tables
+    assert set(plan.rollups) == {tables.heart_rate, tables.heart_rate_variability, tables.respiratory_rate}
+
+
+def test_plan_adds_cycle_tables_for_female_users() -> None:
+    plan = plan_data(DETECTORS, (TimeWindow.WEEK,), now=_NOW, sex="female")
+
+    assert plan.tables[tables.menstrual_flow] == _NOW - CYCLE_LOOKBACK
+    assert plan.tables[tables.apple_sleeping_wrist_temperature] == _NOW - CYCLE_LOOKBACK
+    assert plan.tables[tables.blood_pressure_systolic] == resolve_window_range(TimeWindow.WEEK, _NOW)[0]
+
+
+def test_plan_skips_detectors_that_do_not_apply() -> None:
+    detector = Detector(
+        "vo2max_decline_risk",
+        assess_vo2max_decline_risk,
+        {"vo2max_rows": Rows(tables.vo_2_max)},
+        windows=frozenset({TimeWindow.MONTH}),
+    )
+
+    assert plan_data([detector], (TimeWindow.NIGHT,), now=_NOW, sex="male").tables == {}
+    plan = plan_data([detector], (TimeWindow.NIGHT, TimeWindow.MONTH), now=_NOW, sex="male")
+    assert plan.tables == {tables.vo_2_max: resolve_window_range(TimeWindow.MONTH, _NOW)[0]}
+    assert plan.sleep is None
+
+
+def test_window_independence_follows_the_inputs() -> None:
+    by_condition = {detector.condition: detector for detector in DETECTORS}
+
+    assert by_condition["fall_risk"].window_independent
+    assert not by_condition["tachycardia_risk"].window_independent
+    # Rollup inputs only, but the detector itself answers differently for NIGHT.
+    assert not by_condition["illness_onset_risk"].window_independent
+
+
+def test_required_inputs_must_be_declared() -> None:
+    with pytest.raises(ValueError):
+        Detector("vo2max_decline_risk", assess_vo2max_decline_risk, {"vo2max_rows": Rows(tables.vo_2_max)}, required=("x",))
+
+
+def _sample_inputs() -> dict[type, object]:
+    rows = [(_NOW - timedelta(hours=3 * i), 60.0 + i % 7) for i in range(24 * 30)][::-1]
+    sleep = SleepIntervals(
+        (_NOW - timedelta(days=day, hours=10), _NOW - timedelta(days=day, hours=2)) for day in range(60)
+    )
+    return {Rows: rows, Sleep: sleep, Rollups: list(build_daily_rollups(to_points(rows), sleep).values())}
+
+
+@pytest.mark.parametrize("detector", DETECTORS, ids=lambda detector: detector.condition)
+def test_empty_required_input_gives_the_insufficient_data_result(detector: Detector) -> None:
+    # Skipping is only sound if the detector could not have used the other inputs anyway.
+    sample = _sample_inputs()
+    for window in TimeWindow:
+        for name in detector.required:
+            data = {input_name: sample[type(spec)] for input_name, spec in detector.inputs.items()}
+            data[name] = detector.inputs[name].empty
+            skipped = detector.run(data, window=window, now=_NOW, sex="female")
+
+            full = {**data, "window": window}
+            full.update({key: value for key, value in (("now", _NOW), ("sex", "female")) if key in detector._context_params})
+            computed = detector.assess(**full)
+
+            assert replace(skipped, created_at=_NOW) == replace(computed, created_at=_NOW)
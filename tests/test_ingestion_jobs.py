@@ -0,0 +1,75 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from health_log.repositories.ingestion_jobs import ClaimedJob
+from health_log.services import ingestion_jobs
+
+_JOB = ClaimedJob(id=7, user_id=3, upload_id=11, attempts=1)
+
+
+class _Jobs:
+    calls: list[tuple] = []
+
+    def __init__(self, conn) -> None:
+        pass
+
+    async def heartbeat(self, job_id):
+        self.calls.append(("heartbeat", job_id))
+
+    async def update_progress(self, job_id, *, records_processed):
+        self.calls.append(("progress", job_id))
+
+    async def mark_done(self, job_id, *, records_processed, result):
+        self.calls.append(("done", job_id))
+
+
+class _Engine:
+    @asynccontextmanager
+    async def begin(self):
+        yield object()
+
+
+def _patch(monkeypatch, *, run_seconds: float, analysis: asyncio.Event):
+    _Jobs.calls = []
+
+    async def run_job(conn, job, *, on_progress=None):
+        await asyncio.sleep(run_seconds)
+        return {"records_processed": 1, "duration_seconds": run_seconds}
+
+    async def analyze_for_user(user_id):
+        await analysis.wait()
+        _Jobs.calls.append(("analysis", user_id))
+
+    monkeypatch.setattr(ingestion_jobs, "engine", _Engine())
+    monkeypatch.setattr(ingestion_jobs, "IngestionJobsRepository", _Jobs)
+    monkeypatch.setattr(ingestion_jobs, "run_job", run_job)
+    monkeypatch.setattr(ingestion_jobs, "analyze_for_user", analyze_for_user)
+    monkeypatch.setattr(ingestion_jobs.settings, "ingest_job_stale_seconds", 1)
+    monkeypatch.setattr(ingestion_jobs, "HEARTBEATS_PER_STALE_PERIOD", 50)
+
+
+def test_heartbeats_continue_through_a_slow_chunk(monkeypatch):
+    async def scenario():
+        analysis = asyncio.Event()
+        _patch(monkeypatch, run_seconds=0.1, analysis=analysis)
+        await ingestion_jobs.process_job(_JOB)
+        heartbeats = _Jobs.calls.count(("heartbeat", _JOB.id))
+        await asyncio.sleep(0.05)
+        assert _Jobs.calls.count(("heartbeat", _JOB.id)) == heartbeats
+        analysis.set()
+        return heartbeats
+
+    assert asyncio.run(scenario()) >= 3
+
+
+def test_job_is_done_before_analysis_finishes(monkeypatch):
+    async def scenario():
+        analysis = asyncio.Event()
+        _patch(monkeypatch, run_seconds=0, analysis=analysis)
+        await ingestion_jobs.process_job(_JOB)
+        assert _Jobs.calls == [("done", _JOB.id)]
+        analysis.set()
+        await asyncio.gather(*ingestion_jobs._analysis_tasks)
+        assert _Jobs.calls == [("done", _JOB.id), ("analysis", _JOB.user_id)]
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import gzip
+
+import pytest
+
+from health_log.services.ndjson_stream import MAX_NDJSON_LINE_BYTES, NdjsonError, iter_ndjson_lines
+
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+async def _collect(data: bytes, size: int = 7, **kwargs) -> list[tuple[int, bytes]]:
+    return [item async for item in iter_ndjson_lines(_chunks(data, size), **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_lines_split_across_chunks():
+    data = b'{"a": 1}\n\n{"a": 2}\r\n{"a": 3}'
+    lines = await _collect(data)
+    assert [n for n, _ in lines] == [1, 3, 4]
+    assert [line.strip() for _, line in lines] == [b'{"a": 1}', b'{"a": 2}', b'{"a": 3}']
+
+
+@pytest.mark.asyncio
+async def test_gzip_body_is_inflated_incrementally():
+    data = b"".join(b'{"i": %d}\n' % i for i in range(10_000))
+    lines = await _collect(gzip.compress(data), size=512, gzipped=True)
+    assert len(lines) == 10_000
+    assert lines[-1] == (10_000, b'{"i": 9999}')
+
+
+@pytest.mark.asyncio
+async def test_truncated_gzip_is_rejected():
+    with pytest.raises(NdjsonError, match="gzip"):
+        await _collect(gzip.compress(b'{"a": 1}\n' * 100)[:-10], gzipped=True)
+
+
+@pytest.mark.asyncio
+async def test_overlong_line_is_rejected_without_buffering_it():
+    data = b'{"a": 1}\n' + b"x" * (MAX_NDJSON_LINE_BYTES + 10)
+    with pytest.raises(NdjsonError, match="Строка 2"):
+        await _collect(data, size=64 * 1024)
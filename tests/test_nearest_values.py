@@ -0,0 +1,42 @@
+import random
+from datetime import datetime, timedelta
+
+from health_log.analysis.utils import EventPoint, nearest_value, nearest_values
+
+_T0 = datetime(2026, 3, 1, 23, 0, 0)
+
+
+def _points(*offsets: int) -> list[EventPoint]:
+    return [EventPoint(_T0 + timedelta(seconds=s), float(i)) for i, s in enumerate(offsets)]
+
+
+def test_picks_the_closest_point_within_tolerance() -> None:
+    points = _points(0, 100, 400)
+    targets = [_T0 + timedelta(seconds=s) for s in (90, 260, 530, 520, -120, -121)]
+
+    assert nearest_values(points, targets, max_seconds=120) == [1.0, None, None, 2.0, 0.0, None]
+
+
+def test_ties_go_to_the_earlier_point_like_nearest_value() -> None:
+    points = _points(0, 60, 60, 120)
+    targets = [_T0 + timedelta(seconds=s) for s in (30, 60, 90)]
+
+    assert nearest_values(points, targets, max_seconds=120) == [0.0, 1.0, 1.0]
+    assert nearest_values(points, targets, max_seconds=120) == [
+        nearest_value(points, target, max_seconds=120) for target in targets
+    ]
+
+
+def test_empty_inputs() -> None:
+    assert nearest_values([], [_T0, _T0], max_seconds=120) == [None, None]
+    assert nearest_values(_points(0), [], max_seconds=120) == []
+
+
+def test_matches_nearest_value_for_unsorted_targets() -> None:
+    rng = random.Random(7)
+    points = sorted(_points(*(rng.randrange(0, 6 * 3600, 30) for _ in range(400))), key=lambda p: p.timestamp)
+    targets = [_T0 + timedelta(seconds=rng.randrange(-600, 6 * 3600 + 600, 15)) for _ in range(500)]
+
+    assert nearest_values(points, targets, max_seconds=120) == [
+        nearest_value(points, target, max_seconds=120) for target in targets
+    ]
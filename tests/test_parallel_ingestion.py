@@ -0,0 +1,100 @@
+import asyncio
+import time
+from pathlib import Path
+
+from health_log.services import parallel_ingestion
+from health_log.services.apple_health_parser import AppleHealthXmlParser
+from health_log.services.parallel_ingestion import (
+    iter_normalized_chunks,
+    normalize_chunk,
+    split_export,
+)
+from health_log.services.record_routing import normalize_records
+
+_EXPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE HealthData [
+<!ELEMENT HealthData (ExportDate,Record*,Correlation*)>
+<!ATTLIST Record type CDATA #REQUIRED>
+]>
+<HealthData locale="ru_RU">
+ <ExportDate value="2025-10-13 09:00:00 +0300"/>
+{records}
+ <Correlation type="HKCorrelationTypeIdentifierBloodPressure" startDate="2025-10-12 08:00:00 +0300">
+  <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" sourceName="Cuff" startDate="2025-10-12 08:00:00 +0300" endDate="2025-10-12 08:00:00 +0300" value="121"/>
+  <Record type="HKQuantityTypeIdentifierBloodPressureDiastolic" sourceName="Cuff" startDate="2025-10-12 08:00:00 +0300" endDate="2025-10-12 08:00:00 +0300" value="79"/>
+ </Correlation>
+{records}
+</HealthData>
+"""
+
+
+def _write_export(path: Path, count: int = 60) -> None:
+    records = "\n".join(
+        f' <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Apple Watch" unit="count/min" '
+        f'creationDate="2025-10-12 01:{i % 60:02d}:00 +0300" startDate="2025-10-12 01:{i % 60:02d}:00 +0300" '
+        f'endDate="2025-10-12 01:{i % 60:02d}:00 +0300" value="{60 + i}"/>'
+        for i in range(count)
+    )
+    path.write_text(_EXPORT.format(records=records), encoding="utf-8")
+
+
+def test_split_export_chunks_parse_to_the_same_records(tmp_path):
+    export = tmp_path / "export.xml"
+    _write_export(export)
+    expected = AppleHealthXmlParser.parse_xml_file(str(export))
+
+    spans = split_export(str(export), chunk_bytes=700)
+    assert len(spans) > 5
+
+    kwargs = {"upload_id": 1, "user_id": 2, "provider": "apple_health", "data_format": "xml"}
+    chunks = [normalize_chunk(str(export), start, end, **kwargs) for start, end in spans]
+    serial = normalize_records(expected, **kwargs)
+
+    assert sum(c.record_count for c in chunks) == len(expected)
+    assert [row for c in chunks for row in c.raw_rows] == serial.raw_rows
+    for record_type, rows in serial.routed.rows_by_type.items():
+        assert [row for c in chunks for row in c.routed.rows_by_type.get(record_type, [])] == rows
+
+
+def test_split_export_never_cuts_inside_correlation(tmp_path):
+    export = tmp_path / "export.xml"
+    _write_export(export, count=3)
+    data = export.read_bytes()
+
+    for chunk_bytes in range(50, len(data), 37):
+        for start, _ in split_export(str(export), chunk_bytes)[1:]:
+            before = data[:start]
+            assert before.count(b"<Correlation ") == before.count(b"</Correlation>")
+
+
+def _slow_after_first_chunk(file_path, start, end, **kwargs):
+    # Runs in a worker process; only the chunk right after the XML header is fast.
+    if start > 1000:
+        time.sleep(2)
+    return normalize_chunk(file_path, start, end, **kwargs)
+
+
+def test_stopping_early_does_not_wait_for_running_chunks(tmp_path, monkeypatch):
+    export = tmp_path / "export.xml"
+    _write_export(export)
+    monkeypatch.setattr(parallel_ingestion, "normalize_chunk", _slow_after_first_chunk)
+
+    async def take_first():
+        chunks = iter_normalized_chunks(
+            str(export),
+            upload_id=1,
+            user_id=2,
+            provider="apple_health",
+            data_format="xml",
+            workers=2,
+            chunk_bytes=700,
+        )
+        first = await anext(chunks)
+        started = time.perf_counter()
+        await chunks.aclose()
+        return first, time.perf_counter() - started
+
+    first, close_seconds = asyncio.run(take_first())
+
+    assert first.record_count > 0
+    assert close_seconds < 1
@@ -1,6 +1,10 @@
 from pathlib import Path
 
-from health_log.services.apple_health_parser import AppleHealthXmlParser, parse_datetime
+from health_log.services.apple_health_parser import (
+    AppleHealthXmlParser,
+    TimestampParser,
+    parse_datetime,
+)
 
 
 def test_parse_xml_extracts_nested_hrv_bpm():
@@ -23,3 +27,109 @@ def test_parse_datetime_handles_timezone_and_nbsp():
     dt_nbsp = parse_datetime("2025-10-12 13:22:39\u00A0+0300")
     assert dt_nbsp is not None
     assert dt_nbsp.minute == 22
+
+
+def test_iter_record_batches_matches_full_parse():
+    fixture = Path("tests/fixtures/apple_health_small.xml")
+    expected = AppleHealthXmlParser.parse_xml_content(fixture.read_text(encoding="utf-8"))
+
+    with fixture.open("rb") as f:
+        batches = list(AppleHealthXmlParser.iter_record_batches(f, batch_size=3))
+
+    assert [len(b) for b in batches] == [3, 1]
+    assert [r for batch in batches for r in batch] == expected
+
+
+def test_iter_records_skips_records_nested_in_correlation(tmp_path):
+    xml_path = tmp_path / "export.xml"
+    xml_path.write_text(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        "<HealthData>\n"
+        '  <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" value="120" />\n'
+        '  <Correlation type="HKCorrelationTypeIdentifierBloodPressure">\n'
+        '    <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" value="120" />\n'
+        "  </Correlation>\n"
+        "</HealthData>\n",
+        encoding="utf-8",
+    )
+
+    records = list(AppleHealthXmlParser.iter_records(str(xml_path)))
+
+    assert len(records) == 1
+    assert records[0].attrs["value"] == "120"
+
+
+def _write_export(path: Path, count: int) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<HealthData>\n')
+        for i in range(count):
+            f.write(
+                '  <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Apple Watch" '
+                f'unit="count/min" startDate="2025-10-12 01:00:00 +0300" value="{60 + i % 40}" />\n'
+            )
+        f.write("</HealthData>\n")
+
+
+def test_iter_record_batches_peak_memory_does_not_grow_with_file_size(tmp_path):
+    import tracemalloc
+
+    def peak_for(count: int) -> int:
+        path = tmp_path / f"export_{count}.xml"
+        _write_export(path, count)
+        tracemalloc.start()
+        total = sum(len(b) for b in AppleHealthXmlParser.iter_record_batches(str(path), batch_size=500))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert total == count
+        return peak
+
+    small = peak_for(5_000)
+    large = peak_for(40_000)
+
+    assert large < small * 2
+
+
+_TIMESTAMP_CASES = [
+    "2025-10-12 13:22:39 +0300",
+    "2025-10-12 13:22:39 -0000",
+    "2025-10-12 13:22:39 +03:00",
+    "2025-10-12 13:22:39 Z",
+    "2025-10-12 13:22:39",
+    "2024-01-01T12:00:00+03:00",
+    "2024-01-01T12:00:00+0530",
+    "2024-01-01T12:00:00Z",
+    "2024-01-01T12:00:00",
+    "2025-10-12 13:22:39\u00A0+0300",
+    "2025-10-12  13:22:39 +0300",
+    " 2025-10-12 13:22:39 +0300 ",
+    "2025-10-12t13:22:39",
+    "2025-10-12 13:22:39+0300",
+    "2025-1-2 3:4:5",
+    "2025-10-12 13:22:39 +2500",
+    "2025-10-12 13:22:39 +0360",
+    "2025-10-12 24:22:39 +0300",
+    "2025-02-30 13:22:39 +0300",
+    "2025-10-12 13:22:60 +0300",
+    "0000-10-12 13:22:39 +0300",
+    "garbage",
+    "",
+    None,
+]
+
+
+def test_timestamp_parser_matches_parse_datetime_for_any_detected_layout():
+    for first in _TIMESTAMP_CASES:
+        parser = TimestampParser()
+        parser(first)
+        for value in _TIMESTAMP_CASES:
+            assert parser(value) == parse_datetime(value), (first, value)
+
+
+def test_timestamp_parser_reuses_cached_values():
+    parser = TimestampParser(cache_size=2)
+    first = parser("2025-10-12 13:22:39 +0300")
+
+    assert parser("2025-10-12 13:22:39 +0300") is first
+    parser("2025-10-12 13:22:40 +0300")
+    parser("2025-10-12 13:22:41 +0300")
+    assert parser("2025-10-12 13:22:39 +0300") == first
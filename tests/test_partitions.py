@@ -0,0 +1,29 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from health_log.repositories.partitions import add_months, month_start, partition_name
+from health_log.settings import Settings
+
+
+def test_month_arithmetic_crosses_year_boundaries():
+    assert month_start(datetime(2025, 12, 31, 23, 59)) == datetime(2025, 12, 1)
+    assert add_months(datetime(2025, 12, 1), 1) == datetime(2026, 1, 1)
+    assert add_months(datetime(2025, 1, 1), -1) == datetime(2024, 12, 1)
+    assert add_months(datetime(2025, 3, 1), -15) == datetime(2023, 12, 1)
+
+
+def test_partition_name():
+    assert partition_name("heart_rate", datetime(2026, 3, 1)) == "heart_rate_p2026_03"
+
+
+@pytest.mark.parametrize("months", [0, 7, 24])
+def test_partition_retention_months_accepts_disabled_or_long_enough(months):
+    assert Settings(partition_retention_months=months).partition_retention_months == months
+
+
+@pytest.mark.parametrize("months", [1, 6])
+def test_partition_retention_months_rejects_months_analysis_still_reads(months):
+    with pytest.raises(ValidationError):
+        Settings(partition_retention_months=months)
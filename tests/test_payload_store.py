@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import gzip
+import json
+from hashlib import sha256
+
+import pytest
+
+from health_log.repositories.payload_store import (
+    LocalPayloadStore,
+    iter_file_chunks,
+    iter_json_chunks,
+    iter_text_chunks,
+    upload_digest,
+    upload_hasher,
+)
+
+
+def _digest(data: bytes) -> str:
+    return sha256(data).hexdigest()
+
+
+def test_put_and_open_roundtrip(tmp_path):
+    store = LocalPayloadStore(tmp_path)
+    data = b"<HealthData>" + b"<Record/>" * 10_000 + b"</HealthData>"
+
+    stored = store.put(_digest(data), [data[:100], data[100:]])
+
+    assert store.exists(stored.ref)
+    assert stored.size == len(data)
+    assert stored.stored_size < stored.size
+    assert stored.compression_ratio > 10
+    with store.open(stored.ref) as f:
+        assert f.read() == data
+
+
+def test_put_is_content_addressed(tmp_path):
+    store = LocalPayloadStore(tmp_path)
+    data = b"payload"
+    first = store.put(_digest(data), [data])
+    second = store.put(_digest(data), [data])
+
+    assert first == second
+    assert first.ref.startswith(f"{_digest(data)[:2]}/{_digest(data)[2:4]}/")
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [f"{_digest(data)}.gz"]
+
+
+def test_open_streams_lazily(tmp_path):
+    store = LocalPayloadStore(tmp_path)
+    data = b"x" * 1_000_000
+    stored = store.put(_digest(data), [data])
+
+    with store.open(stored.ref) as f:
+        assert isinstance(f, gzip.GzipFile)
+        assert f.read(10) == b"x" * 10
+
+
+def test_failed_put_leaves_no_partial_blob(tmp_path):
+    store = LocalPayloadStore(tmp_path)
+
+    def chunks():
+        yield b"abc"
+        raise RuntimeError("connection reset")
+
+    with pytest.raises(RuntimeError):
+        store.put(_digest(b"abc"), chunks())
+
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_unknown_compression_rejected(tmp_path):
+    with pytest.raises(ValueError, match="сжатие"):
+        LocalPayloadStore(tmp_path, compression="lz4")
+
+
+def test_upload_digest_matches_legacy_formula():
+    payload = "<HealthData>пульс ❤️</HealthData>" * 1000
+    legacy = sha256(f"7:apple_health:xml:{payload}".encode()).hexdigest()
+
+    assert upload_digest(7, "apple_health", "xml", iter_text_chunks(payload, chunk_size=333)) == legacy
+
+
+def test_iter_file_chunks_digest_matches_text(tmp_path):
+    payload = "<HealthData>данные</HealthData>" * 1000
+    path = tmp_path / "export.xml"
+    path.write_bytes(payload.encode("utf-8"))
+
+    assert upload_digest(1, "apple_health", "xml", iter_file_chunks(path, chunk_size=1000)) == upload_digest(
+        1, "apple_health", "xml", iter_text_chunks(payload)
+    )
+
+
+def test_put_hashed_stores_under_the_upload_digest_in_one_pass(tmp_path):
+    store = LocalPayloadStore(tmp_path)
+    payload = "<HealthData>пульс</HealthData>" * 1000
+    reads = []
+
+    def chunks():
+        for chunk in iter_text_chunks(payload, chunk_size=500):
+            reads.append(len(chunk))
+            yield chunk
+
+    hasher = upload_hasher(7, "apple_health", "xml")
+    stored = store.put_hashed(chunks(), hasher)
+
+    digest = upload_digest(7, "apple_health", "xml", iter_text_chunks(payload))
+    assert hasher.hexdigest() == digest
+    assert stored == store.put(digest, iter_text_chunks(payload))
+    assert sum(reads) == stored.size == len(payload.encode("utf-8"))
+    with store.open(stored.ref) as f:
+        assert f.read().decode("utf-8") == payload
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [f"{digest}.gz"]
+
+
+def test_iter_json_chunks_match_json_dumps():
+    value = {"sync_from": "a", "records": [{"value": f"{i}", "sourceName": "Часы ⌚"} for i in range(500)]}
+    chunks = list(iter_json_chunks(value, chunk_size=1000, ensure_ascii=False))
+
+    assert len(chunks) > 5
+    assert b"".join(chunks) == json.dumps(value, ensure_ascii=False).encode("utf-8")
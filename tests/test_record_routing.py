@@ -0,0 +1,55 @@
+from pathlib import Path
+
+from health_log.repositories.repository import RecordsRepository
+from health_log.repositories.v1.tables import TYPE_TABLE_MAP
+from health_log.services.apple_health_parser import AppleHealthXmlParser, ParsedRecord
+from health_log.services.record_routing import HRV_RECORD_TYPE, route_records
+
+
+def _fixture_records() -> list[ParsedRecord]:
+    fixture = Path("tests/fixtures/apple_health_extended_types.xml")
+    return AppleHealthXmlParser.parse_xml_content(fixture.read_text(encoding="utf-8"))
+
+
+def test_route_records_matches_per_type_conversion():
+    records = _fixture_records()
+    routed = route_records(records, user_id=7)
+
+    for record_type, table in TYPE_TABLE_MAP.items():
+        matching = [r for r in records if r.record_type == record_type]
+        expected = [RecordsRepository._record_to_table_values(r, table, user_id=7) for r in matching]
+        assert routed.rows_by_type.get(record_type, []) == expected
+
+
+def test_route_records_separates_hrv_and_drops_unknown_types():
+    records = [
+        ParsedRecord(attrs={"type": HRV_RECORD_TYPE, "sourceName": "Watch"}),
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierUnknown", "sourceName": "Watch"}),
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierHeartRate", "sourceName": "Watch", "value": "61"}),
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierHeartRate", "sourceName": "Watch", "value": "62"}),
+    ]
+
+    routed = route_records(records, user_id=1)
+
+    assert routed.hrv_records == [records[0]]
+    assert list(routed.rows_by_type) == ["HKQuantityTypeIdentifierHeartRate"]
+    assert [row["value"] for row in routed.rows_by_type["HKQuantityTypeIdentifierHeartRate"]] == ["61", "62"]
+    assert routed.stats["HKQuantityTypeIdentifierHeartRate"].records == 2
+    assert routed.stats[HRV_RECORD_TYPE].records == 1
+    assert "HKQuantityTypeIdentifierUnknown" not in routed.stats
+
+
+def test_route_records_fills_value_num():
+    records = [
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierHeartRate", "sourceName": "Watch", "value": "61"}),
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierBodyMass", "sourceName": "Scale", "value": " 72,5 "}),
+        ParsedRecord(attrs={"type": "HKQuantityTypeIdentifierStepCount", "sourceName": "Phone", "value": "n/a"}),
+        ParsedRecord(attrs={"type": "HKCategoryTypeIdentifierLowHeartRateEvent", "sourceName": "Watch", "value": "x"}),
+    ]
+
+    routed = route_records(records, user_id=1).rows_by_type
+
+    assert routed["HKQuantityTypeIdentifierHeartRate"][0]["value_num"] == 61.0
+    assert routed["HKQuantityTypeIdentifierBodyMass"][0]["value_num"] == 72.5
+    assert routed["HKQuantityTypeIdentifierStepCount"][0]["value_num"] is None
+    assert "value_num" not in routed["HKCategoryTypeIdentifierLowHeartRateEvent"][0]
@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+from health_log.analysis.detectors.illness.features import (
+    build_trend_snapshot,
+    build_trend_snapshot_from_rollups,
+)
+from health_log.analysis.rollups import build_daily_rollups, touched_days
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import EventPoint
+from health_log.repositories.rollups import _batches, day_runs
+
+_METRICS = {"heart_rate", "heart_rate_variability", "step_count"}
+
+
+def test_build_daily_rollups_aggregates_each_day():
+    points = [EventPoint(datetime(2026, 3, 1, hour), float(value)) for hour, value in enumerate(range(60, 70))]
+    points.append(EventPoint(datetime(2026, 3, 2, 9), 80.0))
+
+    rollups = build_daily_rollups(points)
+
+    first = rollups[date(2026, 3, 1)]
+    assert (first.count, first.minimum, first.maximum, first.median) == (10, 60.0, 69.0, 64.5)
+    assert first.mean == 64.5
+    assert first.bottom20_median == 60.5
+    assert first.sleep_median is None
+    assert rollups[date(2026, 3, 2)].count == 1
+
+
+def test_build_daily_rollups_sleep_median_uses_samples_inside_sleep():
+    sleep = SleepIntervals([(datetime(2026, 3, 1, 0), datetime(2026, 3, 1, 3)), (datetime(2026, 3, 1, 2), datetime(2026, 3, 1, 5))])
+    points = [EventPoint(datetime(2026, 3, 1, hour), 50.0 + hour) for hour in range(8)]
+
+    rollup = build_daily_rollups(points, sleep)[date(2026, 3, 1)]
+
+    # Hours 0..5 fall inside the merged 00:00-05:00 interval (bounds inclusive).
+    assert rollup.sleep_median == 52.5
+    assert rollup.median == 53.5
+
+
+def test_touched_days_for_metric_and_sleep_rows():
+    heart_rows = [{"startDate": datetime(2026, 3, 1, 23, 50)}, {"startDate": datetime(2026, 3, 3, 1)}]
+    sleep_rows = [{"startDate": datetime(2026, 3, 1, 23), "endDate": datetime(2026, 3, 2, 7)}]
+
+    assert touched_days("heart_rate", heart_rows, _METRICS) == {"heart_rate": {date(2026, 3, 1), date(2026, 3, 3)}}
+    assert touched_days("sleep_analysis", sleep_rows, _METRICS) == {
+        "heart_rate": {date(2026, 3, 1), date(2026, 3, 2)},
+        "heart_rate_variability": {date(2026, 3, 1), date(2026, 3, 2)},
+    }
+    assert touched_days("menstrual_flow", heart_rows, _METRICS) == {}
+
+
+def test_day_runs_and_batches():
+    days = [date(2026, 3, 5), date(2026, 3, 1), date(2026, 3, 2), date(2026, 3, 3)]
+    runs = day_runs(days)
+    assert runs == [(date(2026, 3, 1), date(2026, 3, 3)), (date(2026, 3, 5), date(2026, 3, 5))]
+    assert list(_batches(runs, 2)) == [
+        [(date(2026, 3, 1), date(2026, 3, 2))],
+        [(date(2026, 3, 3), date(2026, 3, 3)), (date(2026, 3, 5), date(2026, 3, 5))],
+    ]
+
+
+def test_trend_snapshot_from_rollups_matches_raw_samples():
+    now = datetime(2026, 2, 26, 10)
+    heart, hrv, resp, sleep = [], [], [], []
+    for day_idx in range(70):
+        day = now - timedelta(days=69 - day_idx)
+        sleep.append((day.replace(hour=1), day.replace(hour=6)))
+        elevated = day_idx >= 67
+        for m in range(24):
+            ts = day.replace(hour=0) + timedelta(minutes=30 * m)
+            heart.append(EventPoint(ts, (72 if elevated else 62) + m % 5))
+            hrv.append(EventPoint(ts, (40 if elevated else 58) - m % 3))
+            resp.append(EventPoint(ts, (15 if elevated else 13) + (m % 2) * 0.2))
+
+    intervals = SleepIntervals(sleep)
+    from_rollups = build_trend_snapshot_from_rollups(
+        heart_days=build_daily_rollups(heart, intervals),
+        hrv_days=build_daily_rollups(hrv, intervals),
+        respiratory_days=build_daily_rollups(resp, intervals),
+        sleep_rows=sleep,
+    )
+
+    assert from_rollups is not None
+    assert from_rollups == build_trend_snapshot(heart, hrv, resp, sleep)
+    assert from_rollups.recent_rest_hr > from_rollups.baseline_rest_hr
+    assert from_rollups.total_hr_points == len(heart)
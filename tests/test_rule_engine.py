@@ -1,15 +1,19 @@
 import asyncio
+from dataclasses import replace
 from datetime import datetime, timedelta
 
 import health_log.api.v1.users as users_api
 from health_log.analysis.engine import HealthRiskAnalyzer
 from health_log.analysis.models import TimeWindow
+from health_log.analysis.rollups import build_daily_rollups
 from health_log.analysis.rules import (
     assess_illness_onset_risk,
     assess_sleep_apnea_risk,
     assess_tachycardia_risk,
     build_sleep_apnea_event_rows,
 )
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import to_points
 from health_log.repositories.auth import AuthUser, PublicUser
 from health_log.repositories.v1 import tables
 
@@ -302,31 +306,41 @@ def test_health_risk_analyzer_uses_extended_history_for_illness_onset():
     analyzer._user_sex = "female"
     call_ranges: list[tuple[str, datetime, datetime]] = []
 
+    series = {tables.heart_rate.name: heart, tables.heart_rate_variability.name: hrv, tables.respiratory_rate.name: resp}
+
     async def fake_fetch_rows(table, start: datetime, end: datetime):
         call_ranges.append((table.name, start, end))
-        if table.name == tables.heart_rate.name:
-            return heart
-        if table.name == tables.heart_rate_variability.name:
-            return hrv
-        if table.name == tables.respiratory_rate.name:
-            return resp
-        return []
+        return series.get(table.name, [])
+
+    async def fake_sleep_sessions(start: datetime, end: datetime):
+        call_ranges.append((tables.sleep_sessions.name, start, end))
+        return SleepIntervals(sleep)
+
+    rollup_ranges: list[tuple[str, datetime, datetime]] = []
 
-    async def fake_sleep_segments(start: datetime, end: datetime):
-        call_ranges.append((tables.sleep_analysis.name, start, end))
-        return sleep
+    async def fake_fetch_rollups(table, start: datetime, end: datetime):
+        rollup_ranges.append((table.name, start, end))
+        return list(build_daily_rollups(to_points(series[table.name]), SleepIntervals(sleep)).values())
 
     analyzer._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
-    analyzer._fetch_sleep_segments = fake_sleep_segments  # type: ignore[assignment]
+    analyzer._fetch_rollups = fake_fetch_rollups  # type: ignore[assignment]
+    analyzer._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
 
     result = asyncio.run(analyzer.analyze_window(TimeWindow.WEEK, now=now))
     illness = next(a for a in result["assessments"] if a.condition == "illness_onset_risk")
 
     min_required_start = now - timedelta(days=63)
     assert any(
-        name == tables.heart_rate.name and start <= min_required_start for name, start, _ in call_ranges
+        name == tables.heart_rate.name and start <= min_required_start for name, start, _ in rollup_ranges
     )
     assert illness.severity in {"medium", "high"}
+    # Each table is fetched once over its widest range.
+    fetched = [name for name, _, _ in call_ranges]
+    assert len(fetched) == len(set(fetched))
+
+
+async def _no_rollups(table, start: datetime, end: datetime):
+    return []
 
 
 def test_health_risk_analyzer_skips_menstrual_signal_for_male() -> None:
@@ -337,11 +351,12 @@ def test_health_risk_analyzer_skips_menstrual_signal_for_male() -> None:
     async def fake_fetch_rows(table, start: datetime, end: datetime):
         return []
 
-    async def fake_sleep_segments(start: datetime, end: datetime):
-        return []
+    async def fake_sleep_sessions(start: datetime, end: datetime):
+        return SleepIntervals()
 
     analyzer._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
-    analyzer._fetch_sleep_segments = fake_sleep_segments  # type: ignore[assignment]
+    analyzer._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
+    analyzer._fetch_rollups = _no_rollups  # type: ignore[assignment]
 
     result = asyncio.run(analyzer.analyze_window(TimeWindow.WEEK, now=now))
     conditions = {assessment.condition for assessment in result["assessments"]}
@@ -353,6 +368,47 @@ def test_health_risk_analyzer_skips_menstrual_signal_for_male() -> None:
     assert menstrual_keys.isdisjoint(conditions)
 
 
+def test_analyze_all_windows_loads_data_once_and_shares_window_independent_detectors(monkeypatch) -> None:
+    import health_log.analysis.engine as engine
+
+    now = datetime(2026, 2, 26, 10, 0, 0)
+    analyzer = HealthRiskAnalyzer(connection=None, user_id=1)  # type: ignore[arg-type]
+    analyzer._user_sex = "male"
+    fetched: list[str] = []
+
+    async def fake_fetch_rows(table, start: datetime, end: datetime):
+        fetched.append(table.name)
+        return []
+
+    async def fake_sleep_sessions(start: datetime, end: datetime):
+        fetched.append(tables.sleep_sessions.name)
+        return SleepIntervals()
+
+    fall_risk_calls: list[TimeWindow] = []
+    fall_risk = next(d for d in engine.DETECTORS if d.condition == "fall_risk")
+
+    def counting_fall_risk(*, window: TimeWindow, now: datetime, **inputs):
+        fall_risk_calls.append(window)
+        return fall_risk.assess(**inputs, window=window, now=now)
+
+    monkeypatch.setattr(
+        engine,
+        "DETECTORS",
+        tuple(replace(d, assess=counting_fall_risk) if d is fall_risk else d for d in engine.DETECTORS),
+    )
+    analyzer._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
+    analyzer._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
+    analyzer._fetch_rollups = _no_rollups  # type: ignore[assignment]
+
+    results = asyncio.run(analyzer.analyze_all_windows(now=now))
+
+    assert list(results) == [TimeWindow.NIGHT, TimeWindow.WEEK, TimeWindow.MONTH]
+    assert len(fetched) == len(set(fetched))
+    assert len(fall_risk_calls) == 1
+    for window, result in results.items():
+        fall_risk = next(a for a in result["assessments"] if a.condition == "fall_risk")
+        assert fall_risk.window == window
+
 def test_health_risk_analyzer_adds_menstrual_signal_for_female() -> None:
     now = datetime(2026, 2, 26, 10, 0, 0)
     analyzer = HealthRiskAnalyzer(connection=None, user_id=1)  # type: ignore[arg-type]
@@ -371,11 +427,12 @@ def test_health_risk_analyzer_adds_menstrual_signal_for_female() -> None:
             return menstrual_rows
         return []
 
-    async def fake_sleep_segments(start: datetime, end: datetime):
-        return []
+    async def fake_sleep_sessions(start: datetime, end: datetime):
+        return SleepIntervals()
 
     analyzer._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
-    analyzer._fetch_sleep_segments = fake_sleep_segments  # type: ignore[assignment]
+    analyzer._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
+    analyzer._fetch_rollups = _no_rollups  # type: ignore[assignment]
 
     result = asyncio.run(analyzer.analyze_window(TimeWindow.MONTH, now=now))
     conditions = {assessment.condition for assessment in result["assessments"]}
@@ -414,8 +471,8 @@ def test_patch_me_sex_enables_menstrual_forecast(monkeypatch) -> None:
 
             return Result()
 
-    async def fake_sleep_segments(start: datetime, end: datetime):
-        return []
+    async def fake_sleep_sessions(start: datetime, end: datetime):
+        return SleepIntervals()
 
     period_starts = [
         datetime(2025, 10, 1, 8, 0, 0),
@@ -433,7 +490,8 @@ def test_patch_me_sex_enables_menstrual_forecast(monkeypatch) -> None:
     fake_conn = FakeConnection()
     analyzer_before = HealthRiskAnalyzer(connection=fake_conn, user_id=1)  # type: ignore[arg-type]
     analyzer_before._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
-    analyzer_before._fetch_sleep_segments = fake_sleep_segments  # type: ignore[assignment]
+    analyzer_before._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
+    analyzer_before._fetch_rollups = _no_rollups  # type: ignore[assignment]
 
     before_result = asyncio.run(analyzer_before.analyze_window(TimeWindow.MONTH, now=now))
     before_conditions = {assessment.condition for assessment in before_result["assessments"]}
@@ -456,7 +514,8 @@ def test_patch_me_sex_enables_menstrual_forecast(monkeypatch) -> None:
 
     analyzer_after = HealthRiskAnalyzer(connection=fake_conn, user_id=1)  # type: ignore[arg-type]
     analyzer_after._fetch_rows = fake_fetch_rows  # type: ignore[assignment]
-    analyzer_after._fetch_sleep_segments = fake_sleep_segments  # type: ignore[assignment]
+    analyzer_after._fetch_sleep_sessions = fake_sleep_sessions  # type: ignore[assignment]
+    analyzer_after._fetch_rollups = _no_rollups  # type: ignore[assignment]
     after_result = asyncio.run(analyzer_after.analyze_window(TimeWindow.MONTH, now=now))
     after_conditions = {assessment.condition for assessment in after_result["assessments"]}
     assert "menstrual_cycle_start_forecast" in after_conditions
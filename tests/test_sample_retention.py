@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from health_log.services.sample_retention import retention_cutoff
+from health_log.settings import Settings
+
+
+def test_retention_cutoff_is_start_of_day():
+    assert retention_cutoff(datetime(2026, 10, 17, 15, 30), 365) == datetime(2025, 10, 17)
+
+
+@pytest.mark.parametrize("days", [0, 180, 730])
+def test_sample_retention_days_accepts_disabled_or_long_enough(days):
+    assert Settings(sample_retention_days=days).sample_retention_days == days
+
+
+def test_sample_retention_days_rejects_windows_analysis_still_reads():
+    with pytest.raises(ValidationError):
+        Settings(sample_retention_days=90)
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from health_log.analysis.sleep import SleepIntervals, as_sleep_intervals
+from health_log.analysis.utils import EventPoint
+
+
+def _at(hour: int, day: int = 1) -> datetime:
+    return datetime(2026, 3, day, hour)
+
+
+def test_sleep_intervals_merge_and_membership():
+    sleep = SleepIntervals([(_at(3), _at(5)), (_at(0), _at(3)), (_at(8), _at(8)), (_at(22), _at(23))])
+
+    assert list(sleep) == [(_at(0), _at(5)), (_at(22), _at(23))]
+    assert len(sleep) == 2
+    assert _at(0) in sleep and _at(5) in sleep and _at(22, 1) in sleep
+    assert _at(6) not in sleep and _at(8) not in sleep and datetime(2026, 2, 28, 23) not in sleep
+    assert sleep.containing(_at(4)) == (_at(0), _at(5))
+    assert sleep.containing(_at(6)) is None
+    assert sleep.total_hours() == 6.0
+
+
+def test_sleep_intervals_overlapping_keeps_whole_intervals():
+    sleep = SleepIntervals([(_at(23, day), _at(7, day + 1)) for day in range(1, 6)])
+
+    window = sleep.overlapping(_at(0, 3), _at(12, 4))
+
+    assert list(window) == [(_at(23, 2), _at(7, 3)), (_at(23, 3), _at(7, 4))]
+    assert not sleep.overlapping(_at(8, 6), _at(9, 6))
+    assert as_sleep_intervals(window) is window
+    assert not as_sleep_intervals(None)
+
+
+def test_sleep_intervals_mask_matches_membership():
+    sleep = SleepIntervals([(_at(0), _at(5)), (_at(22), _at(23)), (_at(1, 2), _at(2, 2))])
+    ordered = [datetime(2026, 2, 28, 23), *(_at(hour) for hour in range(24)), _at(1, 2), _at(3, 2)]
+
+    assert sleep.mask(ordered) == [ts in sleep for ts in ordered]
+    assert sleep.mask(ordered[::-1]) == [ts in sleep for ts in ordered[::-1]]
+    assert sleep.mask([]) == []
+    assert SleepIntervals().mask(ordered) == [False] * len(ordered)
+
+
+def test_sleep_intervals_within_and_split_keep_point_order():
+    sleep = SleepIntervals([(_at(0), _at(5))])
+    points = [EventPoint(_at(6), 1.0), EventPoint(_at(2), 2.0), EventPoint(_at(5), 3.0), EventPoint(_at(7), 4.0)]
+
+    assert sleep.within(points) == [points[1], points[2]]
+    assert sleep.split(points) == ([points[1], points[2]], [points[0], points[3]])
@@ -0,0 +1,119 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from health_log.analysis.rollups import build_daily_rollups
+from health_log.analysis.series import (
+    TimeSeries,
+    as_time_series,
+    daily_medians,
+    daily_rollups,
+    epoch_us,
+)
+from health_log.analysis.sleep import SleepIntervals
+from health_log.analysis.utils import to_points
+
+_T0 = datetime(2026, 3, 1, 22, 0, 0)
+
+
+def _rows() -> list[tuple[datetime, object]]:
+    return [(_T0 + timedelta(hours=h), 60.0 + h) for h in range(6)]
+
+
+def test_from_rows_keeps_what_to_points_keeps_in_time_order() -> None:
+    rows = [
+        (_T0 + timedelta(hours=2), "61,5"),
+        (_T0, 60.0),
+        (None, 70.0),
+        (_T0 + timedelta(hours=1), None),
+        (_T0 + timedelta(hours=3), "n/a"),
+    ]
+    series = TimeSeries.from_rows(rows)
+
+    assert list(series) == [(_T0, 60.0), (_T0 + timedelta(hours=2), 61.5)]
+    assert to_points(series) == sorted(to_points(rows), key=lambda p: p.timestamp)
+    assert list(series.epoch_us) == [epoch_us(_T0), epoch_us(_T0 + timedelta(hours=2))]
+
+
+def test_between_is_an_inclusive_view() -> None:
+    series = TimeSeries.from_rows(_rows())
+    view = series.between(_T0 + timedelta(hours=1), _T0 + timedelta(hours=3))
+
+    assert list(view) == _rows()[1:4]
+    assert list(view.between(_T0, _T0 + timedelta(hours=1))) == _rows()[1:2]
+    assert not series.between(_T0 + timedelta(days=1), _T0 + timedelta(days=2))
+    assert view.values.obj is series.values.obj
+
+
+def test_slicing_and_indexing() -> None:
+    series = TimeSeries.from_rows(_rows())
+
+    assert series[0] == _rows()[0]
+    assert series[-1] == _rows()[-1]
+    assert isinstance(series[1:3], TimeSeries)
+    assert list(series[1:3]) == _rows()[1:3]
+    assert list(series[4:2]) == []
+    assert series[::2] == _rows()[::2]
+
+
+def test_points_are_built_once_and_shared_between_views() -> None:
+    series = TimeSeries.from_rows(_rows())
+    view = series[2:]
+
+    assert to_points(view)[0] is to_points(series)[2]
+    assert [(p.timestamp, p.value) for p in to_points(view)] == _rows()[2:]
+
+
+def test_mask_keeps_flagged_samples() -> None:
+    series = TimeSeries.from_rows(_rows())
+
+    kept = series.mask(value >= 63.0 for value in series.values)
+    assert list(kept) == _rows()[3:]
+    with pytest.raises(ValueError):
+        series.mask([True])
+
+
+def test_by_day_groups_contiguous_runs() -> None:
+    series = TimeSeries.from_rows(_rows())
+
+    days = series.by_day()
+    assert list(days) == [date(2026, 3, 1), date(2026, 3, 2)]
+    assert list(days[date(2026, 3, 1)]) == _rows()[:2]
+    assert list(days[date(2026, 3, 2)]) == _rows()[2:]
+    assert list(series[3:].by_day()) == [date(2026, 3, 2)]
+
+
+def test_as_time_series_reuses_an_existing_series() -> None:
+    series = TimeSeries.from_rows(_rows())
+
+    assert as_time_series(series) is series
+    assert list(as_time_series(_rows())) == _rows()
+
+
+def test_within_keeps_samples_inside_the_intervals() -> None:
+    series = TimeSeries.from_rows(_rows())
+    sleep = SleepIntervals(
+        [(_T0 + timedelta(hours=1), _T0 + timedelta(hours=2)), (_T0 + timedelta(hours=4), _T0 + timedelta(hours=9))]
+    )
+
+    assert list(series.within(sleep)) == [_rows()[i] for i in (1, 2, 4, 5)]
+    assert list(series[2:5].within(sleep)) == [_rows()[i] for i in (2, 4)]
+
+
+def test_daily_rollups_match_build_daily_rollups() -> None:
+    rows = [(_T0 + timedelta(minutes=37 * i), 50.0 + (i * 7) % 23) for i in range(200)]
+    series = TimeSeries.from_rows(rows)
+
+    assert series.daily_rollups() == build_daily_rollups(to_points(rows))
+    assert daily_rollups(to_points(rows)) == series.daily_rollups()
+
+
+def test_daily_rollups_are_memoized_per_range_across_views() -> None:
+    series = TimeSeries.from_rows(_rows())
+    start, end = _T0 + timedelta(hours=1), _T0 + timedelta(hours=4)
+
+    first = daily_rollups(series, start, end)
+    assert daily_rollups(series[1:], start, end) is first
+    assert daily_rollups(series, start) is not first
+    assert daily_medians(series, start, end) == [61.0, 63.0]
+    assert daily_medians(to_points(series), start, end) == [61.0, 63.0]
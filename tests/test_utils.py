@@ -22,3 +22,21 @@ def test_utcnow_is_close_to_now():
     time.sleep(0.01)
     after = datetime.utcnow()
     assert before <= result <= after
+
+
+def test_parse_value_text_accepts_plain_numbers():
+    from health_log.utils import parse_value_text
+
+    assert [parse_value_text(v) for v in ("61", " 72,5 ", "1e2", "-.5", 7, 1.5)] == [
+        61.0, 72.5, 100.0, -0.5, 7.0, 1.5,
+    ]
+
+
+def test_parse_value_text_rejects_what_sql_rejects():
+    from health_log.utils import parse_value_text
+
+    for raw in (
+        "nan", "inf", "-Infinity", "1_000", "n/a", "", "\t5", None, float("nan"), float("inf"),
+        "1e999", "1e-400", "1e1000", "9" * 65, 1e308, 10**400,
+    ):
+        assert parse_value_text(raw) is None, raw
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from health_log.services.apple_health_parser import ParsedRecord, TimestampParser
+from health_log.services.record_routing import normalize_records
+from health_log.services.watermarks import collect_watermarks, filter_new_records
+
+HR = "HKQuantityTypeIdentifierHeartRate"
+
+
+def _record(start: str, source: str = "Watch", record_type: str = HR) -> ParsedRecord:
+    return ParsedRecord(
+        attrs={"type": record_type, "sourceName": source, "startDate": start, "endDate": start, "value": "60"}
+    )
+
+
+def test_filter_drops_records_at_or_below_watermark():
+    records = [
+        _record("2024-01-01 10:00:00"),
+        _record("2024-01-01 11:00:00"),
+        _record("2024-01-01 12:00:00"),
+        _record("2024-01-01 09:00:00", source="iPhone"),
+        _record("", source="Watch"),
+    ]
+    watermarks = {(HR, "Watch"): datetime(2024, 1, 1, 11, 0)}
+
+    kept = filter_new_records(records, watermarks, TimestampParser())
+
+    assert kept == [records[2], records[3], records[4]]
+
+
+def test_collect_watermarks():
+    parse_ts = TimestampParser()
+    marks = collect_watermarks(
+        [_record("2024-01-01 10:00:00"), _record("2024-01-02 10:00:00"), _record("2024-01-01 08:00:00", "iPhone")],
+        parse_ts,
+    )
+    assert marks == {(HR, "Watch"): datetime(2024, 1, 2, 10, 0), (HR, "iPhone"): datetime(2024, 1, 1, 8, 0)}
+
+
+def test_normalize_records_skips_before_fingerprinting():
+    records = [_record("2024-01-01 10:00:00"), _record("2024-01-01 12:00:00")]
+
+    chunk = normalize_records(
+        records,
+        upload_id=1,
+        user_id=1,
+        provider="apple_health",
+        data_format="xml",
+        watermarks={(HR, "Watch"): datetime(2024, 1, 1, 11, 0)},
+    )
+
+    assert chunk.record_count == 2
+    assert chunk.skipped_count == 1
+    assert len(chunk.raw_rows) == 1
+    assert len(chunk.routed.rows_by_type[HR]) == 1
+    assert chunk.watermarks == {(HR, "Watch"): datetime(2024, 1, 1, 12, 0)}